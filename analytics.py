@@ -0,0 +1,138 @@
+import datetime
+import time
+from streaks import DAILY, WEEKLY, MONTHLY, EPOCH, to_day
+
+try:
+    import numpy as np
+except ImportError:  # Raporlar sekmesi numpy olmadan devre dışı kalır
+    np = None
+
+WEEKDAY_NAMES = ["Pzt", "Sal", "Çar", "Per", "Cum", "Cmt", "Paz"]
+# Bir pencere (gün) içinde beklenen dönem sayısı için ortalama dönem uzunluğu
+PERIOD_DAYS = {DAILY: 1.0, WEEKLY: 7.0, MONTHLY: 30.44}
+
+
+def available():
+    return np is not None
+
+
+def period_indices(days, frequency):
+    # Gün numaralarını (1970-01-01 = 0) sıklığa göre dönem numarasına çevirir
+    if frequency == WEEKLY:
+        # 1970-01-01 perşembe; +3 ile haftalar pazartesi başlar
+        return (days + 3) // 7
+    if frequency == MONTHLY:
+        return days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    return days
+
+
+def longest_runs(keys, periods, n):
+    # keys/periods: benzersiz ve sıralı (alışkanlık, dönem) çiftleri; alışkanlık başına en uzun ardışık seri
+    result = np.zeros(n, dtype=np.int64)
+    if len(keys) == 0:
+        return result
+    breaks = np.ones(len(keys), dtype=bool)
+    breaks[1:] = (keys[1:] != keys[:-1]) | (periods[1:] != periods[:-1] + 1)
+    starts = np.flatnonzero(breaks)
+    lengths = np.diff(np.append(starts, len(keys)))
+    np.maximum.at(result, keys[starts], lengths)
+    return result
+
+
+def build_report(db, user_id, today=None):
+    if np is None:
+        raise RuntimeError("Raporlar için numpy gerekli (pip install numpy).")
+    started = time.perf_counter()
+    today_day = to_day(today or datetime.date.today())
+    habits = db.list_habits(user_id)
+    n = len(habits)
+    ids = np.array([h["id"] for h in habits], dtype=np.int64)
+    order = np.argsort(ids)
+    sorted_ids = ids[order]
+
+    rows = db.completion_columns(user_id)
+    data = np.array(rows, dtype=np.int64).reshape(-1, 2)
+    habit_ids, days = data[:, 0], data[:, 1]
+    pos = order[np.searchsorted(sorted_ids, habit_ids)] if n else habit_ids
+
+    counts = np.bincount(pos, minlength=n) if n else np.zeros(0, dtype=np.int64)
+    created = np.array([to_day(h["created_at"]) if h["created_at"] else today_day for h in habits],
+                       dtype=np.int64)
+    first_done = np.full(n, today_day, dtype=np.int64)
+    if len(pos):
+        np.minimum.at(first_done, pos, days)
+    start_day = np.minimum(created, first_done)
+
+    frequencies = [h["frequency"] for h in habits]
+    done_periods = np.zeros(n, dtype=np.int64)
+    expected = np.zeros(n, dtype=np.int64)
+    longest = np.zeros(n, dtype=np.int64)
+    recent = {7: np.zeros(n, dtype=np.int64), 30: np.zeros(n, dtype=np.int64)}
+    for frequency in set(frequencies):
+        mask = np.array([f == frequency for f in frequencies], dtype=bool)
+        row_mask = mask[pos] if len(pos) else np.zeros(0, dtype=bool)
+        p, d = pos[row_mask], days[row_mask]
+        periods = period_indices(d, frequency)
+        if len(p) > 1 and (np.any(p[1:] < p[:-1]) or np.any((p[1:] == p[:-1]) & (periods[1:] < periods[:-1]))):
+            order_ = np.lexsort((periods, p))
+            p, d, periods = p[order_], d[order_], periods[order_]
+        # Aynı dönemdeki birden çok tamamlama tek sayılır (satırlar alışkanlık/tarih sıralı)
+        first = np.ones(len(p), dtype=bool)
+        first[1:] = (p[1:] != p[:-1]) | (periods[1:] != periods[:-1])
+        kp, kperiods = p[first], periods[first]
+        done_periods[mask] = np.bincount(kp, minlength=n)[mask]
+        longest[mask] = longest_runs(kp, kperiods, n)[mask]
+        first_period = period_indices(start_day[mask], frequency)
+        expected[mask] = period_indices(np.full(mask.sum(), today_day), frequency) - first_period + 1
+        for window in recent:
+            in_window = d > today_day - window
+            recent[window][mask] = np.bincount(p[in_window], minlength=n)[mask]
+
+    rate = np.divide(done_periods, expected, out=np.zeros(n), where=expected > 0)
+    per_window = {}
+    for window, done in recent.items():
+        wanted = np.array([max(1.0, window / PERIOD_DAYS.get(f, 1.0)) for f in frequencies])
+        per_window[window] = np.minimum(1.0, done / wanted) if n else np.zeros(0)
+
+    # Kategorisiz alışkanlıklar (ör. içe aktarılan) "" altında toplanır; None sıralanamaz
+    categories = {}
+    for i, h in enumerate(habits):
+        c = categories.setdefault(h["category"] or "", [0, 0, 0, 0])
+        c[0] += 1
+        c[1] += int(counts[i])
+        c[2] += int(done_periods[i])
+        c[3] += int(expected[i])
+
+    # Tüm alışkanlıklar için günlük tamamlama sayısı ve 7/30 günlük hareketli ortalama (son 90 gün)
+    horizon = 90
+    recent_days = days[days > today_day - horizon - 29]
+    daily = np.bincount(recent_days - (today_day - horizon - 29), minlength=horizon + 29)[:horizon + 29]
+    rolling = {w: np.convolve(daily, np.ones(w) / w, mode="valid")[-horizon:] for w in (7, 30)}
+
+    return {
+        "habits": [
+            {
+                "id": h["id"],
+                "name": h["name"],
+                "category": h["category"] or "",
+                "frequency": h["frequency"],
+                "completions": int(counts[i]),
+                "rate": float(rate[i]),
+                "rate_7": float(per_window[7][i]),
+                "rate_30": float(per_window[30][i]),
+                "longest_streak": int(longest[i]),
+            }
+            for i, h in enumerate(habits)
+        ],
+        "categories": [
+            {"category": name, "habits": c[0], "completions": c[1], "rate": c[2] / c[3] if c[3] else 0.0}
+            for name, c in sorted(categories.items())
+        ],
+        "weekday": dict(zip(WEEKDAY_NAMES, np.bincount((days + 3) % 7, minlength=7).tolist())),
+        "daily": {
+            "start": (EPOCH + datetime.timedelta(days=int(today_day - horizon + 1))).isoformat(),
+            "rolling_7": rolling[7].tolist(),
+            "rolling_30": rolling[30].tolist(),
+        },
+        "elapsed_ms": (time.perf_counter() - started) * 1000.0,
+    }
@@ -0,0 +1,484 @@
+import asyncio
+import datetime
+import json
+import re
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qsl, urlsplit
+import passwords
+from streaks import active_streak, to_date
+
+# Arayüzsüz yerel JSON API: HTTP/1.1 keep-alive ve pipelining, SQLite işleri sınırlı thread havuzunda.
+# Kimlik doğrulaması yoktur; varsayılan olarak yalnızca 127.0.0.1'e bağlanır.
+HOST = "127.0.0.1"
+PORT = 8765
+WORKERS = 4
+# Havuzda çalışan + bekleyen en fazla iş; dolunca bağlantılar yeni iş için bekler
+MAX_PENDING = 64
+# Tek bağlantıda yanıtı beklenen en fazla pipelined istek
+MAX_PIPELINE = 16
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 4 * 1024 * 1024
+IDLE_TIMEOUT = 30.0
+# Toplu istekte en fazla işlem
+MAX_BATCH = 1000
+# Yan etkisiz yöntemler; pipelined istekler arasında yalnızca bunlar eşzamanlı işlenir (RFC 9112 §9.3.2)
+SAFE_METHODS = ("GET", "HEAD")
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class _OpFailed(Exception):
+    # Toplu istekte başarısız işlemin savepoint'ini geri almak için; args = (durum, yanıt)
+    pass
+
+
+# ---------------------------
+# JSON helpers
+# ---------------------------
+def _default(value):
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    raise TypeError(f"JSON'a çevrilemeyen değer: {type(value).__name__}")
+
+
+def dumps(payload):
+    return json.dumps(payload, ensure_ascii=False, default=_default).encode("utf-8")
+
+
+def user_json(user):
+    # Parola özeti API'den dönmez
+    return {"id": user.id, "username": user.username, "email": user.email, "total_points": user.total_points}
+
+
+def habit_json(habit):
+    return {name: getattr(habit, name) for name in habit.keys()}
+
+
+def _field(body, name, kind=str, required=True):
+    value = body.get(name) if isinstance(body, dict) else None
+    if value is None:
+        if required:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"'{name}' alanı gerekli")
+        return None
+    if not isinstance(value, kind) or isinstance(value, bool) and kind is not bool:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"'{name}' alanı geçersiz")
+    return value
+
+
+def _date(value, name="date"):
+    if value is None:
+        return datetime.date.today()
+    try:
+        return to_date(value)
+    except (TypeError, ValueError):
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"'{name}' YYYY-AA-GG biçiminde olmalı") from None
+
+
+def _habit_or_404(db, habit_id):
+    habit = db.get_habit(habit_id)
+    if habit is None:
+        raise ApiError(HTTPStatus.NOT_FOUND, "alışkanlık bulunamadı")
+    return habit
+
+
+# ---------------------------
+# Handlers
+# ---------------------------
+# Eşzamanlı işleyiciler (db, eşleşme, sorgu, gövde) alır ve veritabanı havuzunda çalışır; toplu istekte kullanılabilir.
+# async işleyiciler parola özeti gibi uzun işleri kendi havuzlarına dağıtır.
+def get_user(db, m, query, body):
+    user = db.get_user_by_id(int(m["user_id"]))
+    if user is None:
+        raise ApiError(HTTPStatus.NOT_FOUND, "kullanıcı bulunamadı")
+    return HTTPStatus.OK, user_json(user)
+
+
+def get_points(db, m, query, body):
+    return HTTPStatus.OK, {"user_id": int(m["user_id"]), "total_points": db.total_points(int(m["user_id"]))}
+
+
+def list_habits(db, m, query, body):
+    user_id = int(m["user_id"])
+    if query.get("q"):
+        habits = db.search_habits(user_id, query["q"])
+    else:
+        habits = db.list_habits_page(user_id, int(query.get("after", 0)), min(int(query.get("limit", 256)), 1000))
+    return HTTPStatus.OK, [habit_json(h) for h in habits]
+
+
+def add_habit(db, m, query, body):
+    user_id = int(m["user_id"])
+    name = _field(body, "name").strip()
+    if not name:
+        raise ApiError(HTTPStatus.BAD_REQUEST, "alışkanlık adı boş olamaz")
+    if db.get_user_by_id(user_id) is None:
+        raise ApiError(HTTPStatus.NOT_FOUND, "kullanıcı bulunamadı")
+    if db.habit_name_exists(user_id, name):
+        raise ApiError(HTTPStatus.CONFLICT, "bu isimde bir alışkanlık zaten mevcut")
+    habit_id = db.add_habit(user_id, name, _field(body, "category"), _field(body, "frequency"))
+    if habit_id is None:
+        raise ApiError(HTTPStatus.CONFLICT, "bu isimde bir alışkanlık zaten mevcut")
+    return HTTPStatus.CREATED, habit_json(db.get_habit(habit_id))
+
+
+def get_habit(db, m, query, body):
+    habit = _habit_or_404(db, int(m["habit_id"]))
+    result = habit_json(habit)
+    streak = db.streak_for_habit(habit.id)
+    if streak is not None:
+        result.update(current_streak=active_streak(streak["current_streak"], streak["last_date"], habit.frequency),
+                      longest_streak=streak["longest_streak"], last_date=to_date(streak["last_date"]))
+    return HTTPStatus.OK, result
+
+
+def update_habit(db, m, query, body):
+    habit = _habit_or_404(db, int(m["habit_id"]))
+    name = (_field(body, "name", required=False) or habit.name).strip()
+    if db.habit_name_exists(habit.user_id, name, exclude_id=habit.id):
+        raise ApiError(HTTPStatus.CONFLICT, "bu isimde bir alışkanlık zaten mevcut")
+    if not db.update_habit(habit.id, name, _field(body, "category", required=False) or habit.category,
+                           _field(body, "frequency", required=False) or habit.frequency):
+        raise ApiError(HTTPStatus.CONFLICT, "bu isimde bir alışkanlık zaten mevcut")
+    return HTTPStatus.OK, habit_json(db.get_habit(habit.id))
+
+
+def delete_habit(db, m, query, body):
+    # Arayüzdeki gibi: alışkanlıktan kazanılan puanlar da düşülür
+    habit = _habit_or_404(db, int(m["habit_id"]))
+    db.remove_habit(habit.id)
+    return HTTPStatus.NO_CONTENT, None
+
+
+def history(db, m, query, body):
+    habit_id = _habit_or_404(db, int(m["habit_id"])).id
+    if "start" in query or "end" in query:
+        days = db.completions_between(habit_id, _date(query.get("start", "1970-01-01"), "start"),
+                                      _date(query.get("end"), "end"))
+    else:
+        days = db.completions_for_habit(habit_id)
+    return HTTPStatus.OK, [to_date(d) for d in days]
+
+
+def mark(db, m, query, body):
+    habit_id = _habit_or_404(db, int(m["habit_id"])).id
+    date_ = _date(_field(body, "date", required=False))
+    # *_many puanı da günceller; mark_completed yalnızca satırı ekler
+    created = db.mark_completed_many([(habit_id, date_)]) > 0
+    return (HTTPStatus.CREATED if created else HTTPStatus.OK), {"habit_id": habit_id, "date": date_,
+                                                                  "created": created}
+
+
+def unmark(db, m, query, body):
+    habit_id = _habit_or_404(db, int(m["habit_id"])).id
+    db.unmark_completed_many([(habit_id, _date(m["date"]))])
+    return HTTPStatus.NO_CONTENT, None
+
+
+def completions_many(db, m, query, body):
+    # {"done": true/false, "items": [[habit_id, "YYYY-AA-GG"], ...]}: tek transaction, puanlar toplu
+    items = _field(body, "items", list)
+    try:
+        pairs = [(int(habit_id), _date(date_)) for habit_id, date_ in items]
+    except (TypeError, ValueError):
+        raise ApiError(HTTPStatus.BAD_REQUEST, "'items' [habit_id, tarih] çiftleri olmalı") from None
+    done = _field(body, "done", bool, required=False)
+    changed = db.unmark_completed_many(pairs) if done is False else db.mark_completed_many(pairs)
+    return HTTPStatus.OK, {"changed": changed}
+
+
+async def create_user(api, m, query, body):
+    username = _field(body, "username").strip()
+    email = _field(body, "email").strip().lower()
+    password = _field(body, "password")
+    if not username or "@" not in email or not password:
+        raise ApiError(HTTPStatus.BAD_REQUEST, "kullanıcı adı, e-posta ve şifre gerekli")
+    password_hash = await api.hash(passwords.hash_password, password)
+    user_id = await api.run(api.db.create_user, username, email, password_hash)
+    if user_id is None:
+        raise ApiError(HTTPStatus.CONFLICT, "e-posta veya kullanıcı adı zaten kayıtlı")
+    return HTTPStatus.CREATED, user_json(await api.run(api.db.get_user_by_id, user_id))
+
+
+async def login(api, m, query, body):
+    user = await api.run(api.db.get_user_by_email, _field(body, "email").strip().lower())
+    if user is None:
+        raise ApiError(HTTPStatus.UNAUTHORIZED, "e-posta veya şifre hatalı")
+    ok, new_hash = await api.hash(passwords.check, _field(body, "password"), user.password_hash)
+    if not ok:
+        raise ApiError(HTTPStatus.UNAUTHORIZED, "e-posta veya şifre hatalı")
+    if new_hash is not None:
+        await api.run(api.db.set_password_hash, user.id, new_hash)
+    return HTTPStatus.OK, user_json(user)
+
+
+async def batch(api, m, query, body):
+    # [{"method": "POST", "path": "/habits/3/completions", "body": {...}}, ...]
+    # Tüm işlemler tek havuz işinde ve tek commit'te; her işlem kendi savepoint'inde çalışıp kendi durumunu döner,
+    # hatalı olan yalnızca kendini geri alır
+    if not isinstance(body, list) or len(body) > MAX_BATCH:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"gövde en fazla {MAX_BATCH} işlemlik bir liste olmalı")
+    ops = []
+    for op in body:
+        if not isinstance(op, dict) or not isinstance(op.get("path"), str):
+            raise ApiError(HTTPStatus.BAD_REQUEST, "her işlemde 'method' ve 'path' gerekli")
+        handler, match, op_query = api.route(str(op.get("method", "GET")).upper(), op["path"])
+        if asyncio.iscoroutinefunction(handler):
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"toplu istekte desteklenmeyen işlem: {op['path']}")
+        ops.append((handler, match, op_query, op.get("body")))
+
+    def run_all(db):
+        results = []
+        with db.transaction("batch"):
+            for handler, match, op_query, op_body in ops:
+                try:
+                    with db.transaction("batch_op"):
+                        status, payload = call_handler(handler, db, match, op_query, op_body)
+                        if status >= 400:
+                            raise _OpFailed(status, payload)
+                except _OpFailed as e:
+                    status, payload = e.args
+                except Exception as e:
+                    status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(e).__name__}: {e}"}
+                results.append({"status": int(status), "body": payload})
+        return results
+
+    return HTTPStatus.OK, await api.run(run_all, api.db)
+
+
+ROUTES = [
+    ("POST", r"/users", create_user),
+    ("POST", r"/login", login),
+    ("POST", r"/batch", batch),
+    ("POST", r"/completions", completions_many),
+    ("GET", r"/users/(?P<user_id>\d+)", get_user),
+    ("GET", r"/users/(?P<user_id>\d+)/points", get_points),
+    ("GET", r"/users/(?P<user_id>\d+)/habits", list_habits),
+    ("POST", r"/users/(?P<user_id>\d+)/habits", add_habit),
+    ("GET", r"/habits/(?P<habit_id>\d+)", get_habit),
+    ("PATCH", r"/habits/(?P<habit_id>\d+)", update_habit),
+    ("DELETE", r"/habits/(?P<habit_id>\d+)", delete_habit),
+    ("GET", r"/habits/(?P<habit_id>\d+)/completions", history),
+    ("POST", r"/habits/(?P<habit_id>\d+)/completions", mark),
+    ("DELETE", r"/habits/(?P<habit_id>\d+)/completions/(?P<date>[\d-]+)", unmark),
+]
+_ROUTES = [(method, re.compile(pattern + r"/?"), handler) for method, pattern, handler in ROUTES]
+
+
+def call_handler(handler, db, match, query, body):
+    # Hatalar yanıta çevrilir; toplu istekte diğer işlemler devam eder
+    try:
+        return handler(db, match, query, body)
+    except ApiError as e:
+        return e.status, {"error": str(e)}
+    except sqlite3.IntegrityError as e:
+        # Benzersizlik / yabancı anahtar ihlali: istek mevcut durumla çakışıyor
+        return HTTPStatus.CONFLICT, {"error": str(e)}
+    except ValueError as e:
+        return HTTPStatus.BAD_REQUEST, {"error": str(e)}
+
+
+# ---------------------------
+# Server
+# ---------------------------
+class ApiServer:
+    def __init__(self, db, workers=WORKERS, max_pending=MAX_PENDING):
+        self.db = db
+        passwords.use_store(db)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api-db")
+        self.max_pending = max_pending
+        self.stats = {"connections": 0, "requests": 0, "errors": 0}
+        self._slots = None
+        self._server = None
+
+    def route(self, method, target):
+        url = urlsplit(target)
+        query = dict(parse_qsl(url.query))
+        allowed = False
+        for route_method, pattern, handler in _ROUTES:
+            match = pattern.fullmatch(url.path)
+            if match is None:
+                continue
+            if route_method == method:
+                return handler, match.groupdict(), query
+            allowed = True
+        if allowed:
+            raise ApiError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} {url.path} desteklenmiyor")
+        raise ApiError(HTTPStatus.NOT_FOUND, f"bilinmeyen yol: {url.path}")
+
+    async def run(self, func, *args):
+        # Havuz sınırlı: en fazla max_pending iş kuyrukta; fazlası burada bekler (geri basınç)
+        async with self._slots:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def hash(self, func, *args):
+        # Parola özetleri ayrı havuzda; KDF süresi veritabanı işlerini bekletmez
+        return await asyncio.get_running_loop().run_in_executor(passwords.executor(), func, *args)
+
+    async def dispatch(self, method, target, body):
+        try:
+            handler, match, query = self.route(method, target)
+            if asyncio.iscoroutinefunction(handler):
+                return await handler(self, match, query, body)
+            return await self.run(call_handler, handler, self.db, match, query, body)
+        except ApiError as e:
+            return e.status, {"error": str(e)}
+        except Exception as e:
+            self.stats["errors"] += 1
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(e).__name__}: {e}"}
+
+    # ---------------------------
+    # HTTP/1.1
+    # ---------------------------
+    async def read_request(self, reader):
+        # (yöntem, hedef, gövde, bağlantı açık kalsın mı) ya da bağlantı kapandıysa None
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), IDLE_TIMEOUT)
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+            return None
+        except asyncio.LimitOverrunError:
+            raise ApiError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "başlıklar çok büyük") from None
+        # Yüzde kodlamasız UTF-8 hedefler (curl "?q=koş") de kabul edilir
+        lines = head.decode("utf-8", "replace").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ")
+        except ValueError:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "geçersiz istek satırı") from None
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+        if "transfer-encoding" in headers:
+            raise ApiError(HTTPStatus.LENGTH_REQUIRED, "Content-Length gerekli")
+        # Yalnızca ASCII rakamlar (int() "-5", "+5" ve "1_0"ı da kabul ederdi)
+        length = headers.get("content-length") or "0"
+        if not (length.isascii() and length.isdigit()):
+            raise ApiError(HTTPStatus.BAD_REQUEST, "geçersiz Content-Length")
+        length = int(length)
+        if length > MAX_BODY_BYTES:
+            raise ApiError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "gövde çok büyük")
+        body = None
+        if length:
+            try:
+                body = json.loads(await reader.readexactly(length))
+            except ValueError:
+                raise ApiError(HTTPStatus.BAD_REQUEST, "gövde geçerli JSON değil") from None
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+        return method.upper(), target, body, keep_alive
+
+    @staticmethod
+    def encode_response(status, payload, keep_alive):
+        status = HTTPStatus(status)
+        body = b"" if payload is None and status == HTTPStatus.NO_CONTENT else dumps(payload)
+        head = (f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        return head.encode("latin-1") + body
+
+    async def write_responses(self, writer, pending):
+        try:
+            while True:
+                item = await pending.get()
+                if item is None:
+                    return
+                task, keep_alive = item
+                status, payload = await task
+                writer.write(self.encode_response(status, payload, keep_alive))
+                if not keep_alive:
+                    return
+                # Art arda hazır yanıtlar tek seferde gönderilir
+                if pending.empty():
+                    await writer.drain()
+        finally:
+            # Bağlantı koptuysa kuyruk boşaltılır; dolu kuyrukta bekleyen okuyucu serbest kalır
+            while not pending.empty():
+                item = pending.get_nowait()
+                if item is not None:
+                    item[0].cancel()
+
+    async def dispatch_after(self, waits, method, target, body):
+        if waits:
+            await asyncio.wait(waits)
+        return await self.dispatch(method, target, body)
+
+    async def handle_connection(self, reader, writer):
+        # Okuyucu istekleri ayrıştırıp hemen sıraya alır (pipelining); yanıtlar geliş sırasıyla yazılır.
+        # Yazan istek kendinden önceki tüm istekler bitince, okuma ise önceki son yazma bitince başlar;
+        # böylece yalnızca art arda okumalar eşzamanlı işlenir.
+        self.stats["connections"] += 1
+        pending = asyncio.Queue(MAX_PIPELINE)
+        responder = asyncio.ensure_future(self.write_responses(writer, pending))
+        inflight = []
+        last_write = None
+        try:
+            while not responder.done():
+                try:
+                    request = await self.read_request(reader)
+                except ApiError as e:
+                    await pending.put((asyncio.ensure_future(_done(e.status, {"error": str(e)})), False))
+                    break
+                if request is None:
+                    break
+                method, target, body, keep_alive = request
+                self.stats["requests"] += 1
+                inflight = [task for task in inflight if not task.done()]
+                if method in SAFE_METHODS:
+                    waits = [last_write] if last_write is not None and not last_write.done() else []
+                else:
+                    waits = list(inflight)
+                task = asyncio.ensure_future(self.dispatch_after(waits, method, target, body))
+                inflight.append(task)
+                if method not in SAFE_METHODS:
+                    last_write = task
+                await pending.put((task, keep_alive))
+                if not keep_alive:
+                    break
+            if not responder.done():
+                await pending.put(None)
+            await responder
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            responder.cancel()
+            writer.close()
+
+    async def start(self, host=HOST, port=PORT):
+        self._slots = asyncio.Semaphore(self.max_pending)
+        self._server = await asyncio.start_server(self.handle_connection, host, port,
+                                                  limit=MAX_HEADER_BYTES)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self, host=HOST, port=PORT, on_ready=None):
+        address = await self.start(host, port)
+        if on_ready is not None:
+            on_ready(address)
+        async with self._server:
+            await self._server.serve_forever()
+
+    def close(self):
+        if self._server is not None:
+            self._server.close()
+        self.executor.shutdown(wait=True)
+
+
+async def _done(status, payload):
+    return status, payload
+
+
+def serve(db, host=HOST, port=PORT, workers=WORKERS, on_ready=None):
+    server = ApiServer(db, workers)
+    try:
+        asyncio.run(server.serve_forever(host, port, on_ready))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
@@ -1,20 +1,44 @@
 import sys
-from PyQt5 import QtWidgets
-from database import Database
-from dialogs import LoginDialog
-from main_window import MainWindow
+import time
 
-def main():
-    app = QtWidgets.QApplication(sys.argv)
+# Başlangıç süreleri bu andan itibaren ölçülür
+STARTED = time.perf_counter()
+
+
+def main(argv=None):
+    argv = list(sys.argv if argv is None else argv)
+    from startup import StartupReport
+    report = StartupReport(STARTED, enabled="--startup-report" in argv)
+    argv = [a for a in argv if a != "--startup-report"]
+
+    # Giriş penceresi için gerekenler dışında bir şey yüklenmez; ana pencere girişten sonra içe aktarılır
+    from PyQt5 import QtWidgets
+    from database import Database
+    from dialogs import LoginDialog
+    import passwords
+    report.mark("içe aktarmalar (Qt, veritabanı, giriş)")
+
+    app = QtWidgets.QApplication(argv)
+    report.mark("QApplication")
     db = Database()
+    passwords.use_store(db)
+    report.mark("veritabanı açılışı")
 
     login = LoginDialog(db)
+    report.watch_first_paint(login, "giriş penceresi ilk çizim")
     if login.exec_() == QtWidgets.QDialog.Accepted:
+        report.mark("giriş yapıldı (kullanıcı beklemesi dahil)")
+        from main_window import MainWindow
         user = db.get_user_by_id(login.user["id"])
         win = MainWindow(db, user)
+        report.mark("ana pencere kurulumu")
+        report.watch_first_paint(win, "ana pencere ilk çizim", on_done=report.print)
         win.show()
+        # Puan denetimi açılışı geciktirmesin diye pencere açıldıktan sonra worker'da yapılır
+        win.reconcile_points()
         app.exec_()
     else:
+        report.print()
         print("Kullanıcı oturumu açmadı. Uygulama kapatılıyor.")
 
 if __name__ == "__main__":
@@ -0,0 +1,152 @@
+import datetime
+import os
+import random
+import time
+from streaks import to_date, to_day
+
+# Eski tamamlamalar alışkanlık-yıl başına tek satırda tutulur (completion_archive):
+# bits'in i. biti (küçük bit önce) yılın i. günü (1 Ocak = 0), count ayarlı bit sayısı.
+# Okumalar Database üzerinden canlı satırlarla birleştirilir; arşiv ve canlı tablo aynı günü tutmaz.
+YEAR_BYTES = 46  # 366 bit
+# Geçerli yıl ve önceki KEEP_YEARS yıl canlı kalır
+KEEP_YEARS = 2
+# Raporda ölçülen örnek alışkanlık sayısı
+SAMPLE_HABITS = 50
+
+
+# ---------------------------
+# Bitmaps
+# ---------------------------
+def year_start(year):
+    return to_day(datetime.date(year, 1, 1))
+
+
+def encode(offsets):
+    # Yıl içi gün sıraları -> bitmap
+    n = 0
+    for i in offsets:
+        n |= 1 << i
+    return n.to_bytes(YEAR_BYTES, "little")
+
+
+def offsets(bits):
+    n = int.from_bytes(bits, "little")
+    result = []
+    while n:
+        low = n & -n
+        result.append(low.bit_length() - 1)
+        n ^= low
+    return result
+
+
+def decode(year, bits):
+    # Bitmap -> sıralı gün numaraları
+    start = year_start(year)
+    return [start + i for i in offsets(bits)]
+
+
+def count(bits):
+    return int.from_bytes(bits, "little").bit_count()
+
+
+def test(bits, i):
+    return bool(bits[i >> 3] >> (i & 7) & 1)
+
+
+def merge(bits, other):
+    return (int.from_bytes(bits, "little") | int.from_bytes(other, "little")).to_bytes(YEAR_BYTES, "little")
+
+
+def clear(bits, i):
+    return (int.from_bytes(bits, "little") & ~(1 << i)).to_bytes(YEAR_BYTES, "little")
+
+
+def last(bits):
+    n = int.from_bytes(bits, "little")
+    return n.bit_length() - 1 if n else None
+
+
+def register_bitmap_functions(conn):
+    # Tetikleyiciler (dönem puanları), dışa aktarma ve son tamamlama sorguları kullanır
+    conn.create_function("year_start", 1, year_start, deterministic=True)
+    conn.create_function("bitmap_test", 2, lambda bits, i: test(bits, i), deterministic=True)
+    conn.create_function("bitmap_last", 1, last, deterministic=True)
+
+
+def horizon(keep_years=KEEP_YEARS, today=None):
+    # Bu günden önceki tamamlamalar arşive alınır; yıl başına hizalı, arşiv yılları tam kalır
+    today = to_date(today) or datetime.date.today()
+    return year_start(today.year - keep_years)
+
+
+# ---------------------------
+# Archive run
+# ---------------------------
+def file_size(db):
+    return sum(os.path.getsize(path) for path in (db.db_file, db.db_file + "-wal") if os.path.exists(path))
+
+
+def measure(db, habit_ids, user_ids, repeat=3):
+    # Örnek alışkanlık/kullanıcılar için sıcak okumaların ortalama süresi (ms)
+    today = datetime.date.today()
+    year_ago = today - datetime.timedelta(days=365)
+    queries = {
+        "completions_for_habit": lambda: [db.completions_for_habit(h) for h in habit_ids],
+        "completions_between": lambda: [db.completions_between(h, year_ago, today) for h in habit_ids],
+        "completion_count_for_habit": lambda: [db.completion_count_for_habit(h) for h in habit_ids],
+        "completion_counts_between": lambda: [db.completion_counts_between(u, year_ago, today) for u in user_ids],
+        "completion_columns": lambda: [db.completion_columns(u) for u in user_ids],
+        "schedule_rows": lambda: [db.schedule_rows(u, today) for u in user_ids],
+    }
+    result = {}
+    for name, run in queries.items():
+        run()
+        started = time.perf_counter()
+        for _ in range(repeat):
+            run()
+        calls = len(habit_ids) if "habit" in name else len(user_ids)
+        result[name] = round((time.perf_counter() - started) * 1000.0 / repeat / max(calls, 1), 3)
+    return result
+
+
+def compact(db):
+    # İlk çalıştırmada auto_vacuum = INCREMENTAL'a geçilir (tam VACUUM gerekir),
+    # sonrakilerde boş sayfalar incremental_vacuum ile dosyadan atılır
+    with db.connections.write_lock() as conn:
+        db.flush()
+        mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        if mode == 2 or db.connections.in_memory:
+            db.connections.retry(conn.execute, "PRAGMA incremental_vacuum")
+            method = "incremental_vacuum"
+        else:
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            db.connections.retry(conn.execute, "VACUUM")
+            method = "vacuum"
+        if not db.connections.in_memory:
+            db.connections.retry(conn.execute, "PRAGMA wal_checkpoint(TRUNCATE)")
+    return method
+
+
+def run(db, keep_years=KEEP_YEARS, vacuum=True, today=None, sample=SAMPLE_HABITS, seed=1):
+    # Tamamlamaları arşive katlar; öncesi/sonrası dosya boyutu ve örnek sorgu süreleriyle rapor döner
+    started = time.perf_counter()
+    before_day = horizon(keep_years, today)
+    habit_ids, user_ids = db.archive_sample(sample, random.Random(seed))
+    report = {"before": to_date(before_day).isoformat(),
+              "bytes_before": file_size(db), "queries_before": measure(db, habit_ids, user_ids)}
+    report.update(db.archive_completions(before_day))
+    report["compaction"] = compact(db) if vacuum else None
+    report["bytes_after"] = file_size(db)
+    report["queries_after"] = measure(db, habit_ids, user_ids)
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    return report
+
+
+def format_report(report):
+    lines = [f"{report['before']} öncesi: {report['archived']} tamamlama {report['years']} alışkanlık-yılına "
+             f"katlandı ({report['seconds']} sn)",
+             f"Dosya: {report['bytes_before']} -> {report['bytes_after']} bayt"
+             + (f" ({report['compaction']})" if report["compaction"] else " (sıkıştırma yapılmadı)")]
+    for name, before in report["queries_before"].items():
+        lines.append(f"  {name}: {before} ms -> {report['queries_after'][name]} ms")
+    return "\n".join(lines)
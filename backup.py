@@ -0,0 +1,170 @@
+import contextlib
+import datetime
+import json
+import os
+import pathlib
+import sqlite3
+import time
+from migrations import migrate
+from search import register_functions
+
+# Çalışan uygulamayı durdurmadan yedek: sqlite3 backup API'si küçük adımlarla ilerler. Kaynak, Database'in
+# yazıcı bağlantısıdır; aynı bağlantıdan yapılan yazmalar yedeğe de işlenir, yedek baştan başlamaz.
+# Her adım yazma kilidi altında ve bekleyen (write-behind) yazmalar commit edildikten sonra çalışır;
+# yazıcılar en fazla bir adım bekler, adımlar arasında kilit bırakılır.
+BACKUP_DIR = "backups"
+PREFIX = "habit_tracker-"
+SUFFIX = ".db"
+LOG_FILE = "backup_log.jsonl"
+# Saklanan en fazla yedek
+KEEP = 7
+# Adım başına sayfa (4 KB sayfayla ~1 MB) ve adımlar arası bekleme (saniye)
+PAGES_PER_STEP = 256
+STEP_PAUSE = 0.01
+
+
+class BackupCancelled(Exception):
+    pass
+
+
+def backup_dir(db_file):
+    return os.path.join(os.path.dirname(os.path.abspath(db_file)), BACKUP_DIR)
+
+
+def list_backups(directory):
+    # En yeni önce
+    if not os.path.isdir(directory):
+        return []
+    names = [n for n in os.listdir(directory) if n.startswith(PREFIX) and n.endswith(SUFFIX)]
+    return [os.path.join(directory, n) for n in sorted(names, reverse=True)]
+
+
+def verify(path):
+    # PRAGMA integrity_check sonucu; sağlam dosyada ["ok"]
+    conn = sqlite3.connect(_read_only_uri(path), uri=True)
+    # İfade indeksi (idx_habits_name_key) denetlenirken tr_fold gerekir
+    register_functions(conn)
+    try:
+        return [row[0] for row in conn.execute("PRAGMA integrity_check")]
+    finally:
+        conn.close()
+
+
+def _read_only_uri(path):
+    return pathlib.Path(path).resolve().as_uri() + "?mode=ro"
+
+
+def rotate(directory, keep=KEEP):
+    removed = []
+    for path in list_backups(directory)[keep:]:
+        os.remove(path)
+        removed.append(os.path.basename(path))
+    return removed
+
+
+def read_log(directory, limit=None):
+    path = os.path.join(directory, LOG_FILE)
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+    return entries[-limit:] if limit else entries
+
+
+def _append_log(directory, entry):
+    with open(os.path.join(directory, LOG_FILE), "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+# ---------------------------
+# Backup / restore
+# ---------------------------
+def create_backup(db, directory=None, keep=KEEP, pages=PAGES_PER_STEP, pause=STEP_PAUSE,
+                  progress=None, cancel=None):
+    # db: Database. progress(kopyalanan, toplam sayfa); cancel: threading.Event, yarım yedek silinir.
+    # Her çalıştırma süre ve boyutuyla günlüğe yazılır; bütünlük denetiminden geçmeyen yedek saklanmaz.
+    if db.connections.in_memory:
+        raise ValueError("bellek içi veritabanı yedeklenemez")
+    directory = directory or backup_dir(db.db_file)
+    os.makedirs(directory, exist_ok=True)
+    started = datetime.datetime.now()
+    path = os.path.join(directory, f"{PREFIX}{started:%Y%m%d-%H%M%S-%f}{SUFFIX}")
+    partial = path + ".partial"
+    stats = {"steps": 0, "locked": 0, "pages": 0}
+    held = contextlib.ExitStack()
+
+    def lock_step():
+        held.enter_context(db.connections.write_lock())
+        # Yazıcı bağlantıda açık transaction varken adım SQLITE_LOCKED döner
+        db.flush()
+
+    def on_step(status, remaining, total):
+        held.close()
+        stats["steps"] += 1
+        stats["pages"] = total
+        if status != sqlite3.SQLITE_OK and status != sqlite3.SQLITE_DONE:
+            stats["locked"] += 1
+        if progress is not None:
+            progress(total - remaining, total)
+        if cancel is not None and cancel.is_set():
+            raise BackupCancelled()
+        if remaining:
+            # Adımlar arasında yazıcıya ve okuyuculara zaman tanınır
+            time.sleep(pause)
+            lock_step()
+
+    clock = time.perf_counter()
+    target = sqlite3.connect(partial)
+    try:
+        with held:
+            lock_step()
+            db.connections.writer.backup(target, pages=pages, progress=on_step, sleep=pause)
+        copy_s = time.perf_counter() - clock
+        # Kopya kaynağın WAL başlığını taşır; tek dosya olarak açılabilmesi için rollback günlüğüne alınır
+        target.execute("PRAGMA journal_mode = DELETE")
+    except BaseException:
+        target.close()
+        os.remove(partial)
+        raise
+    target.close()
+    integrity = verify(partial)
+    entry = {
+        "file": os.path.basename(path),
+        "started": started.isoformat(timespec="seconds"),
+        "copy_s": round(copy_s, 3),
+        "total_s": round(time.perf_counter() - clock, 3),
+        "bytes": os.path.getsize(partial),
+        "pages": stats["pages"],
+        "steps": stats["steps"],
+        "locked_steps": stats["locked"],
+        "integrity": "ok" if integrity == ["ok"] else integrity[:10],
+    }
+    if integrity == ["ok"]:
+        os.replace(partial, path)
+        entry["removed"] = rotate(directory, keep) if keep is not None else []
+    else:
+        os.remove(partial)
+        entry["file"] = None
+    _append_log(directory, entry)
+    return entry
+
+
+def restore(db, path, safety_backup=True):
+    # Yedeği canlı veritabanının üzerine yazar (yazıcı bağlantı hedef olarak, WAL ile uyumlu).
+    # Önce yedek doğrulanır; safety_backup ile mevcut durum da yedeklenir.
+    integrity = verify(path)
+    if integrity != ["ok"]:
+        raise ValueError(f"yedek bozuk: {'; '.join(integrity[:3])}")
+    # Döndürme yapılmaz: geri yüklenen eski yedek silinmemeli
+    safety = create_backup(db, keep=None) if safety_backup else None
+    source = sqlite3.connect(_read_only_uri(path), uri=True)
+    try:
+        with db.connections.write_lock() as conn:
+            db.flush()
+            source.backup(conn)
+    finally:
+        source.close()
+    # Yedek daha eski bir şema sürümünde olabilir
+    migrate(db.conn)
+    db.top_points.invalidate()
+    return safety
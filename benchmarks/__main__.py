@@ -0,0 +1,83 @@
+import argparse
+import datetime
+import json
+import os
+import pathlib
+import platform
+import sqlite3
+import sys
+import tempfile
+import time
+
+from benchmarks import bench_db, bench_passwords, bench_records
+from benchmarks.datagen import generate
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description="Database ve MainWindow sıcak yolları için kıyaslama.")
+    parser.add_argument("--db", help="Var olan veritabanı; kıyaslama geçici bir kopyası üzerinde yapılır "
+                                     "(verilmezse sentetik veri üretilir)")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--habits", type=int, default=20)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--density", type=float, default=0.6)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--skip-ui", action="store_true")
+    parser.add_argument("--password-users", type=int, default=32,
+                        help="parola doğrulama kıyaslamasındaki kullanıcı sayısı (0: atla)")
+    parser.add_argument("--output", help="JSON çıktı dosyası (varsayılan: stdout)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, "bench.db")
+        params = {"repeat": args.repeat}
+        if args.db is not None:
+            # Kıyaslama kullanıcı, alışkanlık ve tamamlama yazar; asıl dosyaya dokunulmaz.
+            # backup API'si WAL'daki commit edilmiş sayfaları da kopyalar.
+            source = sqlite3.connect(pathlib.Path(args.db).resolve().as_uri() + "?mode=ro", uri=True)
+            target = sqlite3.connect(db_file)
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+                source.close()
+            params["source_db"] = args.db
+        else:
+            started = time.perf_counter()
+            generate(db_file, args.users, args.habits, args.years, args.density).close()
+            params.update(users=args.users, habits_per_user=args.habits, years=args.years,
+                          density=args.density, generate_s=time.perf_counter() - started)
+
+        report = {
+            "meta": {
+                "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "sqlite": sqlite3.sqlite_version,
+                "platform": platform.platform(),
+                "db_bytes": os.path.getsize(db_file),
+                **params,
+            },
+            "database": bench_db.run(db_file, args.repeat),
+            "records": bench_records.run(db_file, args.repeat),
+        }
+        if args.password_users:
+            report["passwords"] = bench_passwords.run(args.password_users)
+        if not args.skip_ui:
+            try:
+                from benchmarks import bench_ui
+            except ImportError as e:
+                report["ui"] = {"skipped": str(e)}
+            else:
+                report["ui"] = bench_ui.run(db_file, max(1, args.repeat // 2))
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
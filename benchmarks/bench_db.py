@@ -0,0 +1,91 @@
+import datetime
+import itertools
+import transfer
+from archive import horizon
+from database import Database
+from leaderboard import period_key, WEEK
+from benchmarks.common import run_case
+
+
+def database_cases(db):
+    user = db.get_user_by_id(1)
+    user_id = user["id"]
+    habit_id = db.list_habits(user_id)[0]["id"]
+    today = datetime.date.today()
+    month_start = today.replace(day=1)
+    week = period_key(WEEK, today)
+    # Geçmişe dokunmayan (O(1) seri güncellemesi) bir tarih
+    future = today + datetime.timedelta(days=3650)
+    bulk = [(habit_id, future + datetime.timedelta(days=i)) for i in range(1, 31)]
+    names = itertools.count()
+    scratch = []
+
+    def add_scratch():
+        scratch.append(db.add_habit(user_id, f"Geçici {next(names)}", "Hobi", "Günlük"))
+
+    # Kullanıcının kendi dışa aktarımı; birleştirmeyle yeniden içe aktarma yeni satır eklemez
+    records = [transfer.validate(r) for r in transfer.export_records(db, user_id)]
+    high_water = max(db.max_completion_id() - 100, 0)
+
+    return {
+        "create_user": (lambda: db.create_user(f"bench{next(names)}", f"bench{next(names)}@example.com", "x"), None),
+        "get_user_by_email": (lambda: db.get_user_by_email(user["email"]), None),
+        "get_user_by_id": (lambda: db.get_user_by_id(user_id), None),
+        "set_password_hash": (lambda: db.set_password_hash(user_id, user["password_hash"]), None),
+        "add_points": (lambda: db.add_points(user_id, 0), None),
+        "total_points": (lambda: db.total_points(user_id), None),
+        "add_habit": (add_scratch, None),
+        "update_habit": (lambda: db.update_habit(habit_id, "Alışkanlık 0", "Spor", "Günlük"), None),
+        "delete_habit": (lambda: db.delete_habit(scratch.pop()), add_scratch),
+        "remove_habit": (lambda: db.remove_habit(scratch.pop()), add_scratch),
+        "list_habits": (lambda: db.list_habits(user_id), None),
+        "list_habits_page": (lambda: db.list_habits_page(user_id, 0, 256), None),
+        "habit_name_exists": (lambda: db.habit_name_exists(user_id, "ALIŞKANLIK 0"), None),
+        "search_habits": (lambda: db.search_habits(user_id, "alış"), None),
+        "get_habit": (lambda: db.get_habit(habit_id), None),
+        "completion_count_for_habit": (lambda: db.completion_count_for_habit(habit_id), None),
+        "mark_completed": (lambda: db.mark_completed(habit_id, future),
+                           lambda: db.unmark_completed(habit_id, future)),
+        "unmark_completed": (lambda: db.unmark_completed(habit_id, future),
+                             lambda: db.mark_completed(habit_id, future)),
+        "toggle_completion": (lambda: db.toggle_completion(habit_id, future), None),
+        "mark_completed_many": (lambda: db.mark_completed_many(bulk),
+                                lambda: db.unmark_completed_many(bulk)),
+        "unmark_completed_many": (lambda: db.unmark_completed_many(bulk),
+                                  lambda: db.mark_completed_many(bulk)),
+        "is_completed": (lambda: db.is_completed(habit_id, today), None),
+        "completions_for_habit": (lambda: db.completions_for_habit(habit_id), None),
+        "completions_between": (lambda: db.completions_between(habit_id, month_start, today), None),
+        "completion_counts_between": (lambda: db.completion_counts_between(user_id, month_start, today), None),
+        "completion_columns": (lambda: db.completion_columns(user_id), None),
+        "streak_for_habit": (lambda: db.streak_for_habit(habit_id), None),
+        "recompute_streak": (lambda: db.recompute_streak(habit_id), None),
+        "schedule_rows": (lambda: db.schedule_rows(user_id, today), None),
+        "leaderboard": (lambda: db.leaderboard(limit=10), None),
+        "leaderboard_week": (lambda: db.leaderboard(week, limit=10), None),
+        "user_rank": (lambda: db.user_rank(user_id), None),
+        "user_rank_week": (lambda: db.user_rank(user_id, week), None),
+        "leaderboard_around": (lambda: db.leaderboard_around(user_id), None),
+        "points_drift": (lambda: db.points_drift([user_id]), None),
+        "points_drift_all": (lambda: db.points_drift(), None),
+        "fix_points": (lambda: db.fix_points([user_id]), None),
+        "max_completion_id": (db.max_completion_id, None),
+        "users_with_completions_after": (lambda: db.users_with_completions_after(high_water), None),
+        "get_meta": (lambda: db.get_meta("bench"), None),
+        "set_meta": (lambda: db.set_meta("bench", 1), None),
+        "flush": (db.flush, None),
+        "export_counts": (lambda: db.export_counts(user_id), None),
+        "export_rows": (lambda: list(db.export_rows(user_id)), None),
+        "import_records": (lambda: db.import_records(records, {}, on_conflict="merge"), None),
+        # Son sırada: ilk çalıştırma eski tamamlamaları katlar, sonrakiler yalnızca taramadır
+        "archive_completions": (lambda: db.archive_completions(horizon()), None),
+    }
+
+
+def run(db_file, repeat=50, db_factory=Database):
+    db = db_factory(db_file)
+    try:
+        return {name: run_case(func, repeat, setup)
+                for name, (func, setup) in database_cases(db).items()}
+    finally:
+        db.close()
@@ -0,0 +1,38 @@
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+import passwords
+
+# Toplu içe aktarmada kullanıcı başına bir doğrulama; farklı havuz boyutlarında saniyedeki doğrulama
+WORKERS = (1, 2, 4)
+
+
+def make_pairs(count, params):
+    # Her kullanıcı için ayrı tuz; aynı özet tekrar etmez, önbellek devre dışı ölçülür
+    return [(f"parola{i}", passwords.hash_password(f"parola{i}", params)) for i in range(count)]
+
+
+def throughput(pairs, workers):
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        started = time.perf_counter()
+        results = passwords.verify_many(pairs, pool)
+        elapsed = time.perf_counter() - started
+    assert all(results)
+    return {"seconds": elapsed, "per_second": len(pairs) / elapsed}
+
+
+def run(count=32, target_ms=passwords.TARGET_MS):
+    started = time.perf_counter()
+    params = passwords.calibrate(target_ms)
+    result = {"params": params, "calibrate_ms": (time.perf_counter() - started) * 1000.0, "users": count}
+    pairs = make_pairs(count, params)
+    for workers in WORKERS:
+        result[f"threads_{workers}"] = throughput(pairs, workers)
+    legacy = [(p, hashlib.sha256(p.encode("utf-8")).hexdigest()) for p, _ in pairs]
+    result["legacy_sha256"] = throughput(legacy, 1)
+    # Aynı oturumda tekrar giriş: HMAC önbelleği
+    passwords.verify_password(*pairs[0])
+    started = time.perf_counter()
+    passwords.verify_password(*pairs[0])
+    result["cached_verify_ms"] = (time.perf_counter() - started) * 1000.0
+    return result
@@ -0,0 +1,58 @@
+import gc
+import sqlite3
+import time
+import tracemalloc
+from records import Habit, row_factory
+from benchmarks.common import measure, summarize
+
+# Aynı sorgu üç satır türüyle: sqlite3.Row, genel Row ve tipli Habit
+FACTORIES = {
+    "sqlite3.Row": sqlite3.Row,
+    "records.Row": row_factory,
+    "records.Habit": Habit.from_row,
+}
+
+
+def fetch(conn, factory):
+    cur = conn.cursor()
+    cur.row_factory = factory
+    cur.execute(f"SELECT {Habit.COLUMNS} FROM habits")
+    return cur.fetchall()
+
+
+def per_row_bytes(conn, factory):
+    # fetchall sonucunun satır başına kalıcı bellek kullanımı
+    gc.collect()
+    tracemalloc.start()
+    try:
+        rows = fetch(conn, factory)
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return size / len(rows) if rows else 0.0
+
+
+def access_ns(rows, read):
+    # Satır başına tek alan okuma süresi (ns)
+    started = time.perf_counter()
+    for row in rows:
+        read(row)
+    return (time.perf_counter() - started) * 1e9 / len(rows) if rows else 0.0
+
+
+def run(db_file, repeat=50):
+    conn = sqlite3.connect(db_file, detect_types=sqlite3.PARSE_DECLTYPES)
+    try:
+        result = {}
+        for name, factory in FACTORIES.items():
+            rows = fetch(conn, factory)
+            case = summarize(measure(lambda: fetch(conn, factory), repeat))
+            case["rows"] = len(rows)
+            case["bytes_per_row"] = per_row_bytes(conn, factory)
+            case["key_access_ns"] = access_ns(rows, lambda r: r["name"])
+            if name == "records.Habit":
+                case["attribute_access_ns"] = access_ns(rows, lambda r: r.name)
+            result[name] = case
+        return result
+    finally:
+        conn.close()
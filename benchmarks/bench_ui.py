@@ -0,0 +1,82 @@
+import os
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5 import QtWidgets, QtCore
+from benchmarks.common import run_case
+from database import Database
+
+
+def wait_idle(win, timeout=30.0):
+    # Worker kuyruğu boşalana ve sonuç callback'leri işlenene kadar olay döngüsünü çalıştır
+    app = QtWidgets.QApplication.instance()
+    deadline = time.monotonic() + timeout
+    idle_rounds = 0
+    # Callback'ler yeni istekler (ör. fetchMore) başlatabilir; birkaç tur boş kalmasını bekle
+    while idle_rounds < 3 and time.monotonic() < deadline:
+        app.processEvents(QtCore.QEventLoop.AllEvents, 5)
+        idle_rounds = 0 if win.adb.busy else idle_rounds + 1
+
+
+def select_row(win, row):
+    index = win.habit_proxy.index(row, 1)
+    win.habits_table.selectionModel().select(
+        index, QtCore.QItemSelectionModel.ClearAndSelect | QtCore.QItemSelectionModel.Rows)
+
+
+def run(db_file, repeat=20):
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    # Kıyaslama sırasında modal bilgi kutuları açılmasın
+    QtWidgets.QMessageBox.information = staticmethod(lambda *a, **k: QtWidgets.QMessageBox.Ok)
+    from main_window import MainWindow
+
+    db = Database(db_file)
+    user = db.get_user_by_id(1)
+    win = MainWindow(db, user)
+    win.show()
+    wait_idle(win)
+    select_row(win, 0)
+    wait_idle(win)
+    habit_id = win.selected_habit_id
+    rows = max(1, win.habit_proxy.rowCount())
+    counter = {"row": 0}
+
+    def refresh_habits():
+        win.refresh_habits()
+        wait_idle(win)
+
+    def on_habit_selected():
+        counter["row"] = (counter["row"] + 1) % rows
+        select_row(win, counter["row"])
+        wait_idle(win)
+
+    def refresh_calendar():
+        win.calendar.invalidate(win.selected_habit_id)
+        win.refresh_calendar_for_habit(win.selected_habit_id)
+        wait_idle(win)
+
+    def toggle():
+        win.toggle_completion_today()
+        wait_idle(win)
+
+    def badges():
+        win.update_badges_for_habit(win.selected_habit_id)
+        wait_idle(win)
+
+    def reselect():
+        select_row(win, 0)
+        wait_idle(win)
+
+    try:
+        return {
+            "refresh_habits": run_case(refresh_habits, repeat, reselect),
+            "on_habit_selected": run_case(on_habit_selected, repeat),
+            "refresh_calendar_for_habit": run_case(refresh_calendar, repeat, reselect),
+            "toggle_completion_today": run_case(toggle, repeat, reselect),
+            "update_badges_for_habit": run_case(badges, repeat, reselect),
+            "selected_habit": habit_id,
+        }
+    finally:
+        win.close()
+        db.close()
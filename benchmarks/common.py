@@ -0,0 +1,57 @@
+import gc
+import statistics
+import time
+import tracemalloc
+
+
+def measure(func, repeat=50, setup=None):
+    # Her çalıştırmanın süresi (ms); setup süreye dahil edilmez
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000.0)
+    return samples
+
+
+def memory_peak(func, setup=None):
+    if setup is not None:
+        setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def percentile(sorted_samples, pct):
+    if not sorted_samples:
+        return 0.0
+    k = (len(sorted_samples) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_samples) - 1)
+    return sorted_samples[lo] + (sorted_samples[hi] - sorted_samples[lo]) * (k - lo)
+
+
+def summarize(samples, peak_bytes=None):
+    ordered = sorted(samples)
+    result = {
+        "count": len(ordered),
+        "mean_ms": statistics.fmean(ordered) if ordered else 0.0,
+        "p50_ms": percentile(ordered, 50),
+        "p90_ms": percentile(ordered, 90),
+        "p99_ms": percentile(ordered, 99),
+        "max_ms": ordered[-1] if ordered else 0.0,
+    }
+    if peak_bytes is not None:
+        result["peak_bytes"] = peak_bytes
+    return result
+
+
+def run_case(func, repeat=50, setup=None):
+    samples = measure(func, repeat, setup)
+    return summarize(samples, memory_peak(func, setup))
@@ -0,0 +1,55 @@
+import datetime
+import random
+from database import Database
+from streaks import DAILY, WEEKLY, MONTHLY, compute_streaks, to_day
+from passwords import hash_password
+
+# HabitEditDialog ile aynı değerler; Qt yüklemeden veri üretebilmek için burada
+CATEGORIES = ["Spor", "Sanat", "Müzik", "Hobi", "Sağlık", "İş"]
+FREQUENCIES = [DAILY, WEEKLY, MONTHLY]
+PASSWORD = "parola123"
+
+
+def generate(db_file, users=10, habits_per_user=20, years=3, density=0.6, seed=42, today=None):
+    # users x habits_per_user alışkanlık, her biri için `years` yıllık rastgele tamamlama
+    rng = random.Random(seed)
+    today = today or datetime.date.today()
+    start = today - datetime.timedelta(days=365 * years)
+    days = list(range(to_day(start), to_day(today) + 1))
+    phash = hash_password(PASSWORD)
+
+    db = Database(db_file)
+    with db._atomic("datagen") as cur:
+        for u in range(users):
+            cur.execute("INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)",
+                        (f"user{u}", f"user{u}@example.com", phash))
+            user_id = cur.lastrowid
+            points = 0
+            for h in range(habits_per_user):
+                frequency = FREQUENCIES[h % len(FREQUENCIES)]
+                cur.execute("""INSERT INTO habits (user_id, name, category, frequency, created_at)
+                               VALUES (?, ?, ?, ?, ?)""",
+                            (user_id, f"Alışkanlık {h}", CATEGORIES[h % len(CATEGORIES)], frequency, start))
+                habit_id = cur.lastrowid
+                dates = [d for d in days if rng.random() < density]
+                cur.executemany("INSERT INTO completions (habit_id, date) VALUES (?, ?)",
+                                ((habit_id, d) for d in dates))
+                current, longest, last_date = compute_streaks(dates, frequency)
+                cur.execute("""INSERT INTO habit_streaks (habit_id, current_streak, longest_streak, last_date)
+                               VALUES (?, ?, ?, ?)""", (habit_id, current, longest, last_date))
+                points += len(dates)
+            cur.execute("UPDATE users SET total_points = ? WHERE id = ?", (points, user_id))
+    return db
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Sentetik alışkanlık veritabanı üretir.")
+    parser.add_argument("db_file")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--habits", type=int, default=20)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--density", type=float, default=0.6)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    generate(args.db_file, args.users, args.habits, args.years, args.density, args.seed).close()
@@ -0,0 +1,207 @@
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+import api_server
+from benchmarks.common import summarize
+from benchmarks.datagen import generate
+from database import Database
+
+
+# ---------------------------
+# Client
+# ---------------------------
+class Client:
+    # Tek keep-alive bağlantı; istekler `pipeline` adetlik gruplar halinde yanıt beklenmeden gönderilir
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+    def send(self, method, path, body=None):
+        data = b"" if body is None else json.dumps(body).encode("utf-8")
+        head = (f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n")
+        self.writer.write(head.encode("latin-1") + data)
+
+    async def receive(self):
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        status = int(lines[0].split(" ")[1])
+        length = 0
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        body = await self.reader.readexactly(length) if length else b""
+        return status, json.loads(body) if body else None
+
+    async def request(self, method, path, body=None):
+        self.send(method, path, body)
+        await self.writer.drain()
+        return await self.receive()
+
+
+async def discover(host, port, users):
+    # Sunucudaki kullanıcı -> alışkanlık id'leri (1..users)
+    client = Client(host, port)
+    await client.connect()
+    try:
+        targets = {}
+        for user_id in range(1, users + 1):
+            status, habits = await client.request("GET", f"/users/{user_id}/habits?limit=50")
+            if status == 200 and habits:
+                targets[user_id] = [h["id"] for h in habits]
+        return targets
+    finally:
+        await client.close()
+
+
+def make_request(rng, targets, today):
+    # Arayüz kullanımına benzer karışım: okumalar ağırlıklı, bir kısmı tamamlama yazması
+    user_id = rng.choice(list(targets))
+    habit_id = rng.choice(targets[user_id])
+    day = (today - datetime.timedelta(days=rng.randrange(30))).isoformat()
+    kind = rng.random()
+    if kind < 0.30:
+        return "GET", f"/users/{user_id}/points", None
+    if kind < 0.50:
+        return "GET", f"/users/{user_id}/habits?limit=20", None
+    if kind < 0.70:
+        return "GET", f"/habits/{habit_id}/completions?start={day}", None
+    if kind < 0.85:
+        return "POST", f"/habits/{habit_id}/completions", {"date": day}
+    return "DELETE", f"/habits/{habit_id}/completions/{day}", None
+
+
+async def run_client(host, port, targets, requests, pipeline, seed, latencies, statuses):
+    rng = random.Random(seed)
+    today = datetime.date.today()
+    client = Client(host, port)
+    await client.connect()
+    try:
+        done = 0
+        while done < requests:
+            group = min(pipeline, requests - done)
+            sent = []
+            for _ in range(group):
+                client.send(*make_request(rng, targets, today))
+                sent.append(time.perf_counter())
+            await client.writer.drain()
+            for started in sent:
+                status, _ = await client.receive()
+                latencies.append((time.perf_counter() - started) * 1000.0)
+                statuses[status] += 1
+            done += group
+    finally:
+        await client.close()
+
+
+async def load(host, port, clients, requests, pipeline, users, seed=1):
+    targets = await discover(host, port, users)
+    if not targets:
+        raise SystemExit("Sunucuda alışkanlığı olan kullanıcı bulunamadı")
+    latencies = []
+    statuses = Counter()
+    started = time.perf_counter()
+    await asyncio.gather(*(run_client(host, port, targets, requests, pipeline, seed + i, latencies, statuses)
+                           for i in range(clients)))
+    elapsed = time.perf_counter() - started
+    result = summarize(latencies)
+    result.update(clients=clients, pipeline=pipeline, seconds=elapsed,
+                  requests_per_s=len(latencies) / elapsed if elapsed else 0.0,
+                  statuses={str(k): v for k, v in sorted(statuses.items())})
+    return result
+
+
+# ---------------------------
+# In-process server
+# ---------------------------
+class ServerThread:
+    # --url verilmezse sunucu aynı süreçte ayrı bir event loop'ta çalışır (istemcilerle GIL paylaşılır)
+
+    def __init__(self, db, workers):
+        self.server = api_server.ApiServer(db, workers)
+        self.loop = asyncio.new_event_loop()
+        self.address = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.address = self.loop.run_until_complete(self.server.start("127.0.0.1", 0))
+        self._ready.set()
+        self.loop.run_forever()
+
+    def start(self):
+        self._thread.start()
+        self._ready.wait()
+        return self.address
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.load_api",
+                                     description="JSON API için eşzamanlı istemci yük testi.")
+    parser.add_argument("--url", help="çalışan sunucu, HOST:PORT (verilmezse sentetik veriyle süreç içinde başlatılır)")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--habits", type=int, default=20)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32], help="eşzamanlı bağlantı sayıları")
+    parser.add_argument("--pipeline", type=int, nargs="+", default=[1, 8], help="bağlantı başına pipelining derinliği")
+    parser.add_argument("--requests", type=int, default=200, help="bağlantı başına istek")
+    parser.add_argument("--workers", type=int, default=api_server.WORKERS)
+    parser.add_argument("--output", help="JSON çıktı dosyası (varsayılan: stdout)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server = None
+        if args.url:
+            host, _, port = args.url.rpartition(":")
+            port = int(port)
+        else:
+            db_file = os.path.join(tmp, "load.db")
+            generate(db_file, args.users, args.habits, years=1).close()
+            server = ServerThread(Database(db_file, readers=args.workers), args.workers)
+            host, port = server.start()
+        try:
+            report = {"server": args.url or f"süreç içi, {args.workers} thread", "runs": []}
+            for clients in args.clients:
+                for pipeline in args.pipeline:
+                    report["runs"].append(asyncio.run(load(host, port, clients, args.requests, pipeline,
+                                                           args.users)))
+        finally:
+            if server is not None:
+                server.stop()
+                server.server.db.close()
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,231 @@
+from collections import OrderedDict
+import bisect
+import threading
+from streaks import to_day
+
+_MISSING = object()
+
+
+class LRUCache:
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._data),
+                    "hit_rate": self.hits / total if total else 0.0}
+
+
+class CachedDatabase:
+    # Database için okuma önbelleği; yazma metotları yalnızca etkilenen kayıtları siler.
+    # Aynı dosyaya başka bağlantıların (API sunucusu, CLI, ikinci uygulama) yazmaları
+    # okumalardan önce PRAGMA data_version ile fark edilir ve önbellek tümüyle boşaltılır.
+
+    def __init__(self, db, max_entries=1024):
+        self.db = db
+        self.habit_lists = LRUCache(max_entries)
+        self.habits = LRUCache(max_entries)
+        self.points = LRUCache(max_entries)
+        self.completion_sets = LRUCache(max_entries)
+        self._external_writes = db.check_external_writes()
+
+    def __getattr__(self, name):
+        # Önbelleğe alınmayan her şey doğrudan Database'e gider
+        return getattr(self.db, name)
+
+    def cache_stats(self):
+        return {
+            "habit_lists": self.habit_lists.stats(),
+            "habits": self.habits.stats(),
+            "points": self.points.stats(),
+            "completion_sets": self.completion_sets.stats(),
+        }
+
+    def clear_cache(self):
+        for cache in (self.habit_lists, self.habits, self.points, self.completion_sets):
+            cache.clear()
+
+    def _check_external_writes(self):
+        external_writes = self.db.check_external_writes()
+        if external_writes != self._external_writes:
+            self._external_writes = external_writes
+            self.clear_cache()
+
+    # ---------------------------
+    # Cached reads
+    # ---------------------------
+    def list_habits(self, user_id):
+        self._check_external_writes()
+        habits = self.habit_lists.get(user_id)
+        if habits is _MISSING:
+            habits = tuple(self.db.list_habits(user_id))
+            self.habit_lists.put(user_id, habits)
+        return list(habits)
+
+    def get_habit(self, habit_id):
+        self._check_external_writes()
+        habit = self.habits.get(habit_id)
+        if habit is _MISSING:
+            habit = self.db.get_habit(habit_id)
+            self.habits.put(habit_id, habit)
+        return habit
+
+    def total_points(self, user_id):
+        self._check_external_writes()
+        pts = self.points.get(user_id)
+        if pts is _MISSING:
+            pts = self.db.total_points(user_id)
+            self.points.put(user_id, pts)
+        return pts
+
+    def _completions(self, habit_id):
+        # (sıralı gün sayısı tuple'ı, gün kümesi)
+        self._check_external_writes()
+        entry = self.completion_sets.get(habit_id)
+        if entry is _MISSING:
+            dates = tuple(self.db.completions_for_habit(habit_id))
+            entry = (dates, frozenset(dates))
+            self.completion_sets.put(habit_id, entry)
+        return entry
+
+    def completions_for_habit(self, habit_id):
+        return list(self._completions(habit_id)[0])
+
+    def completions_between(self, habit_id, start, end):
+        dates = self._completions(habit_id)[0]
+        start, end = to_day(start), to_day(end)
+        return list(dates[bisect.bisect_left(dates, start):bisect.bisect_right(dates, end)])
+
+    def completion_count_for_habit(self, habit_id):
+        return len(self._completions(habit_id)[0])
+
+    def is_completed(self, habit_id, date_):
+        return to_day(date_) in self._completions(habit_id)[1]
+
+    # ---------------------------
+    # Invalidating writes
+    # ---------------------------
+    def _owner(self, habit_id):
+        habit = self.get_habit(habit_id)
+        return habit["user_id"] if habit else None
+
+    def _forget_completions(self, habit_ids):
+        for habit_id in habit_ids:
+            self.completion_sets.pop(habit_id)
+            self.points.pop(self._owner(habit_id))
+
+    def create_user(self, username, email, password_hash):
+        user_id = self.db.create_user(username, email, password_hash)
+        if user_id is not None:
+            self.points.pop(user_id)
+        return user_id
+
+    def add_points(self, user_id, points):
+        self.db.add_points(user_id, points)
+        self.points.pop(user_id)
+
+    def add_habit(self, user_id, name, category, frequency):
+        habit_id = self.db.add_habit(user_id, name, category, frequency)
+        self.habit_lists.pop(user_id)
+        self.habits.pop(habit_id)
+        return habit_id
+
+    def update_habit(self, habit_id, name, category, frequency):
+        user_id = self._owner(habit_id)
+        updated = self.db.update_habit(habit_id, name, category, frequency)
+        self.habits.pop(habit_id)
+        self.habit_lists.pop(user_id)
+        return updated
+
+    def delete_habit(self, habit_id):
+        user_id = self._owner(habit_id)
+        self.db.delete_habit(habit_id)
+        self.habits.pop(habit_id)
+        self.habit_lists.pop(user_id)
+        self.completion_sets.pop(habit_id)
+
+    def remove_habit(self, habit_id):
+        user_id = self._owner(habit_id)
+        total = self.db.remove_habit(habit_id)
+        self.habits.pop(habit_id)
+        self.habit_lists.pop(user_id)
+        self.completion_sets.pop(habit_id)
+        self.points.pop(user_id)
+        return total
+
+    def mark_completed(self, habit_id, date_):
+        ok = self.db.mark_completed(habit_id, date_)
+        self.completion_sets.pop(habit_id)
+        return ok
+
+    def unmark_completed(self, habit_id, date_):
+        self.db.unmark_completed(habit_id, date_)
+        self.completion_sets.pop(habit_id)
+
+    def toggle_completion(self, habit_id, date_):
+        completed, total = self.db.toggle_completion(habit_id, date_)
+        self.completion_sets.pop(habit_id)
+        # Yeni toplam zaten elde, bir sonraki okuma SQL'e gitmez
+        self.points.put(self._owner(habit_id), total)
+        return completed, total
+
+    def mark_completed_many(self, pairs):
+        pairs = list(pairs)
+        count = self.db.mark_completed_many(pairs)
+        self._forget_completions({habit_id for habit_id, _ in pairs})
+        return count
+
+    def unmark_completed_many(self, pairs):
+        pairs = list(pairs)
+        count = self.db.unmark_completed_many(pairs)
+        self._forget_completions({habit_id for habit_id, _ in pairs})
+        return count
+
+    # Toplu yazmalar çok sayıda kaydı etkiler; önbellek tümüyle boşaltılır
+    def import_records(self, records, state, user_id=None, on_conflict="merge"):
+        try:
+            return self.db.import_records(records, state, user_id=user_id, on_conflict=on_conflict)
+        finally:
+            self.clear_cache()
+
+    def fix_points(self, user_ids):
+        try:
+            return self.db.fix_points(user_ids)
+        finally:
+            self.points.clear()
+
+    def archive_completions(self, before):
+        try:
+            return self.db.archive_completions(before)
+        finally:
+            self.completion_sets.clear()
@@ -0,0 +1,348 @@
+from PyQt5 import QtWidgets, QtCore, QtGui
+from collections import OrderedDict
+import datetime
+from streaks import to_date
+
+# Boş gün + dört yoğunluk seviyesi
+LEVEL_COLORS = ["#ebedf0", "#c6e48b", "#7bc96f", "#239a3b", "#196127"]
+RANGE_COLOR = "#add8e6"
+SELECTED_COLOR = "#1f3a93"
+
+
+def to_qdate(d):
+    return QtCore.QDate(d.year, d.month, d.day)
+
+
+def from_qdate(qdate):
+    return datetime.date(qdate.year(), qdate.month(), qdate.day())
+
+
+class HeatmapGrid(QtWidgets.QWidget):
+    # Bir yılın günleri: sütunlar pazartesi başlayan haftalar, satırlar haftanın günleri.
+    # Hücreler önbellekteki QPixmap'e çizilir; veri ya da seçim değişince yalnızca
+    # etkilenen hücreler pixmap üzerinde yeniden çizilir ve ekrana o bölge gönderilir.
+    LEFT = 36
+    TOP = 16
+    GAP = 2
+    MIN_CELL = 6
+    MAX_CELL = 18
+    WEEKS = 54
+
+    date_clicked = QtCore.pyqtSignal(object, bool)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.year = datetime.date.today().year
+        self.counts = {}
+        self.scale = 1
+        self.selected = datetime.date.today()
+        self.range = set()
+        self.cells_painted = 0
+        self._pixmap = None
+        self._cell = self.MIN_CELL
+        policy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Preferred)
+        policy.setHeightForWidth(True)
+        self.setSizePolicy(policy)
+
+    # ---------------------------
+    # Geometry
+    # ---------------------------
+    def _cell_for_width(self, width):
+        cell = (width - self.LEFT) // self.WEEKS - self.GAP
+        return max(self.MIN_CELL, min(self.MAX_CELL, cell))
+
+    def hasHeightForWidth(self):
+        return True
+
+    def heightForWidth(self, width):
+        return self.TOP + 7 * (self._cell_for_width(width) + self.GAP)
+
+    def sizeHint(self):
+        width = self.LEFT + self.WEEKS * (12 + self.GAP)
+        return QtCore.QSize(width, self.heightForWidth(width))
+
+    def minimumSizeHint(self):
+        width = self.LEFT + self.WEEKS * (self.MIN_CELL + self.GAP)
+        return QtCore.QSize(width, self.heightForWidth(width))
+
+    def _first_monday(self):
+        jan1 = datetime.date(self.year, 1, 1)
+        return jan1 - datetime.timedelta(days=jan1.weekday())
+
+    def _days(self):
+        day = datetime.date(self.year, 1, 1)
+        while day.year == self.year:
+            yield day
+            day += datetime.timedelta(days=1)
+
+    def cell_rect(self, day):
+        offset = (day - self._first_monday()).days
+        step = self._cell + self.GAP
+        return QtCore.QRect(self.LEFT + offset // 7 * step, self.TOP + offset % 7 * step, self._cell, self._cell)
+
+    def date_at(self, pos):
+        step = self._cell + self.GAP
+        x, y = pos.x() - self.LEFT, pos.y() - self.TOP
+        if x < 0 or y < 0 or y >= 7 * step:
+            return None
+        day = self._first_monday() + datetime.timedelta(days=x // step * 7 + y // step)
+        return day if day.year == self.year else None
+
+    # ---------------------------
+    # State
+    # ---------------------------
+    def set_year(self, year):
+        if year != self.year:
+            self.year = year
+            self.counts = {}
+            self._pixmap = None
+            self.update()
+
+    def set_counts(self, counts):
+        scale = max(counts.values(), default=1)
+        old = self.counts
+        self.counts = counts
+        if scale != self.scale:
+            # Seviyeler yeniden ölçeklendi, tüm hücreler değişir
+            self.scale = scale
+            self._pixmap = None
+            self.update()
+            return
+        self.update_cells({d for d in old.keys() | counts.keys() if old.get(d) != counts.get(d)})
+
+    def set_selection(self, selected, range_):
+        changed = {self.selected, selected} | (self.range ^ range_)
+        self.selected = selected
+        self.range = range_
+        self.update_cells(changed)
+
+    def level(self, day):
+        count = self.counts.get(day, 0)
+        if count <= 0:
+            return 0
+        return max(1, -(-4 * count // self.scale))
+
+    # ---------------------------
+    # Painting
+    # ---------------------------
+    def update_cells(self, days):
+        days = [d for d in days if d.year == self.year]
+        if not days or self._pixmap is None:
+            return
+        painter = QtGui.QPainter(self._pixmap)
+        self._paint_cells(painter, days)
+        painter.end()
+        region = QtGui.QRegion()
+        for d in days:
+            region += self.cell_rect(d)
+        self.update(region)
+
+    def _render(self):
+        self._cell = self._cell_for_width(self.width())
+        ratio = self.devicePixelRatioF()
+        pixmap = QtGui.QPixmap(self.size() * ratio)
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(self.palette().color(QtGui.QPalette.Window))
+        painter = QtGui.QPainter(pixmap)
+        font = painter.font()
+        font.setPointSizeF(max(6.0, font.pointSizeF() * 0.8))
+        painter.setFont(font)
+        painter.setPen(self.palette().color(QtGui.QPalette.WindowText))
+        locale = self.locale()
+        for month in range(1, 13):
+            x = self.cell_rect(datetime.date(self.year, month, 1)).x()
+            painter.drawText(x, self.TOP - 4, locale.monthName(month, QtCore.QLocale.ShortFormat))
+        step = self._cell + self.GAP
+        for row in (0, 2, 4):
+            painter.drawText(QtCore.QRect(0, self.TOP + row * step, self.LEFT - 4, self._cell),
+                             QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter,
+                             locale.dayName(row + 1, QtCore.QLocale.ShortFormat))
+        self._pixmap = pixmap
+        self._paint_cells(painter, self._days())
+        painter.end()
+
+    def _paint_cells(self, painter, days):
+        for d in days:
+            rect = self.cell_rect(d)
+            level = self.level(d)
+            color = RANGE_COLOR if d in self.range and level == 0 else LEVEL_COLORS[level]
+            painter.fillRect(rect, QtGui.QColor(color))
+            if d == self.selected or (d in self.range and level > 0):
+                pen = QtGui.QPen(QtGui.QColor(SELECTED_COLOR if d == self.selected else RANGE_COLOR))
+                pen.setWidth(2)
+                painter.setPen(pen)
+                painter.drawRect(rect.adjusted(1, 1, -1, -1))
+            self.cells_painted += 1
+
+    def paintEvent(self, event):
+        if self._pixmap is None or self._pixmap.size() != self.size() * self.devicePixelRatioF():
+            self._render()
+        painter = QtGui.QPainter(self)
+        painter.setClipRegion(event.region())
+        painter.drawPixmap(0, 0, self._pixmap)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._pixmap = None
+
+    def changeEvent(self, event):
+        if event.type() in (QtCore.QEvent.LocaleChange, QtCore.QEvent.PaletteChange, QtCore.QEvent.FontChange):
+            self._pixmap = None
+            self.update()
+        super().changeEvent(event)
+
+    # ---------------------------
+    # Input
+    # ---------------------------
+    def mousePressEvent(self, event):
+        day = self.date_at(event.pos()) if event.button() == QtCore.Qt.LeftButton else None
+        if day is None:
+            super().mousePressEvent(event)
+            return
+        self.date_clicked.emit(day, bool(event.modifiers() & QtCore.Qt.ShiftModifier))
+
+    def event(self, event):
+        if event.type() == QtCore.QEvent.ToolTip:
+            day = self.date_at(event.pos())
+            if day is None:
+                QtWidgets.QToolTip.hideText()
+            else:
+                QtWidgets.QToolTip.showText(event.globalPos(),
+                                            f"{day.strftime('%d.%m.%Y')}: {self.counts.get(day, 0)} tamamlama",
+                                            self, self.cell_rect(day))
+            return True
+        return super().event(event)
+
+
+class CompletionHeatmap(QtWidgets.QWidget):
+    # Seçili alışkanlığın (ya da alışkanlık seçili değilse tüm alışkanlıkların) yıllık tamamlama haritası.
+    # Gösterilen yıl dışındaki tarihler hiç sorgulanmaz.
+    CACHE_YEARS = 8
+
+    clicked = QtCore.pyqtSignal(QtCore.QDate)
+
+    def __init__(self, db, user_id, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.user_id = user_id
+        self.habit_id = None
+        self._year_cache = OrderedDict()
+        self._loading = set()
+        # invalidate() öncesi başlamış sorguların sonuçları önbelleğe alınmaz
+        self._epoch = 0
+        # Shift+tıklama ile seçilen tarih aralığı
+        self._range_anchor = None
+
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        header = QtWidgets.QHBoxLayout()
+        self.title_label = QtWidgets.QLabel()
+        self.prev_btn = QtWidgets.QToolButton()
+        self.prev_btn.setArrowType(QtCore.Qt.LeftArrow)
+        self.year_label = QtWidgets.QLabel()
+        self.next_btn = QtWidgets.QToolButton()
+        self.next_btn.setArrowType(QtCore.Qt.RightArrow)
+        header.addWidget(self.title_label)
+        header.addStretch()
+        header.addWidget(self.prev_btn)
+        header.addWidget(self.year_label)
+        header.addWidget(self.next_btn)
+        layout.addLayout(header)
+        self.grid = HeatmapGrid(self)
+        layout.addWidget(self.grid)
+
+        self.prev_btn.clicked.connect(lambda: self.show_year(self.grid.year - 1))
+        self.next_btn.clicked.connect(lambda: self.show_year(self.grid.year + 1))
+        self.grid.date_clicked.connect(self.on_date_clicked)
+        self._update_labels()
+
+    def _update_labels(self):
+        self.year_label.setText(str(self.grid.year))
+        self.title_label.setText("Tamamlanma Haritası (" +
+                                 ("seçili alışkanlık" if self.habit_id is not None else "tüm alışkanlıklar") + ")")
+
+    # ---------------------------
+    # Selection (QCalendarWidget ile aynı arayüz)
+    # ---------------------------
+    def selectedDate(self):
+        return to_qdate(self.grid.selected)
+
+    def setSelectedDate(self, qdate):
+        day = from_qdate(qdate)
+        if day.year != self.grid.year:
+            self.show_year(day.year)
+        self.grid.set_selection(day, self.grid.range)
+
+    def on_date_clicked(self, day, shift):
+        if shift and self._range_anchor is not None:
+            start, end = sorted((self._range_anchor, day))
+            range_ = {start + datetime.timedelta(days=i) for i in range((end - start).days + 1)}
+        else:
+            self._range_anchor = day
+            range_ = set()
+        self.grid.set_selection(day, range_)
+        self.clicked.emit(to_qdate(day))
+
+    def selected_range(self):
+        # Aralık seçili değilse yalnızca seçili gün döner
+        if self.grid.range:
+            return min(self.grid.range), max(self.grid.range)
+        return self.grid.selected, self.grid.selected
+
+    def clear_range(self):
+        self.grid.set_selection(self.grid.selected, set())
+
+    # ---------------------------
+    # Loading
+    # ---------------------------
+    def set_habit(self, habit_id):
+        self.habit_id = habit_id
+        self._update_labels()
+        self.refresh()
+
+    def show_year(self, year):
+        self.grid.set_year(year)
+        self._update_labels()
+        self.refresh()
+
+    def invalidate(self, habit_id=None, date_=None):
+        # habit_id verilmezse tüm önbellek boşaltılır; tüm alışkanlıkların toplamı her değişiklikte eskir
+        self._epoch += 1
+        self._loading.clear()
+        for key in list(self._year_cache):
+            if habit_id is not None and key[0] not in (habit_id, None):
+                continue
+            if date_ is None or key[1] == date_.year:
+                del self._year_cache[key]
+
+    def refresh(self):
+        counts = self._year_counts(self.habit_id, self.grid.year)
+        if counts is not None:
+            # Eksik yıl gelince refresh() yeniden çağrılır; o zamana kadar eski hücreler ekranda kalır
+            self.grid.set_counts(counts)
+
+    def _year_counts(self, habit_id, year):
+        key = (habit_id, year)
+        if key in self._year_cache:
+            self._year_cache.move_to_end(key)
+            return self._year_cache[key]
+        if key not in self._loading:
+            self._loading.add(key)
+            start, end = datetime.date(year, 1, 1), datetime.date(year, 12, 31)
+            callback = lambda rows, key=key, epoch=self._epoch: self._on_year_loaded(key, epoch, rows)
+            if habit_id is None:
+                self.db.call("completion_counts_between", self.user_id, start, end, callback=callback)
+            else:
+                self.db.call("completions_between", habit_id, start, end,
+                             callback=lambda dates, callback=callback: callback([(d, 1) for d in dates]))
+        return None
+
+    def _on_year_loaded(self, key, epoch, rows):
+        if epoch != self._epoch:
+            return
+        self._loading.discard(key)
+        self._year_cache[key] = {to_date(d): n for d, n in rows}
+        if len(self._year_cache) > self.CACHE_YEARS:
+            self._year_cache.popitem(last=False)
+        if key == (self.habit_id, self.grid.year):
+            self.refresh()
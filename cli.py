@@ -0,0 +1,177 @@
+import argparse
+import sys
+from database import Database, DB_FILENAME
+import transfer
+import reconcile
+import api_server
+import backup
+import archive
+import os
+
+
+def print_progress(done, total):
+    percent = done * 100 // total if total else 100
+    sys.stderr.write(f"\r{done}/{total} ({percent}%)")
+    if done >= total:
+        sys.stderr.write("\n")
+    sys.stderr.flush()
+
+
+def resolve_user(db, email):
+    if email is None:
+        return None
+    user = db.get_user_by_email(email)
+    if user is None:
+        raise SystemExit(f"Kullanıcı bulunamadı: {email}")
+    return user["id"]
+
+
+# ---------------------------
+# Commands
+# ---------------------------
+def cmd_export(db, args):
+    count = transfer.export_file(db, args.path, user_id=resolve_user(db, args.user), fmt=args.format,
+                                 progress=None if args.quiet else print_progress)
+    print(f"{count} kayıt dışa aktarıldı: {args.path}")
+
+
+def cmd_import(db, args):
+    result = transfer.import_file(db, args.path, fmt=args.format, user_id=resolve_user(db, args.user),
+                                  on_conflict=args.on_conflict, chunk_size=args.chunk_size,
+                                  progress=None if args.quiet else print_progress)
+    print(f"{result['records']} kayıt okundu: {result['users']} kullanıcı, {result['habits']} alışkanlık "
+          f"({result['renamed']} yeniden adlandırıldı, {result['skipped']} atlandı), "
+          f"{result['completions']} tamamlama eklendi.")
+    if result["error_count"]:
+        print(f"{result['error_count']} hata:", file=sys.stderr)
+        for message in result["errors"]:
+            print(f"  {message}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_reconcile(db, args):
+    report = reconcile.reconcile(db, incremental=args.incremental, apply=not args.dry_run,
+                                 batch_size=args.batch_size)
+    print(reconcile.format_report(report))
+    return 1 if args.dry_run and report["drift"] else 0
+
+
+def cmd_backup(db, args):
+    entry = backup.create_backup(db, args.dir, keep=args.keep, pages=args.pages,
+                                 progress=None if args.quiet else print_progress)
+    if entry["file"] is None:
+        print(f"Yedek bütünlük denetiminden geçmedi: {entry['integrity']}", file=sys.stderr)
+        return 1
+    print(f"{entry['file']}: {entry['bytes']} bayt, {entry['pages']} sayfa, {entry['steps']} adım, "
+          f"kopyalama {entry['copy_s']} sn, toplam {entry['total_s']} sn")
+    if entry["removed"]:
+        print("Silinen eski yedekler:", ", ".join(entry["removed"]))
+    return 0
+
+
+def cmd_backups(db, args):
+    directory = args.dir or backup.backup_dir(db.db_file)
+    log = {e["file"]: e for e in backup.read_log(directory) if e.get("file")}
+    for path in backup.list_backups(directory):
+        name = os.path.basename(path)
+        e = log.get(name)
+        timing = f"  kopyalama {e['copy_s']} sn, toplam {e['total_s']} sn" if e else ""
+        print(f"{name}  {os.path.getsize(path)} bayt{timing}")
+    return 0
+
+
+def cmd_restore(db, args):
+    if not args.yes:
+        answer = input(f"{db.db_file} '{args.path}' ile değiştirilecek. Devam edilsin mi? [e/H] ")
+        if answer.strip().lower() not in ("e", "evet"):
+            return 1
+    safety = backup.restore(db, args.path, safety_backup=not args.no_safety)
+    if safety is not None:
+        print(f"Önceki durum yedeklendi: {safety['file']}")
+    print(f"Geri yüklendi: {args.path}")
+    return 0
+
+
+def cmd_archive(db, args):
+    report = archive.run(db, keep_years=args.keep_years, vacuum=not args.no_vacuum)
+    print(archive.format_report(report))
+    return 0
+
+
+def cmd_serve(db, args):
+    api_server.serve(db, args.host, args.port, args.workers,
+                     on_ready=lambda address: print(f"API dinleniyor: http://{address[0]}:{address[1]}"))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Habit Tracker komut satırı araçları")
+    parser.add_argument("--db", default=DB_FILENAME, help="veritabanı dosyası")
+    parser.add_argument("-q", "--quiet", action="store_true", help="ilerleme gösterme")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="CSV ya da JSON Lines olarak dışa aktar")
+    export.add_argument("path")
+    export.add_argument("--format", choices=["csv", "jsonl"], help="varsayılan: dosya uzantısından")
+    export.add_argument("--user", metavar="EMAIL", help="yalnızca bu kullanıcının verisi")
+    export.set_defaults(func=cmd_export)
+
+    imp = commands.add_parser("import", help="CSV ya da JSON Lines dosyasından içe aktar")
+    imp.add_argument("path")
+    imp.add_argument("--format", choices=["csv", "jsonl"], help="varsayılan: dosya uzantısından")
+    imp.add_argument("--user", metavar="EMAIL", help="tüm alışkanlıkları bu kullanıcıya aktar")
+    imp.add_argument("--on-conflict", choices=transfer.CONFLICT_POLICIES, default="merge",
+                     help="aynı adlı alışkanlık varsa yapılacak işlem")
+    imp.add_argument("--chunk-size", type=int, default=transfer.CHUNK_SIZE,
+                     help="transaction başına kayıt sayısı")
+    imp.set_defaults(func=cmd_import)
+
+    rec = commands.add_parser("reconcile", help="puanları tamamlamalardan yeniden hesapla")
+    rec.add_argument("--incremental", action="store_true",
+                     help="yalnızca son çalıştırmadan sonra tamamlama eklenen kullanıcılar")
+    rec.add_argument("--dry-run", action="store_true", help="yalnızca raporla, düzeltme")
+    rec.add_argument("--batch-size", type=int, default=reconcile.BATCH_SIZE,
+                     help="transaction başına düzeltilen kullanıcı")
+    rec.set_defaults(func=cmd_reconcile)
+
+    bak = commands.add_parser("backup", help="çalışırken tutarlı yedek al (sqlite backup API)")
+    bak.add_argument("--dir", help="yedek klasörü (varsayılan: veritabanının yanında backups/)")
+    bak.add_argument("--keep", type=int, default=backup.KEEP, help="saklanacak yedek sayısı")
+    bak.add_argument("--pages", type=int, default=backup.PAGES_PER_STEP, help="adım başına sayfa")
+    bak.set_defaults(func=cmd_backup)
+
+    baks = commands.add_parser("backups", help="yedekleri süre ve boyutlarıyla listele")
+    baks.add_argument("--dir", help="yedek klasörü")
+    baks.set_defaults(func=cmd_backups)
+
+    res = commands.add_parser("restore", help="yedeği doğrulayıp veritabanının üzerine yükle")
+    res.add_argument("path")
+    res.add_argument("--yes", action="store_true", help="onay sorma")
+    res.add_argument("--no-safety", action="store_true", help="geri yüklemeden önce mevcut durumu yedekleme")
+    res.set_defaults(func=cmd_restore)
+
+    arc = commands.add_parser("archive", help="eski tamamlamaları yıllık bitmap'lere katla ve dosyayı küçült")
+    arc.add_argument("--keep-years", type=int, default=archive.KEEP_YEARS,
+                     help="geçerli yıla ek olarak canlı tutulacak yıl sayısı")
+    arc.add_argument("--no-vacuum", action="store_true", help="VACUUM / incremental_vacuum çalıştırma")
+    arc.set_defaults(func=cmd_archive)
+
+    serve = commands.add_parser("serve", help="arayüzsüz JSON API sunucusunu başlat")
+    serve.add_argument("--host", default=api_server.HOST)
+    serve.add_argument("--port", type=int, default=api_server.PORT)
+    serve.add_argument("--workers", type=int, default=api_server.WORKERS, help="SQLite işleri için thread sayısı")
+    serve.set_defaults(func=cmd_serve)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    db = Database(args.db)
+    try:
+        return args.func(db, args) or 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
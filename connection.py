@@ -0,0 +1,140 @@
+import sqlite3
+import threading
+import contextlib
+import random
+import queue
+import time
+
+
+class ConnectionManager:
+    # Tek (sıralı) yazıcı bağlantı + okuma havuzu, WAL ve BUSY tekrar denemesi
+
+    def __init__(self, db_file, readers=4, timeout=5.0, retries=6, backoff=0.02,
+                 wal=True, pragmas=(), row_factory=sqlite3.Row):
+        self.db_file = db_file
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.pragmas = list(pragmas)
+        self.row_factory = row_factory
+        self.in_memory = db_file == ":memory:" or str(db_file).startswith("file::memory:")
+        # Bellek içi veritabanı bağlantılar arasında paylaşılamaz
+        self.max_readers = 0 if self.in_memory else readers
+        self.stats = {"lock_waits": 0, "lock_wait_time": 0.0, "busy_retries": 0, "busy_failures": 0}
+        self._stats_lock = threading.Lock()
+        self._write_lock = threading.RLock()
+        self._write_owner = None
+        self._readers = queue.LifoQueue()
+        self._reader_count = 0
+        self._reader_count_lock = threading.Lock()
+        self._closed = False
+        self._connect_hooks = []
+        self._all = []
+        self.writer = self._connect()
+        if wal and not self.in_memory:
+            self.writer.execute("PRAGMA journal_mode = WAL")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_file, timeout=self.timeout,
+                               detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+        conn.row_factory = self.row_factory
+        for pragma in self.pragmas:
+            conn.execute(f"PRAGMA {pragma}")
+        for hook in self._connect_hooks:
+            hook(conn)
+        self._all.append(conn)
+        return conn
+
+    def add_connect_hook(self, hook):
+        # Mevcut ve sonradan açılacak tüm bağlantılara uygulanır
+        self._connect_hooks.append(hook)
+        for conn in self.connections():
+            hook(conn)
+
+    def remove_connect_hook(self, hook):
+        if hook in self._connect_hooks:
+            self._connect_hooks.remove(hook)
+
+    def connections(self):
+        return list(self._all)
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def snapshot_stats(self):
+        with self._stats_lock:
+            return dict(self.stats)
+
+    # ---------------------------
+    # Readers
+    # ---------------------------
+    @contextlib.contextmanager
+    def reader(self):
+        if self.max_readers == 0:
+            with self.write_lock():
+                yield self.writer
+            return
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            conn = None
+            with self._reader_count_lock:
+                if self._reader_count < self.max_readers:
+                    self._reader_count += 1
+                    conn = self._connect()
+            if conn is None:
+                conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._readers.put(conn)
+
+    # ---------------------------
+    # Writer
+    # ---------------------------
+    @contextlib.contextmanager
+    def write_lock(self):
+        if not self._write_lock.acquire(blocking=False):
+            started = time.perf_counter()
+            self._write_lock.acquire()
+            self._count("lock_waits")
+            self._count("lock_wait_time", time.perf_counter() - started)
+        previous_owner = self._write_owner
+        self._write_owner = threading.get_ident()
+        try:
+            yield self.writer
+        finally:
+            self._write_owner = previous_owner
+            self._write_lock.release()
+
+    def owns_write_lock(self):
+        return self._write_owner == threading.get_ident()
+
+    def begin_immediate(self):
+        # Yazma kilidi baştan alınır; böylece BUSY yalnızca burada, henüz bir şey yazılmadan oluşur
+        self.retry(self.writer.execute, "BEGIN IMMEDIATE")
+
+    def retry(self, func, *args):
+        for attempt in range(self.retries + 1):
+            try:
+                return func(*args)
+            except sqlite3.OperationalError as e:
+                message = str(e).lower()
+                if "locked" not in message and "busy" not in message:
+                    raise
+                if attempt == self.retries:
+                    self._count("busy_failures")
+                    raise
+                self._count("busy_retries")
+                delay = self.backoff * (2 ** attempt)
+                time.sleep(delay + random.uniform(0, delay))
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        for conn in self._all:
+            conn.close()
@@ -1,150 +1,963 @@
 import sqlite3
 import datetime
+import contextlib
+import time
+from connection import ConnectionManager
+from migrations import migrate, POINTS_PAUSED_KEY
+from streaks import compute_streaks, period_index, to_date, to_day
+from leaderboard import TopK, ALL_TIME
+from records import User, Habit, row_factory
+from search import fold, fts_query, register_functions
+import archive
 
 DB_FILENAME = "habit_tracker.db"
+# Puan sıralamasında önbellekte tutulan kullanıcı sayısı
+TOP_K = 100
+# Yazarken aramada döndürülen en fazla alışkanlık sayısı
+SEARCH_LIMIT = 1000
+
+# Her bağlantıda uygulanan ayarlar
+PRAGMAS = [
+    "foreign_keys = ON",
+    "synchronous = NORMAL",
+    "temp_store = MEMORY",
+    "cache_size = -8000",
+]
+
+# Dışa aktarma sırası: kayıtlar, kendilerine başvuran kayıtlardan önce gelir
+EXPORT_QUERIES = [
+    ("user", """SELECT username, email, password_hash FROM users
+                {where} ORDER BY id""", "id = ?"),
+    ("habit", """SELECT u.email, h.name, h.category, h.frequency, h.created_at
+                 FROM habits h JOIN users u ON u.id = h.user_id
+                 {where} ORDER BY h.id""", "h.user_id = ?"),
+    # h.id + kapsayıcı indeks sırası: geçici sıralama tablosu kurulmaz
+    ("completion", """SELECT u.email, h.name, c.date
+                      FROM habits h JOIN users u ON u.id = h.user_id
+                      JOIN completions c ON c.habit_id = h.id
+                      {where} ORDER BY h.id, c.date""", "h.user_id = ?"),
+    # Arşivlenmiş tamamlamalar aynı biçimde, bitmap'ler year_days ile satırlara açılarak
+    ("completion", """SELECT u.email, h.name, year_start(a.year) + d.i AS date
+                      FROM habits h JOIN users u ON u.id = h.user_id
+                      JOIN completion_archive a ON a.habit_id = h.id
+                      JOIN year_days d ON bitmap_test(a.bits, d.i)
+                      {where} ORDER BY h.id, a.year, d.i""", "h.user_id = ?"),
+]
 
 class Database:
-    def __init__(self, db_file=DB_FILENAME):
-        self.conn = sqlite3.connect(db_file, detect_types=sqlite3.PARSE_DECLTYPES)
-        self.conn.row_factory = sqlite3.Row
-        self._create_tables()
+    def __init__(self, db_file=DB_FILENAME, write_behind=None, readers=4, timeout=5.0):
+        self.db_file = db_file
+        self.connections = ConnectionManager(db_file, readers=readers, timeout=timeout, pragmas=PRAGMAS,
+                                             row_factory=row_factory)
+        # Tüm yazmalar bu tek bağlantı üzerinden, sırayla yapılır
+        self.conn = self.connections.writer
+        # write_behind (saniye): yazmalar bu aralıkta tek commit'te toplanır
+        self.write_behind = write_behind
+        self._dirty = False
+        self._depth = 0
+        self._last_commit = time.monotonic()
+        self.top_points = TopK(TOP_K)
+        # Yazıcı bağlantının PRAGMA data_version değeri ve fark edilen dış yazma sayısı;
+        # bkz. check_external_writes
+        self._data_version = None
+        self.external_writes = 0
+        self.connections.add_connect_hook(register_functions)
+        self.connections.add_connect_hook(archive.register_bitmap_functions)
+        migrate(self.conn)
+
+    # ---------------------------
+    # Transactions
+    # ---------------------------
+    def _commit(self):
+        if self.write_behind is None:
+            self.conn.commit()
+            return
+        self._dirty = True
+        if time.monotonic() - self._last_commit >= self.write_behind:
+            self.flush()
+
+    def flush(self):
+        with self.connections.write_lock():
+            if self.conn.in_transaction:
+                self.connections.retry(self.conn.commit)
+            self._dirty = False
+            self._last_commit = time.monotonic()
+
+    @property
+    def has_pending_writes(self):
+        return self._dirty
+
+    @contextlib.contextmanager
+    def _atomic(self, name="atomic"):
+        # Savepoint sayesinde write-behind ile biriken yazmalar geri alınmaz
+        with self.connections.write_lock():
+            if self._depth == 0 and not self.conn.in_transaction:
+                self.connections.begin_immediate()
+            self._depth += 1
+            try:
+                self.conn.execute(f"SAVEPOINT {name}")
+                try:
+                    yield self.conn.cursor()
+                except Exception:
+                    # Geri alınan puan değişiklikleri sıralama önbelleğine işlenmiş olabilir
+                    self.top_points.invalidate()
+                    self.conn.execute(f"ROLLBACK TO {name}")
+                    self.conn.execute(f"RELEASE {name}")
+                    raise
+                self.conn.execute(f"RELEASE {name}")
+            finally:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._commit()
+
+    def transaction(self, name="transaction"):
+        # Dış çağıranlar için (ör. API toplu isteği): blok tek commit'te, iç içe bloklar savepoint'tir;
+        # istisnayla çıkan blok yalnızca kendi yazmalarını geri alır
+        return self._atomic(name)
+
+    @contextlib.contextmanager
+    def _reader(self):
+        # Kendi yazma transaction'ı içindeyken ya da bekleyen yazma varken yazıcı bağlantı okunur
+        if self._dirty or self.connections.owns_write_lock():
+            with self.connections.write_lock() as conn:
+                yield conn
+        else:
+            with self.connections.reader() as conn:
+                yield conn
+
+    def close(self):
+        self.flush()
+        self.connections.close()
 
-    def _create_tables(self):
-        cur = self.conn.cursor()
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE,
-            email TEXT UNIQUE,
-            password_hash TEXT,
-            total_points INTEGER DEFAULT 0
-        );
-        """)
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS habits (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            name TEXT COLLATE NOCASE,
-            category TEXT,
-            frequency TEXT,
-            created_at DATE,
-            UNIQUE(user_id, name),
-            FOREIGN KEY(user_id) REFERENCES users(id)
-);
-""")
-
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS completions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            habit_id INTEGER,
-            date DATE,
-            UNIQUE(habit_id, date),
-            FOREIGN KEY(habit_id) REFERENCES habits(id)
-        );
-        """)
-             
-        self.conn.commit()
-        
     # ---------------------------
     # User methods
     # ---------------------------
     def create_user(self, username, email, password_hash):
-        cur = self.conn.cursor()
         try:
-            cur.execute("INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)",
-                        (username, email, password_hash))
-            self.conn.commit()
-            return cur.lastrowid
+            with self._atomic() as cur:
+                cur.execute("INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)",
+                            (username, email, password_hash))
+                self._points_changed(cur.lastrowid, 0)
+                return cur.lastrowid
         except sqlite3.IntegrityError:
             return None
 
+    def set_password_hash(self, user_id, password_hash):
+        # Girişte eski/zayıf özet yenisiyle değiştirilir (bkz. passwords.check)
+        with self._atomic() as cur:
+            cur.execute("UPDATE users SET password_hash = ? WHERE id = ?", (password_hash, user_id))
+
     def get_user_by_email(self, email):
-        cur = self.conn.cursor()
-        cur.execute("SELECT * FROM users WHERE email = ?", (email,))
-        return cur.fetchone()
+        with self._reader() as conn:
+            cur = conn.cursor()
+            cur.row_factory = User.from_row
+            cur.execute(f"SELECT {User.COLUMNS} FROM users WHERE email = ?", (email,))
+            return cur.fetchone()
 
     def get_user_by_id(self, user_id):
-        cur = self.conn.cursor()
-        cur.execute("SELECT * FROM users WHERE id = ?", (user_id,))
-        return cur.fetchone()
+        with self._reader() as conn:
+            cur = conn.cursor()
+            cur.row_factory = User.from_row
+            cur.execute(f"SELECT {User.COLUMNS} FROM users WHERE id = ?", (user_id,))
+            return cur.fetchone()
 
     def add_points(self, user_id, points):
-        cur = self.conn.cursor()
-        cur.execute("UPDATE users SET total_points = total_points + ? WHERE id = ?", (points, user_id))
-        self.conn.commit()
+        with self._atomic() as cur:
+            cur.execute("UPDATE users SET total_points = total_points + ? WHERE id = ? RETURNING total_points",
+                        (points, user_id))
+            row = cur.fetchone()
+            if row is not None:
+                self._points_changed(user_id, row["total_points"])
+
+    def _points_changed(self, user_id, total):
+        self.top_points.update(user_id, total)
+
+    def check_external_writes(self):
+        # data_version yazıcı bağlantıda yalnızca başka bağlantıların (aynı dosyadaki diğer örnek ve
+        # süreçlerin) commit'leriyle değişir; kendi yazmalarımız önbelleğe zaten artımlı işlenir.
+        # Dönen sayaç değişmişse dış önbellekler (ör. CachedDatabase) de boşaltılmalıdır.
+        with self.connections.write_lock() as conn:
+            version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._data_version:
+            if self._data_version is not None:
+                self.top_points.invalidate()
+                self.external_writes += 1
+            self._data_version = version
+        return self.external_writes
 
     def total_points(self, user_id):
-        cur = self.conn.cursor()
-        cur.execute("SELECT total_points FROM users WHERE id = ?", (user_id,))
-        row = cur.fetchone()
-        return row["total_points"] if row else 0
+        with self._reader() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT total_points FROM users WHERE id = ?", (user_id,))
+            row = cur.fetchone()
+            return row["total_points"] if row else 0
 
     # ---------------------------
     # Habit methods
     # ---------------------------
+    # Ad benzersizliği idx_habits_name_key (Türkçe kurallı) ile sağlanır; aynı ad varsa
+    # add_habit None, update_habit False döner
     def add_habit(self, user_id, name, category, frequency):
-        cur = self.conn.cursor()
-        cur.execute("INSERT INTO habits (user_id, name, category, frequency, created_at) VALUES (?, ?, ?, ?, ?)",
-                    (user_id, name, category, frequency, datetime.date.today()))
-        self.conn.commit()
-        return cur.lastrowid
+        try:
+            with self._atomic() as cur:
+                cur.execute("INSERT INTO habits (user_id, name, category, frequency, created_at) VALUES (?, ?, ?, ?, ?)",
+                            (user_id, name, category, frequency, datetime.date.today()))
+                return cur.lastrowid
+        except sqlite3.IntegrityError:
+            return None
 
     def update_habit(self, habit_id, name, category, frequency):
-        cur = self.conn.cursor()
-        cur.execute("UPDATE habits SET name = ?, category = ?, frequency = ? WHERE id = ?",
-                    (name, category, frequency, habit_id))
-        self.conn.commit()
+        try:
+            with self._atomic() as cur:
+                old_frequency = self._habit_frequency(habit_id)
+                cur.execute("UPDATE habits SET name = ?, category = ?, frequency = ? WHERE id = ?",
+                            (name, category, frequency, habit_id))
+                if old_frequency != frequency:
+                    # Dönem uzunluğu değişti, seri baştan hesaplanmalı
+                    self.recompute_streak(habit_id)
+        except sqlite3.IntegrityError:
+            return False
+        return True
 
     def delete_habit(self, habit_id):
-        cur = self.conn.cursor()
-        cur.execute("DELETE FROM completions WHERE habit_id = ?", (habit_id,))
-        cur.execute("DELETE FROM habits WHERE id = ?", (habit_id,))
-        self.conn.commit()
+        with self._atomic() as cur:
+            # completions ve habit_streaks satırları ON DELETE CASCADE ile silinir
+            cur.execute("DELETE FROM habits WHERE id = ?", (habit_id,))
+
+    def remove_habit(self, habit_id):
+        # Alışkanlığı siler ve kazanılan puanları (canlı + arşiv) sahibinden düşer, tek transaction'da.
+        # Yeni toplam puanı, alışkanlık yoksa None döner.
+        with self._atomic("remove_habit") as cur:
+            cur.execute("SELECT user_id FROM habits WHERE id = ?", (habit_id,))
+            row = cur.fetchone()
+            if row is None:
+                return None
+            user_id = row["user_id"]
+            completed = self.completion_count_for_habit(habit_id)
+            cur.execute("UPDATE users SET total_points = total_points - ? WHERE id = ? RETURNING total_points",
+                        (completed, user_id))
+            total = cur.fetchone()["total_points"]
+            self._points_changed(user_id, total)
+            cur.execute("DELETE FROM habits WHERE id = ?", (habit_id,))
+        return total
 
     def list_habits(self, user_id):
-        cur = self.conn.cursor()
-        cur.execute("SELECT * FROM habits WHERE user_id = ?", (user_id,))
-        return cur.fetchall()
+        with self._reader() as conn:
+            cur = conn.cursor()
+            cur.row_factory = Habit.from_row
+            cur.execute(f"SELECT {Habit.COLUMNS} FROM habits WHERE user_id = ?", (user_id,))
+            return cur.fetchall()
+
+    def list_habits_page(self, user_id, after_id=0, limit=256):
+        with self._reader() as conn:
+            cur = conn.cursor()
+            cur.row_factory = Habit.from_row
+            cur.execute(f"""SELECT {Habit.COLUMNS} FROM habits
+                            WHERE user_id = ? AND id > ? ORDER BY id LIMIT ?""",
+                         (user_id, after_id, limit))
+            return cur.fetchall()
+
+    def habit_name_exists(self, user_id, name, exclude_id=None):
+        # Türkçe büyük/küçük harf duyarsız; idx_habits_name_key ifade indeksiyle tek arama.
+        # exclude_id: yeniden adlandırılan alışkanlığın kendisi sayılmaz
+        with self._reader() as conn:
+            cur = conn.cursor()
+            # Planlayıcı idx_habits_user'ı seçip kullanıcının alışkanlıklarını tarayabilir; ifade indeksi zorlanır
+            cur.execute("""SELECT 1 FROM habits INDEXED BY idx_habits_name_key
+                           WHERE user_id = ? AND tr_fold(name) = ? AND id IS NOT ? LIMIT 1""",
+                        (user_id, fold(name.strip()), exclude_id))
+            return cur.fetchone() is not None
+
+    def search_habits(self, user_id, text, limit=SEARCH_LIMIT):
+        # Ad ve kategoride kelime önekleriyle arama (habits_fts); tek harflik aramalar çok satır döndürmesin diye sınırlı
+        query = fts_query(text)
+        if query is None:
+            return []
+        with self._reader() as conn:
+            cur = conn.cursor()
+            cur.row_factory = Habit.from_row
+            cur.execute(f"""SELECT {Habit.COLUMNS} FROM habits WHERE user_id = ?
+                            AND id IN (SELECT rowid FROM habits_fts WHERE habits_fts MATCH ?) ORDER BY id LIMIT ?""",
+                        (user_id, query, limit))
+            return cur.fetchall()
 
     def get_habit(self, habit_id):
-        cur = self.conn.cursor()
-        cur.execute("SELECT * FROM habits WHERE id = ?", (habit_id,))
-        return cur.fetchone()
+        with self._reader() as conn:
+            cur = conn.cursor()
+            cur.row_factory = Habit.from_row
+            cur.execute(f"SELECT {Habit.COLUMNS} FROM habits WHERE id = ?", (habit_id,))
+            return cur.fetchone()
 
     # ---------------------------
     # Completion methods
     # ---------------------------
     def completion_count_for_habit(self, habit_id):
-        cur = self.conn.cursor()
-        cur.execute(
-            "SELECT COUNT(*) AS cnt FROM completions WHERE habit_id = ?",
-            (habit_id,)
-        )
-        row = cur.fetchone()
-        return row["cnt"] if row else 0
+        with self._reader() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                """SELECT (SELECT COUNT(*) FROM completions WHERE habit_id = ?)
+                        + (SELECT COALESCE(SUM(count), 0) FROM completion_archive WHERE habit_id = ?) AS cnt""",
+                (habit_id, habit_id)
+            )
+            row = cur.fetchone()
+            return row["cnt"] if row else 0
      
+    # Tarihler bu sınırda gün sayısına çevrilir (streaks.to_day); okumalar gün sayısı döner
     def mark_completed(self, habit_id, date_):
-        cur = self.conn.cursor()
+        date_ = to_day(date_)
         try:
-            cur.execute("INSERT INTO completions (habit_id, date) VALUES (?, ?)", (habit_id, date_))
-            self.conn.commit()
-            return True
+            with self._atomic() as cur:
+                if self._archived_pairs(cur, [(habit_id, date_)]):
+                    return False
+                cur.execute("INSERT INTO completions (habit_id, date) VALUES (?, ?)", (habit_id, date_))
+                self._streak_on_insert(habit_id, date_)
         except sqlite3.IntegrityError:
             return False
+        return True
 
     def unmark_completed(self, habit_id, date_):
-        cur = self.conn.cursor()
-        cur.execute("DELETE FROM completions WHERE habit_id = ? AND date = ?", (habit_id, date_))
-        self.conn.commit()
+        date_ = to_day(date_)
+        with self._atomic() as cur:
+            self._unarchive(cur, [(habit_id, date_)])
+            cur.execute("DELETE FROM completions WHERE habit_id = ? AND date = ?", (habit_id, date_))
+            if cur.rowcount:
+                self._streak_on_delete(habit_id, date_)
 
+    def toggle_completion(self, habit_id, date_):
+        # Kontrol, ekleme/silme ve puan güncellemesi tek transaction'da
+        date_ = to_day(date_)
+        with self._atomic("toggle") as cur:
+            self._unarchive(cur, [(habit_id, date_)])
+            cur.execute("DELETE FROM completions WHERE habit_id = ? AND date = ?", (habit_id, date_))
+            if cur.rowcount:
+                completed = False
+                self._streak_on_delete(habit_id, date_)
+            else:
+                cur.execute("INSERT INTO completions (habit_id, date) VALUES (?, ?)", (habit_id, date_))
+                completed = True
+                self._streak_on_insert(habit_id, date_)
+            cur.execute("""UPDATE users SET total_points = total_points + ?
+                           WHERE id = (SELECT user_id FROM habits WHERE id = ?)
+                           RETURNING id, total_points""",
+                        (1 if completed else -1, habit_id))
+            row = cur.fetchone()
+            if row is not None:
+                self._points_changed(row["id"], row["total_points"])
+        return completed, row["total_points"] if row else 0
+
+    def mark_completed_many(self, pairs):
+        return self._change_completions_many(
+            pairs, "INSERT OR IGNORE INTO completions (habit_id, date) VALUES (?, ?)", 1)
+
+    def unmark_completed_many(self, pairs):
+        return self._change_completions_many(
+            pairs, "DELETE FROM completions WHERE habit_id = ? AND date = ?", -1)
+
+    def _change_completions_many(self, pairs, sql, sign):
+        # pairs: (habit_id, date) çiftleri; değişen satır sayısı kadar puan verilir/düşülür
+        pairs = list(dict.fromkeys((habit_id, to_day(date_)) for habit_id, date_ in pairs))
+        if not pairs:
+            return 0
+        changed = 0
+        with self._atomic("bulk") as cur:
+            owners = self._habit_owners({habit_id for habit_id, _ in pairs})
+            if sign > 0:
+                archived = self._archived_pairs(cur, pairs)
+            else:
+                archived = set()
+                self._unarchive(cur, [pair for pair in pairs if pair[0] in owners])
+            by_user = {}
+            for habit_id, date_ in pairs:
+                if habit_id in owners and (habit_id, date_) not in archived:
+                    by_user.setdefault(owners[habit_id], []).append((habit_id, date_))
+            for user_id, user_pairs in by_user.items():
+                cur.executemany(sql, user_pairs)
+                count = cur.rowcount
+                if count > 0:
+                    cur.execute("UPDATE users SET total_points = total_points + ? WHERE id = ? RETURNING total_points",
+                                (sign * count, user_id))
+                    self._points_changed(user_id, cur.fetchone()["total_points"])
+                    changed += count
+            for habit_id in {habit_id for habit_id, _ in pairs if habit_id in owners}:
+                self.recompute_streak(habit_id)
+        return changed
+
+    def _habit_owners(self, habit_ids):
+        with self._reader() as conn:
+            cur = conn.cursor()
+            ids = list(habit_ids)
+            owners = {}
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                cur.execute(f"SELECT id, user_id FROM habits WHERE id IN ({','.join('?' * len(chunk))})", chunk)
+                owners.update((r["id"], r["user_id"]) for r in cur.fetchall())
+            return owners
+
+    # Okumalar canlı satırları ve arşiv bitmap'lerini birlikte döner (bkz. archive.py);
+    # arşiv satırı alışkanlık-yıl anahtarıyla, aralık dışındaki yıllar okunmadan bulunur
     def is_completed(self, habit_id, date_):
-        cur = self.conn.cursor()
-        cur.execute("SELECT 1 FROM completions WHERE habit_id = ? AND date = ?", (habit_id, date_))
-        return cur.fetchone() is not None
+        day = to_day(date_)
+        with self._reader() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT 1 FROM completions WHERE habit_id = ? AND date = ?", (habit_id, day))
+            if cur.fetchone() is not None:
+                return True
+            year = to_date(day).year
+            cur.execute("SELECT bits FROM completion_archive WHERE habit_id = ? AND year = ?", (habit_id, year))
+            row = cur.fetchone()
+            return row is not None and archive.test(row[0], day - archive.year_start(year))
 
     def completions_for_habit(self, habit_id):
+        with self._reader() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT date FROM completions WHERE habit_id = ? ORDER BY date", (habit_id,))
+            dates = [r["date"] for r in cur.fetchall()]
+            return self._with_archived(cur, habit_id, dates)
+
+    def completions_between(self, habit_id, start, end):
+        start, end = to_day(start), to_day(end)
+        with self._reader() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT date FROM completions WHERE habit_id = ? AND date BETWEEN ? AND ? ORDER BY date",
+                        (habit_id, start, end))
+            dates = [r["date"] for r in cur.fetchall()]
+            return self._with_archived(cur, habit_id, dates, start, end)
+
+    def _with_archived(self, cur, habit_id, dates, start=None, end=None):
+        # dates: sıralı canlı günler; [start, end] içindeki arşiv günleri eklenir
+        if start is None:
+            cur.execute("SELECT year, bits FROM completion_archive WHERE habit_id = ? ORDER BY year", (habit_id,))
+        else:
+            cur.execute("""SELECT year, bits FROM completion_archive WHERE habit_id = ?
+                           AND year BETWEEN ? AND ? ORDER BY year""",
+                        (habit_id, to_date(start).year, to_date(end).year))
+        archived = [d for year, bits in cur.fetchall() for d in archive.decode(year, bits)
+                    if start is None or start <= d <= end]
+        if not archived:
+            return dates
+        return sorted(archived + dates)
+
+    def completion_counts_between(self, user_id, start, end):
+        # Kullanıcının tüm alışkanlıklarında gün başına tamamlama sayısı: (gün numarası, sayı)
+        start, end = to_day(start), to_day(end)
+        with self._reader() as conn:
+            cur = conn.cursor()
+            cur.execute("""SELECT c.date, COUNT(*) AS n
+                           FROM habits h JOIN completions c ON c.habit_id = h.id
+                           WHERE h.user_id = ? AND c.date BETWEEN ? AND ?
+                           GROUP BY c.date""", (user_id, start, end))
+            counts = {r[0]: r[1] for r in cur.fetchall()}
+            cur.execute("""SELECT a.year, a.bits
+                           FROM habits h JOIN completion_archive a ON a.habit_id = h.id
+                           WHERE h.user_id = ? AND a.year BETWEEN ? AND ?""",
+                        (user_id, to_date(start).year, to_date(end).year))
+            for year, bits in cur.fetchall():
+                for d in archive.decode(year, bits):
+                    if start <= d <= end:
+                        counts[d] = counts.get(d, 0) + 1
+            return sorted(counts.items())
+
+    def completion_columns(self, user_id):
+        # Kullanıcının tüm tamamlamaları tek sorguda: (habit_id, gün numarası) tuple'ları
+        with self._reader() as conn:
+            cur = conn.cursor()
+            cur.row_factory = None
+            cur.execute("""SELECT c.habit_id, c.date
+                           FROM completions c JOIN habits h ON h.id = c.habit_id
+                           WHERE h.user_id = ? ORDER BY h.id, c.date""", (user_id,))
+            rows = cur.fetchall()
+            cur.execute("""SELECT a.habit_id, a.year, a.bits
+                           FROM habits h JOIN completion_archive a ON a.habit_id = h.id
+                           WHERE h.user_id = ?""", (user_id,))
+            archived = [(habit_id, d) for habit_id, year, bits in cur.fetchall()
+                        for d in archive.decode(year, bits)]
+            if archived:
+                rows.extend(archived)
+                rows.sort()
+            return rows
+
+    def schedule_rows(self, user_id, today, habit_id=None):
+        # Tüm alışkanlıklar için bugüne kadarki son tamamlama tek sorguda; MAX alt sorgusu alışkanlık
+        # başına tek bir indeks aramasıdır. Arşivde yalnızca son yıl okunur (arşiv günleri hep geçmiştedir).
+        with self._reader() as conn:
+            cur = conn.cursor()
+            sql = """SELECT h.id, h.name, h.frequency, h.created_at,
+                            (SELECT MAX(d) FROM (
+                                SELECT MAX(c.date) AS d FROM completions c
+                                WHERE c.habit_id = h.id AND c.date <= ?
+                                UNION ALL
+                                SELECT * FROM (SELECT year_start(a.year) + bitmap_last(a.bits)
+                                               FROM completion_archive a WHERE a.habit_id = h.id
+                                               ORDER BY a.year DESC LIMIT 1))) AS last_date
+                     FROM habits h WHERE h.user_id = ?"""
+            if habit_id is None:
+                cur.execute(sql, (to_day(today), user_id))
+            else:
+                cur.execute(sql + " AND h.id = ?", (to_day(today), user_id, habit_id))
+            return cur.fetchall()
+
+    def _archived_pairs(self, cur, pairs):
+        # pairs içinden arşivde tamamlanmış görünenler; eklemeler bunları atlar (zaten tamamlanmış)
+        found, bitmaps = set(), {}
+        for habit_id, day in pairs:
+            year = to_date(day).year
+            if (habit_id, year) not in bitmaps:
+                cur.execute("SELECT bits FROM completion_archive WHERE habit_id = ? AND year = ?", (habit_id, year))
+                row = cur.fetchone()
+                bitmaps[habit_id, year] = row[0] if row else None
+            bits = bitmaps[habit_id, year]
+            if bits is not None and archive.test(bits, day - archive.year_start(year)):
+                found.add((habit_id, day))
+        return found
+
+    def _unarchive(self, cur, pairs):
+        # Silinecek arşiv günleri canlı tabloya geri taşınır (puanlar değişmez); silme yolları
+        # bundan sonra yalnızca completions ile çalışır, puanlar tetikleyicilerle düşülür
+        moved = 0
+        for habit_id, day in sorted(self._archived_pairs(cur, pairs)):
+            year = to_date(day).year
+            cur.execute("SELECT bits FROM completion_archive WHERE habit_id = ? AND year = ?", (habit_id, year))
+            bits = archive.clear(cur.fetchone()[0], day - archive.year_start(year))
+            if archive.count(bits):
+                cur.execute("UPDATE completion_archive SET bits = ?, count = count - 1 WHERE habit_id = ? AND year = ?",
+                            (bits, habit_id, year))
+            else:
+                cur.execute("DELETE FROM completion_archive WHERE habit_id = ? AND year = ?", (habit_id, year))
+            with self._points_paused(cur):
+                cur.execute("INSERT INTO completions (habit_id, date) VALUES (?, ?)", (habit_id, day))
+            moved += 1
+        return moved
+
+    @contextlib.contextmanager
+    def _points_paused(self, cur):
+        # Dönem puanı tetikleyicileri devre dışı (migrations.POINTS_PAUSED_KEY); aynı transaction içinde kalmalı
+        cur.execute("INSERT INTO meta (key, value) VALUES (?, 1)", (POINTS_PAUSED_KEY,))
+        try:
+            yield
+        finally:
+            cur.execute("DELETE FROM meta WHERE key = ?", (POINTS_PAUSED_KEY,))
+
+    # ---------------------------
+    # Archive
+    # ---------------------------
+    def archive_completions(self, before):
+        # before (gün numarası) öncesindeki tamamlamalar alışkanlık-yıl bitmap'lerine katlanır.
+        # Puanlar, dönem puanları ve seriler aynı kalır; satırlar alışkanlık/gün sırasıyla akıtılır.
+        before = to_day(before)
+        archived = years = 0
+        with self._atomic("archive") as cur:
+            reader = self.conn.cursor()
+            reader.execute("SELECT habit_id, date FROM completions WHERE date < ? ORDER BY habit_id, date",
+                           (before,))
+            key, days = None, []
+            for habit_id, day in reader:
+                year = to_date(day).year
+                if (habit_id, year) != key:
+                    if days:
+                        self._store_archive(cur, key, days)
+                        years += 1
+                    key, days = (habit_id, year), []
+                days.append(day - archive.year_start(year))
+                archived += 1
+            if days:
+                self._store_archive(cur, key, days)
+                years += 1
+            with self._points_paused(cur):
+                cur.execute("DELETE FROM completions WHERE date < ?", (before,))
+            cur.execute("""INSERT INTO meta (key, value) VALUES ('archive_before', ?)
+                           ON CONFLICT (key) DO UPDATE SET value = MAX(value, excluded.value)""", (before,))
+        return {"archived": archived, "years": years}
+
+    def _store_archive(self, cur, key, offsets):
+        bits = archive.encode(offsets)
+        cur.execute("SELECT bits FROM completion_archive WHERE habit_id = ? AND year = ?", key)
+        row = cur.fetchone()
+        if row is not None:
+            bits = archive.merge(row[0], bits)
+        cur.execute("INSERT OR REPLACE INTO completion_archive (habit_id, year, bits, count) VALUES (?, ?, ?, ?)",
+                    key + (bits, archive.count(bits)))
+
+    def archive_sample(self, n, rng):
+        # Arşiv raporu için rastgele alışkanlıklar ve sahipleri
+        with self._reader() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT id, user_id FROM habits")
+            rows = [tuple(r) for r in cur.fetchall()]
+        sample = rng.sample(rows, min(n, len(rows)))
+        return [habit_id for habit_id, _ in sample], sorted({user_id for _, user_id in sample})[:max(n // 10, 1)]
+
+    # ---------------------------
+    # Points reconciliation
+    # ---------------------------
+    def points_drift(self, user_ids=None):
+        # Gerçek puan = canlı + arşivlenmiş tamamlama sayısı; saklanan değerden farklı olanlar
+        sql = """SELECT u.id, u.username, u.total_points AS stored, COALESCE(t.n, 0) AS actual
+                 FROM users u LEFT JOIN (
+                     SELECT user_id, SUM(n) AS n FROM (
+                         SELECT h.user_id, COUNT(*) AS n
+                         FROM completions c JOIN habits h ON h.id = c.habit_id
+                         {where} GROUP BY h.user_id
+                         UNION ALL
+                         SELECT h.user_id, SUM(a.count)
+                         FROM completion_archive a JOIN habits h ON h.id = a.habit_id
+                         {where} GROUP BY h.user_id
+                     ) GROUP BY user_id
+                 ) t ON t.user_id = u.id
+                 WHERE u.total_points IS NOT COALESCE(t.n, 0) {and_users}"""
+        with self._reader() as conn:
+            cur = conn.cursor()
+            if user_ids is None:
+                cur.execute(sql.format(where="", and_users=""))
+                return cur.fetchall()
+            ids = list(user_ids)
+            rows = []
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                cur.execute(sql.format(where=f"WHERE h.user_id IN ({marks})", and_users=f"AND u.id IN ({marks})"),
+                            chunk * 3)
+                rows.extend(cur.fetchall())
+            return rows
+
+    def fix_points(self, user_ids):
+        # Puan yazılırken yeniden sayılır; tespit ile düzeltme arasındaki yazmalar kaybolmaz
+        fixed = {}
+        with self._atomic("fix_points") as cur:
+            for user_id in user_ids:
+                cur.execute("""UPDATE users SET total_points = (
+                                   SELECT COUNT(*) FROM completions c JOIN habits h ON h.id = c.habit_id
+                                   WHERE h.user_id = users.id) + (
+                                   SELECT COALESCE(SUM(a.count), 0)
+                                   FROM completion_archive a JOIN habits h ON h.id = a.habit_id
+                                   WHERE h.user_id = users.id)
+                               WHERE id = ? RETURNING total_points""", (user_id,))
+                row = cur.fetchone()
+                if row is not None:
+                    fixed[user_id] = row["total_points"]
+                    self._points_changed(user_id, row["total_points"])
+        return fixed
+
+    def max_completion_id(self):
+        with self._reader() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT MAX(id) FROM completions")
+            return cur.fetchone()[0] or 0
+
+    def users_with_completions_after(self, completion_id):
+        # completions.id bir rowid'dir; aralık araması yalnızca yeni satırları okur
+        with self._reader() as conn:
+            cur = conn.cursor()
+            cur.execute("""SELECT DISTINCT h.user_id FROM completions c JOIN habits h ON h.id = c.habit_id
+                           WHERE c.id > ?""", (completion_id,))
+            return [r[0] for r in cur.fetchall()]
+
+    def get_meta(self, key, default=None):
+        with self._reader() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT value FROM meta WHERE key = ?", (key,))
+            row = cur.fetchone()
+            return row[0] if row else default
+
+    def set_meta(self, key, value):
+        with self._atomic() as cur:
+            cur.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    # ---------------------------
+    # Leaderboard
+    # ---------------------------
+    def leaderboard(self, period=ALL_TIME, category=None, limit=10, offset=0):
+        # period: leaderboard.period_key; sıralama puana göre azalan, eşitlikte önce kaydolan
+        if period == ALL_TIME and not category and offset + limit <= self.top_points.k:
+            self.check_external_writes()
+            ranked = self.top_points.get(self._load_top_points, offset + limit)[offset:]
+            names = self._usernames([user_id for user_id, _ in ranked])
+            rows = [(user_id, names.get(user_id), points) for user_id, points in ranked]
+        else:
+            with self._reader() as conn:
+                cur = conn.cursor()
+                if period == ALL_TIME and not category:
+                    cur.execute("""SELECT id, username, total_points FROM users
+                                   ORDER BY total_points DESC, id LIMIT ? OFFSET ?""", (limit, offset))
+                else:
+                    cur.execute("""SELECT p.user_id, u.username, p.points
+                                   FROM period_points p JOIN users u ON u.id = p.user_id
+                                   WHERE p.period = ? AND p.category = ?
+                                   ORDER BY p.points DESC, p.user_id LIMIT ? OFFSET ?""",
+                                (period, category or "", limit, offset))
+                rows = [tuple(r) for r in cur.fetchall()]
+        return [{"rank": offset + i + 1, "user_id": user_id, "username": username, "points": points}
+                for i, (user_id, username, points) in enumerate(rows)]
+
+    def user_rank(self, user_id, period=ALL_TIME, category=None):
+        # Önündeki kullanıcılar indeks üzerinde sayılır; bu dönemde puanı yoksa None
+        with self._reader() as conn:
+            cur = conn.cursor()
+            if period == ALL_TIME and not category:
+                cur.execute("SELECT total_points FROM users WHERE id = ?", (user_id,))
+                row = cur.fetchone()
+                if row is None:
+                    return None
+                points = row[0]
+                cur.execute("""SELECT (SELECT COUNT(*) FROM users WHERE total_points > ?)
+                                    + (SELECT COUNT(*) FROM users WHERE total_points = ? AND id < ?)""",
+                            (points, points, user_id))
+            else:
+                key = (period, category or "")
+                cur.execute("SELECT points FROM period_points WHERE period = ? AND category = ? AND user_id = ?",
+                            key + (user_id,))
+                row = cur.fetchone()
+                if row is None:
+                    return None
+                points = row[0]
+                cur.execute("""SELECT (SELECT COUNT(*) FROM period_points
+                                       WHERE period = ? AND category = ? AND points > ?)
+                                    + (SELECT COUNT(*) FROM period_points
+                                       WHERE period = ? AND category = ? AND points = ? AND user_id < ?)""",
+                            key + (points,) + key + (points, user_id))
+            return {"rank": cur.fetchone()[0] + 1, "points": points}
+
+    def leaderboard_around(self, user_id, period=ALL_TIME, category=None, span=2):
+        # Kullanıcı ve üstündeki/altındaki span kişi
+        me = self.user_rank(user_id, period, category)
+        if me is None:
+            return []
+        offset = max(me["rank"] - 1 - span, 0)
+        return self.leaderboard(period, category, limit=me["rank"] - offset + span, offset=offset)
+
+    def _load_top_points(self, k):
+        with self._reader() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT id, total_points FROM users ORDER BY total_points DESC, id LIMIT ?", (k,))
+            return [tuple(r) for r in cur.fetchall()]
+
+    def _usernames(self, user_ids):
+        if not user_ids:
+            return {}
+        with self._reader() as conn:
+            cur = conn.cursor()
+            cur.execute(f"SELECT id, username FROM users WHERE id IN ({','.join('?' * len(user_ids))})", user_ids)
+            return {r["id"]: r["username"] for r in cur.fetchall()}
+
+    # ---------------------------
+    # Export / import
+    # ---------------------------
+    def export_counts(self, user_id=None):
+        with self._reader() as conn:
+            cur = conn.cursor()
+            if user_id is None:
+                cur.execute("""SELECT (SELECT COUNT(*) FROM users), (SELECT COUNT(*) FROM habits),
+                                      (SELECT COUNT(*) FROM completions)
+                                      + (SELECT COALESCE(SUM(count), 0) FROM completion_archive)""")
+            else:
+                cur.execute("""SELECT 1, (SELECT COUNT(*) FROM habits WHERE user_id = ?),
+                                      (SELECT COUNT(*) FROM completions c JOIN habits h ON h.id = c.habit_id
+                                       WHERE h.user_id = ?)
+                                      + (SELECT COALESCE(SUM(a.count), 0)
+                                         FROM completion_archive a JOIN habits h ON h.id = a.habit_id
+                                         WHERE h.user_id = ?)""", (user_id, user_id, user_id))
+            return tuple(cur.fetchone())
+
+    def export_rows(self, user_id=None, batch=500):
+        # Kayıtları tek okuma transaction'ı içinde, parça parça üretir; bellek kullanımı sabittir
+        with self._reader() as conn:
+            began = not conn.in_transaction
+            if began:
+                conn.execute("BEGIN")
+            try:
+                cur = conn.cursor()
+                for kind, sql, condition in EXPORT_QUERIES:
+                    if user_id is None:
+                        cur.execute(sql.format(where=""))
+                    else:
+                        cur.execute(sql.format(where=f"WHERE {condition}"), (user_id,))
+                    while True:
+                        rows = cur.fetchmany(batch)
+                        if not rows:
+                            break
+                        for row in rows:
+                            yield {"type": kind, **dict(row)}
+            finally:
+                if began:
+                    conn.rollback()
+
+    def import_records(self, records, state, user_id=None, on_conflict="merge"):
+        # records: doğrulanmış kayıtlar (bkz. transfer.py), tek transaction'da yazılır.
+        # state: parçalar arasında taşınan e-posta -> kullanıcı, (e-posta, ad) -> alışkanlık eşlemeleri.
+        # user_id verilirse tüm alışkanlıklar bu kullanıcıya aktarılır, kullanıcı kayıtları yok sayılır.
+        result = {"users": 0, "habits": 0, "renamed": 0, "skipped": 0, "completions": 0, "errors": []}
+        users = state.setdefault("users", {})
+        habits = state.setdefault("habits", {})
+        with self._atomic("import") as cur:
+            new_users = [r for r in records if r["type"] == "user" and user_id is None and r["email"] not in users]
+            if new_users:
+                cur.executemany("INSERT OR IGNORE INTO users (username, email, password_hash) VALUES (?, ?, ?)",
+                                [(r["username"], r["email"], r["password_hash"]) for r in new_users])
+                result["users"] += max(cur.rowcount, 0)
+                for r in new_users:
+                    if self._import_user(cur, r["email"], users, user_id) is None:
+                        result["errors"].append(f"{r['email']}: kullanıcı adı '{r['username']}' başka bir hesapta kullanılıyor")
+
+            for r in records:
+                if r["type"] != "habit" or (r["email"], r["name"]) in habits:
+                    continue
+                owner = self._import_user(cur, r["email"], users, user_id)
+                if owner is None:
+                    habits[(r["email"], r["name"])] = None
+                    result["errors"].append(f"{r['email']}: kullanıcı bulunamadı, '{r['name']}' atlandı")
+                    continue
+                cur.execute("SELECT id FROM habits INDEXED BY idx_habits_name_key WHERE user_id = ? AND tr_fold(name) = ?",
+                            (owner, fold(r["name"])))
+                existing = cur.fetchone()
+                name = r["name"]
+                if existing is not None:
+                    if on_conflict == "merge":
+                        habits[(r["email"], r["name"])] = existing["id"]
+                        continue
+                    if on_conflict == "skip":
+                        habits[(r["email"], r["name"])] = None
+                        result["skipped"] += 1
+                        continue
+                    name = self._free_habit_name(cur, owner, name)
+                    result["renamed"] += 1
+                cur.execute("""INSERT INTO habits (user_id, name, category, frequency, created_at)
+                               VALUES (?, ?, ?, ?, ?)""",
+                            (owner, name, r["category"], r["frequency"], r["created_at"] or datetime.date.today()))
+                habits[(r["email"], r["name"])] = cur.lastrowid
+                result["habits"] += 1
+
+            pairs = []
+            for r in records:
+                if r["type"] != "completion":
+                    continue
+                key = (r["email"], r["name"])
+                if key not in habits:
+                    # Dosyada tanımlanmamış alışkanlık: veritabanında aynı adla varsa ona eklenir
+                    owner = self._import_user(cur, r["email"], users, user_id)
+                    row = None
+                    if owner is not None:
+                        cur.execute("SELECT id FROM habits INDEXED BY idx_habits_name_key WHERE user_id = ? AND tr_fold(name) = ?",
+                                    (owner, fold(r["name"])))
+                        row = cur.fetchone()
+                    habits[key] = row["id"] if row else None
+                    if row is None:
+                        result["errors"].append(f"{r['email']}: '{r['name']}' alışkanlığı bulunamadı")
+                if habits[key] is not None:
+                    pairs.append((habits[key], to_day(r["date"])))
+            if pairs:
+                archived = self._archived_pairs(cur, pairs)
+                cur.executemany("INSERT OR IGNORE INTO completions (habit_id, date) VALUES (?, ?)",
+                                [pair for pair in pairs if pair not in archived])
+                result["completions"] += max(cur.rowcount, 0)
+                touched = {habit_id for habit_id, _ in pairs}
+                for habit_id in touched:
+                    self.recompute_streak(habit_id)
+                # Puan = tamamlama sayısı; etkilenen kullanıcılar için baştan hesaplanır
+                self.fix_points(set(self._habit_owners(touched).values()))
+        return result
+
+    def _import_user(self, cur, email, users, user_id):
+        if user_id is not None:
+            return user_id
+        if email not in users:
+            cur.execute("SELECT id FROM users WHERE email = ?", (email,))
+            row = cur.fetchone()
+            users[email] = row["id"] if row else None
+        return users[email]
+
+    def _free_habit_name(self, cur, user_id, name):
+        n = 2
+        while True:
+            candidate = f"{name} ({n})"
+            cur.execute("SELECT 1 FROM habits INDEXED BY idx_habits_name_key WHERE user_id = ? AND tr_fold(name) = ?",
+                        (user_id, fold(candidate)))
+            if cur.fetchone() is None:
+                return candidate
+            n += 1
+
+    # ---------------------------
+    # Streak methods
+    # ---------------------------
+    def streak_for_habit(self, habit_id):
+        row = self._load_streak(habit_id)
+        if row is None and self._habit_frequency(habit_id) is not None:
+            # Eski veritabanlarında seri kaydı yoksa bir kez hesaplanır
+            with self._atomic("streak"):
+                self.recompute_streak(habit_id)
+                row = self._load_streak(habit_id)
+        return row
+
+    def recompute_streak(self, habit_id):
+        with self._atomic("streak"):
+            frequency = self._habit_frequency(habit_id)
+            current, longest, last_date = compute_streaks(self.completions_for_habit(habit_id), frequency)
+            self._save_streak(habit_id, current, longest, last_date)
+
+    def _habit_frequency(self, habit_id):
+        with self._reader() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT frequency FROM habits WHERE id = ?", (habit_id,))
+            row = cur.fetchone()
+            return row["frequency"] if row else None
+
+    def _load_streak(self, habit_id):
+        with self._reader() as conn:
+            cur = conn.cursor()
+            cur.execute("""SELECT s.current_streak, s.longest_streak, s.last_date, h.frequency
+                           FROM habit_streaks s JOIN habits h ON h.id = s.habit_id
+                           WHERE s.habit_id = ?""", (habit_id,))
+            return cur.fetchone()
+
+    def _save_streak(self, habit_id, current, longest, last_date):
+        cur = self.conn.cursor()
+        cur.execute("""INSERT OR REPLACE INTO habit_streaks
+                       (habit_id, current_streak, longest_streak, last_date)
+                       VALUES (?, ?, ?, ?)""", (habit_id, current, longest, last_date))
+
+    def _streak_on_insert(self, habit_id, date_):
+        row = self._load_streak(habit_id)
+        if row is None or row["last_date"] is None:
+            self.recompute_streak(habit_id)
+            return
+        date_ = to_day(date_)
+        last_date = row["last_date"]
+        p = period_index(date_, row["frequency"])
+        last_p = period_index(last_date, row["frequency"])
+        if p > last_p:
+            current = row["current_streak"] + 1 if p == last_p + 1 else 1
+            longest = max(row["longest_streak"], current)
+            self._save_streak(habit_id, current, longest, date_)
+        elif p == last_p:
+            if date_ > last_date:
+                self._save_streak(habit_id, row["current_streak"], row["longest_streak"], date_)
+        else:
+            # Geçmişe eklenen kayıt iki seriyi birleştirebilir
+            self.recompute_streak(habit_id)
+
+    def _streak_on_delete(self, habit_id, date_):
+        row = self._load_streak(habit_id)
+        if row is None or row["last_date"] is None:
+            self.recompute_streak(habit_id)
+            return
+        frequency = row["frequency"]
+        last_p = period_index(row["last_date"], frequency)
+        if period_index(to_day(date_), frequency) != last_p:
+            # Geçmişten silme -> tam yeniden hesaplama
+            self.recompute_streak(habit_id)
+            return
         cur = self.conn.cursor()
-        cur.execute("SELECT date FROM completions WHERE habit_id = ? ORDER BY date", (habit_id,))
-        return [r["date"] for r in cur.fetchall()]
-    
-    
+        cur.execute("""SELECT MAX(d) AS last FROM (
+                           SELECT MAX(date) AS d FROM completions WHERE habit_id = ?
+                           UNION ALL
+                           SELECT * FROM (SELECT year_start(year) + bitmap_last(bits) FROM completion_archive
+                                          WHERE habit_id = ? ORDER BY year DESC LIMIT 1))""", (habit_id, habit_id))
+        remaining = cur.fetchone()["last"]
+        current, longest = row["current_streak"], row["longest_streak"]
+        if remaining is None:
+            self._save_streak(habit_id, 0, 0, None)
+        elif period_index(remaining, frequency) == last_p:
+            self._save_streak(habit_id, current, longest, remaining)
+        elif current > 1 and current < longest and period_index(remaining, frequency) == last_p - 1:
+            self._save_streak(habit_id, current - 1, longest, remaining)
+        else:
+            # En uzun seri bu seriye ait olabilir
+            self.recompute_streak(habit_id)
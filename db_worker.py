@@ -0,0 +1,135 @@
+from PyQt5 import QtCore
+from collections import deque
+import itertools
+import threading
+import backup
+from cache import CachedDatabase
+from database import Database
+
+
+class DatabaseWorker(QtCore.QThread):
+    # request_id, sonuç, hata
+    request_done = QtCore.pyqtSignal(int, object, object)
+
+    def __init__(self, db_file, write_behind=None, parent=None):
+        super().__init__(parent)
+        self.db_file = db_file
+        self.write_behind = write_behind
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._stopping = False
+
+    def enqueue(self, request_id, func, args, coalesce=None):
+        with self._cond:
+            if coalesce is not None:
+                for i, pending in enumerate(self._queue):
+                    if pending[3] == coalesce:
+                        # Kuyruktaki eski istek en yenisiyle değiştirilir
+                        self._queue[i] = (pending[0], func, args, coalesce)
+                        return pending[0]
+            self._queue.append((request_id, func, args, coalesce))
+            self._cond.notify()
+        return request_id
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+
+    def run(self):
+        # Bağlantı bu thread'de açılır ve yalnızca burada kullanılır
+        db = CachedDatabase(Database(self.db_file, write_behind=self.write_behind))
+        try:
+            while True:
+                with self._cond:
+                    while not self._queue and not self._stopping:
+                        if not db.has_pending_writes:
+                            self._cond.wait()
+                        elif not self._cond.wait(db.write_behind):
+                            break
+                    request = self._queue.popleft() if self._queue else None
+                if request is None:
+                    if self._stopping:
+                        break
+                    # Kuyruk boşaldı, bekleyen yazmalar diske yazılır
+                    db.flush()
+                    continue
+                request_id, func, args, _ = request
+                try:
+                    result, error = func(db, *args), None
+                except Exception as e:
+                    result, error = None, e
+                self.request_done.emit(request_id, result, error)
+        finally:
+            db.close()
+
+
+class BackupWorker(QtCore.QThread):
+    # Çevrimiçi yedek ayrı thread'de; DatabaseWorker kuyruğu yedek boyunca beklemez
+    done = QtCore.pyqtSignal(object, object)  # günlük kaydı, hata
+
+    def __init__(self, db, parent=None):
+        super().__init__(parent)
+        # db: DatabaseWorker'ın Database nesnesi (yazıcı bağlantısı kaynak olarak kullanılır)
+        self.db = db
+        self.cancel = threading.Event()
+
+    def run(self):
+        try:
+            entry, error = backup.create_backup(self.db, cancel=self.cancel), None
+        except Exception as e:
+            entry, error = None, e
+        self.done.emit(entry, error)
+
+
+class Progress(QtCore.QObject):
+    # Worker'dan arayüze ilerleme bildirimi; sinyal kuyruklu bağlantıyla UI thread'ine geçer
+    progressed = QtCore.pyqtSignal(int, int)
+
+    def report(self, done, total):
+        self.progressed.emit(done, total)
+
+
+class AsyncDatabase(QtCore.QObject):
+    busy_changed = QtCore.pyqtSignal(bool)
+    failed = QtCore.pyqtSignal(object)
+
+    def __init__(self, db_file, parent=None, write_behind=None):
+        super().__init__(parent)
+        self._ids = itertools.count(1)
+        self._callbacks = {}
+        self._worker = DatabaseWorker(db_file, write_behind)
+        self._worker.request_done.connect(self._on_request_done)
+        self._worker.start()
+
+    @property
+    def busy(self):
+        return bool(self._callbacks)
+
+    def call(self, method, *args, callback=None, coalesce=None):
+        return self.run(lambda db, *a: getattr(db, method)(*a), *args,
+                        callback=callback, coalesce=coalesce)
+
+    def run(self, func, *args, callback=None, coalesce=None):
+        was_busy = self.busy
+        request_id = self._worker.enqueue(next(self._ids), func, args, coalesce)
+        self._callbacks.setdefault(request_id, []).append(callback)
+        if not was_busy:
+            self.busy_changed.emit(True)
+        return request_id
+
+    def close(self):
+        # Kuyrukta bekleyen yazmalar tamamlanmadan çıkılmaz
+        self._worker.stop()
+        self._worker.wait()
+
+    def _on_request_done(self, request_id, result, error):
+        callbacks = self._callbacks.pop(request_id, [])
+        if error is not None:
+            self.failed.emit(error)
+        else:
+            for callback in callbacks:
+                if callback is not None:
+                    callback(result)
+        if not self._callbacks:
+            self.busy_changed.emit(False)
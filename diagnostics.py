@@ -0,0 +1,118 @@
+from PyQt5 import QtWidgets, QtCore
+from instrumentation import Instrumentation
+
+
+class DiagnosticsDock(QtWidgets.QDockWidget):
+    REFRESH_MS = 1000
+
+    def __init__(self, adb, parent=None):
+        super().__init__("Tanılama", parent)
+        self.setObjectName("diagnostics_dock")
+        self.adb = adb
+        self.instrumentation = Instrumentation()
+        self.setup_ui()
+        self.timer = QtCore.QTimer(self)
+        self.timer.setInterval(self.REFRESH_MS)
+        self.timer.timeout.connect(self.refresh)
+
+    def setup_ui(self):
+        widget = QtWidgets.QWidget()
+        layout = QtWidgets.QVBoxLayout(widget)
+
+        controls = QtWidgets.QHBoxLayout()
+        self.enable_check = QtWidgets.QCheckBox("Ölçümü etkinleştir")
+        self.slow_spin = QtWidgets.QDoubleSpinBox()
+        self.slow_spin.setRange(0.1, 10000.0)
+        self.slow_spin.setValue(self.instrumentation.slow_ms)
+        self.slow_spin.setSuffix(" ms")
+        self.reset_btn = QtWidgets.QPushButton("Sıfırla")
+        self.export_btn = QtWidgets.QPushButton("JSON'a Aktar")
+        controls.addWidget(self.enable_check)
+        controls.addWidget(QtWidgets.QLabel("Yavaş eşik:"))
+        controls.addWidget(self.slow_spin)
+        controls.addStretch()
+        controls.addWidget(self.reset_btn)
+        controls.addWidget(self.export_btn)
+        layout.addLayout(controls)
+
+        self.summary_label = QtWidgets.QLabel("Ölçüm kapalı.")
+        layout.addWidget(self.summary_label)
+
+        tabs = QtWidgets.QTabWidget()
+        self.methods_table = self._make_table(["Metot", "Sayı", "p50 (ms)", "p95 (ms)", "Maks (ms)", "Toplam (ms)"])
+        self.sql_table = self._make_table(["SQL", "Sayı", "p50 (ms)", "p95 (ms)", "Maks (ms)", "Toplam (ms)"])
+        self.slow_list = QtWidgets.QListWidget()
+        tabs.addTab(self.methods_table, "Metotlar")
+        tabs.addTab(self.sql_table, "SQL")
+        tabs.addTab(self.slow_list, "Yavaş Sorgular")
+        layout.addWidget(tabs)
+        self.setWidget(widget)
+
+        self.enable_check.toggled.connect(self.set_enabled)
+        self.slow_spin.valueChanged.connect(self.on_slow_changed)
+        self.reset_btn.clicked.connect(self.on_reset)
+        self.export_btn.clicked.connect(self.on_export)
+
+    @staticmethod
+    def _make_table(headers):
+        table = QtWidgets.QTableWidget(0, len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        table.horizontalHeader().setSectionResizeMode(0, QtWidgets.QHeaderView.Stretch)
+        return table
+
+    # ---------------------------
+    # Actions
+    # ---------------------------
+    def set_enabled(self, on):
+        instrumentation = self.instrumentation
+        # Sarmalama, veritabanının sahibi olan worker thread'de yapılır
+        if on:
+            self.adb.run(lambda db: instrumentation.install(getattr(db, "db", db)))
+            self.timer.start()
+        else:
+            self.adb.run(lambda db: instrumentation.uninstall(getattr(db, "db", db)))
+            self.timer.stop()
+        self.refresh()
+
+    def on_slow_changed(self, value):
+        self.instrumentation.slow_ms = value
+
+    def on_reset(self):
+        self.instrumentation.reset()
+        self.refresh()
+
+    def on_export(self):
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Tanılama verisini kaydet",
+                                                        "diagnostics.json", "JSON (*.json)")
+        if path:
+            self.instrumentation.export_json(path)
+
+    # ---------------------------
+    # Rendering
+    # ---------------------------
+    def refresh(self):
+        snap = self.instrumentation.snapshot()
+        if not snap["enabled"] and not snap["methods"]:
+            self.summary_label.setText("Ölçüm kapalı.")
+        else:
+            waits = sum(c["lock_waits"] for c in snap["connections"])
+            retries = sum(c["busy_retries"] for c in snap["connections"])
+            self.summary_label.setText(
+                f"Commit: {snap['commits']}  |  Yavaş sorgu: {len(snap['slow_queries'])}  |  "
+                f"Kilit bekleme: {waits}  |  BUSY tekrar: {retries}")
+        self._fill(self.methods_table, snap["methods"])
+        self._fill(self.sql_table, snap["statements"])
+        self.slow_list.clear()
+        for q in reversed(snap["slow_queries"]):
+            self.slow_list.addItem(f"{q['ms']:.1f} ms  {q['sql']}")
+
+    @staticmethod
+    def _fill(table, summaries):
+        rows = sorted(summaries.items(), key=lambda kv: kv[1]["total_ms"], reverse=True)
+        table.setRowCount(len(rows))
+        for r, (name, s) in enumerate(rows):
+            values = [name, str(s["count"]), f"{s['p50_ms']:.2f}", f"{s['p95_ms']:.2f}",
+                      f"{s['max_ms']:.2f}", f"{s['total_ms']:.1f}"]
+            for c, value in enumerate(values):
+                table.setItem(r, c, QtWidgets.QTableWidgetItem(value))
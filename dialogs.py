@@ -1,5 +1,20 @@
-from PyQt5 import QtWidgets
-from utils import hash_password
+from PyQt5 import QtCore, QtWidgets
+import passwords
+
+
+class PasswordTask(QtCore.QObject):
+    # Parola özeti passwords havuzunda hesaplanır, sonuç kuyruklu sinyalle arayüz thread'ine döner
+    finished = QtCore.pyqtSignal(object, object)  # sonuç, hata
+
+    def __init__(self, func, *args, callback, parent=None):
+        super().__init__(parent)
+        # Önbellekten dönen doğrulama submit'ten hemen sonra bitebilir; bağlantı önce kurulur
+        self.finished.connect(callback)
+        self.finished.connect(self.deleteLater)
+        future = passwords.executor().submit(func, *args)
+        future.add_done_callback(lambda f: self.finished.emit(
+            None if f.exception() else f.result(), f.exception()))
+
 
 class RegisterDialog(QtWidgets.QDialog):
     def __init__(self, db, parent=None):
@@ -50,7 +65,20 @@ class RegisterDialog(QtWidgets.QDialog):
         if pw != pw2:
             self.msg_label.setText("Şifreler eşleşmiyor.")
             return
-        phash = hash_password(pw)
+        self.set_busy(True)
+        PasswordTask(passwords.hash_password, pw, parent=self,
+                     callback=lambda phash, error: self.on_hashed(username, email, phash, error))
+
+    def set_busy(self, busy):
+        self.register_btn.setEnabled(not busy)
+        if busy:
+            self.msg_label.setText("Kaydediliyor...")
+
+    def on_hashed(self, username, email, phash, error):
+        self.set_busy(False)
+        if error is not None:
+            self.msg_label.setText(f"Şifre işlenemedi: {error}")
+            return
         user_id = self.db.create_user(username, email, phash)
         if user_id is None:
             self.msg_label.setText("E-posta veya kullanıcı adı zaten kayıtlı.")
@@ -104,9 +132,27 @@ class LoginDialog(QtWidgets.QDialog):
         if not user:
             self.msg_label.setText("Kayıtlı kullanıcı bulunamadı.")
             return
-        if user["password_hash"] != hash_password(pw):
+        self.set_busy(True)
+        PasswordTask(passwords.check, pw, user.password_hash, parent=self,
+                     callback=lambda result, error: self.on_verified(user, result, error))
+
+    def set_busy(self, busy):
+        self.login_btn.setEnabled(not busy)
+        self.register_btn.setEnabled(not busy)
+        self.msg_label.setText("Doğrulanıyor..." if busy else "")
+
+    def on_verified(self, user, result, error):
+        self.set_busy(False)
+        if error is not None:
+            self.msg_label.setText(f"Şifre doğrulanamadı: {error}")
+            return
+        ok, new_hash = result
+        if not ok:
             self.msg_label.setText("Hatalı şifre.")
             return
+        if new_hash is not None:
+            # Eski SHA-256 ya da düşük maliyetli özet, doğru parola elimizdeyken yenilenir
+            self.db.set_password_hash(user.id, new_hash)
         self.user = user
         self.accept()
 
@@ -0,0 +1,165 @@
+from PyQt5 import QtCore
+
+
+class HabitTableModel(QtCore.QAbstractTableModel):
+    HEADERS = ["ID", "Alışkanlık", "Kategori", "Sıklık"]
+    FETCH_BATCH = 256
+
+    def __init__(self, db, user_id, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.user_id = user_id
+        # Her alışkanlık tek bir (id, ad, kategori, sıklık) tuple'ı olarak tutulur
+        self._rows = []
+        self._row_of = {}
+        self._has_more = True
+        self._fetching = False
+        # Sayfalama imleci; arama sonuçları sayfaların ötesinden satır ekleyebildiği için ayrı tutulur
+        self._last_page_id = 0
+        # reload() sonrası gelen eski sayfalar yok sayılır
+        self._generation = 0
+
+    # ---------------------------
+    # Qt model interface
+    # ---------------------------
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._rows[index.row()]
+        if role == QtCore.Qt.DisplayRole:
+            return row[index.column()]
+        if role == QtCore.Qt.UserRole:
+            return row[0]
+        return None
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def canFetchMore(self, parent=QtCore.QModelIndex()):
+        return not parent.isValid() and self._has_more
+
+    def fetchMore(self, parent=QtCore.QModelIndex()):
+        if parent.isValid() or self._fetching:
+            return
+        self._fetching = True
+        self.db.call("list_habits_page", self.user_id, self._last_page_id, self.FETCH_BATCH,
+                     callback=lambda batch, gen=self._generation: self._on_page(batch, gen))
+
+    def _on_page(self, batch, generation):
+        if generation != self._generation:
+            return
+        self._fetching = False
+        if len(batch) < self.FETCH_BATCH:
+            self._has_more = False
+        if batch:
+            self._last_page_id = batch[-1].id
+        self.add_habits(batch)
+
+    # ---------------------------
+    # Row store
+    # ---------------------------
+    def reload(self):
+        self.beginResetModel()
+        self._rows = []
+        self._row_of = {}
+        self._has_more = True
+        self._fetching = False
+        self._last_page_id = 0
+        self._generation += 1
+        self.endResetModel()
+
+    def habit_id_at(self, row):
+        return self._rows[row][0]
+
+    def row_for_habit(self, habit_id):
+        return self._row_of.get(habit_id)
+
+    def upsert_habit(self, habit):
+        habit_id = habit.id
+        row = self._row_of.get(habit_id)
+        if row is not None:
+            self._rows[row] = self._pack(habit)
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.HEADERS) - 1))
+            return
+        if self._has_more and habit_id > self._last_page_id:
+            # Henüz yüklenmemiş bölgede, fetchMore ile gelecek
+            return
+        row = len(self._rows)
+        self.beginInsertRows(QtCore.QModelIndex(), row, row)
+        self._row_of[habit_id] = row
+        self._rows.append(self._pack(habit))
+        self.endInsertRows()
+
+    def add_habits(self, habits):
+        # Henüz yüklenmemiş alışkanlıkları sona ekler (sayfalar ve arama sonuçları)
+        habits = [h for h in habits if h.id not in self._row_of]
+        if not habits:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QtCore.QModelIndex(), first, first + len(habits) - 1)
+        for h in habits:
+            self._row_of[h.id] = len(self._rows)
+            self._rows.append(self._pack(h))
+        self.endInsertRows()
+
+    def remove_habit(self, habit_id):
+        row = self._row_of.pop(habit_id, None)
+        if row is None:
+            return
+        self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+        del self._rows[row]
+        for i in range(row, len(self._rows)):
+            self._row_of[self._rows[i][0]] = i
+        self.endRemoveRows()
+
+    @staticmethod
+    def _pack(habit):
+        # habit: records.Habit
+        return (habit.id, habit.name, habit.category, habit.frequency)
+
+
+class HabitFilterProxyModel(QtCore.QSortFilterProxyModel):
+    CATEGORY_COLUMN = 2
+    FREQUENCY_COLUMN = 3
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.category = None
+        self.frequency = None
+        # Arama sonucu alışkanlık id'leri; None ise arama yok
+        self.ids = None
+
+    def set_category(self, category):
+        self.category = category or None
+        self.invalidateFilter()
+
+    def set_frequency(self, frequency):
+        self.frequency = frequency or None
+        self.invalidateFilter()
+
+    def set_ids(self, ids):
+        self.ids = ids
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        model = self.sourceModel()
+        if self.ids is not None:
+            if model.index(source_row, 0, source_parent).data() not in self.ids:
+                return False
+        if self.category is not None:
+            value = model.index(source_row, self.CATEGORY_COLUMN, source_parent).data()
+            if value != self.category:
+                return False
+        if self.frequency is not None:
+            value = model.index(source_row, self.FREQUENCY_COLUMN, source_parent).data()
+            if value != self.frequency:
+                return False
+        return True
@@ -0,0 +1,166 @@
+from collections import defaultdict, deque
+import functools
+import json
+import re
+import threading
+import time
+
+# Histogram kovaları (ms)
+BUCKETS = [0.1, 0.5, 1, 5, 10, 50, 100, 500]
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_sql(sql):
+    # Parametreleri açılmış SQL'i gruplanabilir biçime getirir
+    return _SPACES.sub(" ", _LITERALS.sub("?", sql)).strip()
+
+
+class RollingHistogram:
+    def __init__(self, window=512):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total_ms = 0.0
+
+    def add(self, ms):
+        self.samples.append(ms)
+        self.count += 1
+        self.total_ms += ms
+
+    def summary(self):
+        ordered = sorted(self.samples)
+        buckets = [0] * (len(BUCKETS) + 1)
+        for ms in ordered:
+            for i, limit in enumerate(BUCKETS):
+                if ms < limit:
+                    buckets[i] += 1
+                    break
+            else:
+                buckets[-1] += 1
+
+        def pct(p):
+            return ordered[min(len(ordered) - 1, int(len(ordered) * p))] if ordered else 0.0
+
+        return {
+            "count": self.count,
+            "total_ms": self.total_ms,
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "max_ms": ordered[-1] if ordered else 0.0,
+            "buckets": dict(zip([f"<{b}ms" for b in BUCKETS] + [f">={BUCKETS[-1]}ms"], buckets)),
+        }
+
+
+class Instrumentation:
+    # install() edilmediği sürece Database'e hiçbir ek yük bindirmez
+
+    def __init__(self, slow_ms=50.0, window=512):
+        self.slow_ms = slow_ms
+        self.window = window
+        self.methods = defaultdict(lambda: RollingHistogram(self.window))
+        self.statements = defaultdict(lambda: RollingHistogram(self.window))
+        self.slow_queries = deque(maxlen=100)
+        self.commits = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._installed = []
+
+    @property
+    def enabled(self):
+        return bool(self._installed)
+
+    def reset(self):
+        with self._lock:
+            self.methods.clear()
+            self.statements.clear()
+            self.slow_queries.clear()
+            self.commits = 0
+
+    # ---------------------------
+    # Install / uninstall
+    # ---------------------------
+    def install(self, db):
+        if db in self._installed:
+            return
+        for name in dir(type(db)):
+            attr = getattr(type(db), name)
+            if name.startswith("_") or not callable(attr):
+                continue
+            setattr(db, name, self._wrap(name, getattr(db, name)))
+        db.connections.add_connect_hook(self._attach)
+        self._installed.append(db)
+
+    def uninstall(self, db):
+        if db not in self._installed:
+            return
+        for name in list(vars(db)):
+            if callable(vars(db)[name]) and hasattr(vars(db)[name], "__wrapped__"):
+                delattr(db, name)
+        db.connections.remove_connect_hook(self._attach)
+        for conn in db.connections.connections():
+            conn.set_trace_callback(None)
+        self._installed.remove(db)
+
+    def _attach(self, conn):
+        conn.set_trace_callback(self._on_statement)
+
+    # ---------------------------
+    # Recording
+    # ---------------------------
+    def _wrap(self, name, method):
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                now = time.perf_counter()
+                self._close_statement(now)
+                self._record(self.methods, name, (now - started) * 1000.0)
+        return timed
+
+    def _on_statement(self, sql):
+        # Trace callback yalnızca başlangıcı bildirir; süre bir sonraki ifadeye kadar ölçülür
+        now = time.perf_counter()
+        self._close_statement(now)
+        statement = normalize_sql(sql)
+        if statement.upper().startswith("COMMIT"):
+            with self._lock:
+                self.commits += 1
+        self._local.pending = (statement, now)
+
+    def _close_statement(self, now):
+        pending = getattr(self._local, "pending", None)
+        if pending is None:
+            return
+        self._local.pending = None
+        statement, started = pending
+        ms = (now - started) * 1000.0
+        self._record(self.statements, statement, ms)
+        if ms >= self.slow_ms:
+            with self._lock:
+                self.slow_queries.append({"sql": statement, "ms": ms, "at": time.time()})
+
+    def _record(self, table, key, ms):
+        with self._lock:
+            table[key].add(ms)
+
+    # ---------------------------
+    # Reporting
+    # ---------------------------
+    def snapshot(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "slow_ms": self.slow_ms,
+                "commits": self.commits,
+                "methods": {name: h.summary() for name, h in self.methods.items()},
+                "statements": {sql: h.summary() for sql, h in self.statements.items()},
+                "slow_queries": list(self.slow_queries),
+                "connections": [db.connections.snapshot_stats() for db in self._installed],
+            }
+
+    def export_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2, ensure_ascii=False)
@@ -0,0 +1,73 @@
+import bisect
+import datetime
+import threading
+from streaks import to_date
+
+ALL_TIME = "all"
+WEEK = "week"
+MONTH = "month"
+WINDOWS = {ALL_TIME: "Tüm Zamanlar", WEEK: "Bu Hafta", MONTH: "Bu Ay"}
+
+
+def period_key(window, day=None):
+    # period_points.period değeri; SQL karşılığı migrations._period_keys'tedir
+    day = to_date(day) or datetime.date.today()
+    if window == WEEK:
+        return "W" + (day - datetime.timedelta(days=day.weekday())).isoformat()
+    if window == MONTH:
+        return f"M{day.year:04d}-{day.month:02d}"
+    return ALL_TIME
+
+
+class TopK:
+    # users.total_points'e göre ilk k kullanıcı; her puan değişikliğinde artımlı güncellenir.
+    # Listeden düşen kullanıcının yerini kimin alacağı bilinmiyorsa liste bir sonraki okumada yeniden yüklenir.
+
+    def __init__(self, k=100):
+        self.k = k
+        self.hits = 0
+        self.reloads = 0
+        self._keys = None  # (-puan, user_id), sıralı
+        self._complete = False  # kullanıcı sayısı k'dan az: herkes listede
+        self._lock = threading.Lock()
+
+    def get(self, load, limit):
+        # load(k) -> [(user_id, puan)], puana göre azalan
+        with self._lock:
+            if self._keys is None:
+                rows = load(self.k)
+                self._keys = [(-points, user_id) for user_id, points in rows]
+                self._complete = len(rows) < self.k
+                self.reloads += 1
+            else:
+                self.hits += 1
+            return [(user_id, -neg) for neg, user_id in self._keys[:limit]]
+
+    def update(self, user_id, points):
+        with self._lock:
+            keys = self._keys
+            if keys is None:
+                return
+            found = False
+            for i, (_, uid) in enumerate(keys):
+                if uid == user_id:
+                    del keys[i]
+                    found = True
+                    break
+            key = (-points, user_id)
+            if self._complete or (keys and key < keys[-1]):
+                bisect.insort(keys, key)
+                if len(keys) > self.k:
+                    keys.pop()
+                    self._complete = False
+            elif found:
+                self._keys = None
+
+    def invalidate(self):
+        with self._lock:
+            self._keys = None
+
+    def stats(self):
+        with self._lock:
+            return {"k": self.k, "hits": self.hits, "reloads": self.reloads,
+                    "loaded": self._keys is not None}
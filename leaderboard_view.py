@@ -0,0 +1,105 @@
+from PyQt5 import QtWidgets, QtGui
+from dialogs import HabitEditDialog
+from leaderboard import WINDOWS, period_key
+
+
+class LeaderboardView(QtWidgets.QWidget):
+    TOP = 10
+    SPAN = 2
+
+    def __init__(self, adb, user_id, parent=None):
+        super().__init__(parent)
+        self.adb = adb
+        self.user_id = user_id
+        self.stale = True
+        self.setup_ui()
+
+    def setup_ui(self):
+        layout = QtWidgets.QVBoxLayout(self)
+        controls = QtWidgets.QHBoxLayout()
+        self.window_combo = QtWidgets.QComboBox()
+        for window, label in WINDOWS.items():
+            self.window_combo.addItem(label, window)
+        self.category_combo = QtWidgets.QComboBox()
+        self.category_combo.addItem("Tüm Kategoriler", None)
+        for c in HabitEditDialog.CATEGORIES:
+            self.category_combo.addItem(c, c)
+        self.refresh_btn = QtWidgets.QPushButton("Yenile")
+        controls.addWidget(QtWidgets.QLabel("Dönem:"))
+        controls.addWidget(self.window_combo)
+        controls.addWidget(QtWidgets.QLabel("Kategori:"))
+        controls.addWidget(self.category_combo)
+        controls.addStretch()
+        controls.addWidget(self.refresh_btn)
+        layout.addLayout(controls)
+
+        layout.addWidget(QtWidgets.QLabel(f"İlk {self.TOP}"))
+        self.top_table = self._make_table()
+        layout.addWidget(self.top_table, 2)
+        self.rank_label = QtWidgets.QLabel("-")
+        layout.addWidget(self.rank_label)
+        self.around_table = self._make_table()
+        layout.addWidget(self.around_table, 1)
+
+        self.window_combo.currentIndexChanged.connect(self.refresh)
+        self.category_combo.currentIndexChanged.connect(self.refresh)
+        self.refresh_btn.clicked.connect(self.refresh)
+
+    @staticmethod
+    def _make_table():
+        table = QtWidgets.QTableWidget(0, 3)
+        table.setHorizontalHeaderLabels(["Sıra", "Kullanıcı", "Puan"])
+        table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        table.verticalHeader().hide()
+        table.horizontalHeader().setSectionResizeMode(1, QtWidgets.QHeaderView.Stretch)
+        return table
+
+    # ---------------------------
+    # Loading
+    # ---------------------------
+    def invalidate(self):
+        self.stale = True
+        if self.isVisible():
+            self.refresh()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.stale:
+            self.refresh()
+
+    def refresh(self):
+        self.stale = False
+        period = period_key(self.window_combo.currentData())
+        category = self.category_combo.currentData()
+        user_id, top, span = self.user_id, self.TOP, self.SPAN
+
+        def load(db):
+            return (db.leaderboard(period, category, limit=top),
+                    db.user_rank(user_id, period, category),
+                    db.leaderboard_around(user_id, period, category, span=span))
+
+        self.adb.run(load, callback=self.show_leaderboard, coalesce="leaderboard")
+
+    # ---------------------------
+    # Rendering
+    # ---------------------------
+    def show_leaderboard(self, result):
+        top, me, around = result
+        self._fill(self.top_table, top)
+        self._fill(self.around_table, around)
+        if me is None:
+            self.rank_label.setText("Bu dönemde henüz puanınız yok.")
+        else:
+            self.rank_label.setText(f"Sıralamanız: #{me['rank']} ({me['points']} puan)")
+
+    def _fill(self, table, rows):
+        table.setRowCount(len(rows))
+        bold = QtGui.QFont()
+        bold.setBold(True)
+        for r, row in enumerate(rows):
+            values = [str(row["rank"]), row["username"] or "-", str(row["points"])]
+            for c, value in enumerate(values):
+                item = QtWidgets.QTableWidgetItem(value)
+                if row["user_id"] == self.user_id:
+                    item.setFont(bold)
+                table.setItem(r, c, item)
@@ -1,18 +1,38 @@
 from PyQt5 import QtWidgets, QtCore, QtGui
 import datetime
 from dialogs import HabitEditDialog
-import sqlite3
+from calendar_view import CompletionHeatmap
+from habit_model import HabitTableModel, HabitFilterProxyModel
+from db_worker import AsyncDatabase, BackupWorker, Progress
+from streaks import PERIOD_UNITS, active_streak
+from scheduler import Scheduler, OVERDUE, DEADLINE, DONE, STATUS_LABELS
+import transfer
+import reconcile
+import backup
 
 class MainWindow(QtWidgets.QMainWindow):
     LEVEL_NAMES = ["Başlangıç", "Çaylak", "Usta", "Ustalaşmış", "Usta++"]
+    # Art arda yapılan tamamlamalar bu aralıkta tek commit'te toplanır (saniye)
+    WRITE_BEHIND = 0.5
+    # Hatırlatma zamanlayıcısı en fazla bu kadar ileri kurulur (saat değişikliklerine karşı, ms)
+    MAX_REMINDER_WAIT = 60 * 60 * 1000
+    # Arama kutusunda yazmayı bıraktıktan sonra sorgu gecikmesi (ms)
+    SEARCH_DELAY_MS = 200
+    # Otomatik yedek aralığı (saat) ve zamanın gelip gelmediğinin denetlenme sıklığı (ms)
+    BACKUP_INTERVAL_HOURS = 6
+    BACKUP_CHECK_MS = 10 * 60 * 1000
 
     def __init__(self, db, user_row):
         super().__init__()
         self.db = db
+        # Arayüz thread'i SQLite'a dokunmaz, tüm sorgular worker'da çalışır
+        self.adb = AsyncDatabase(db.db_file, self, write_behind=self.WRITE_BEHIND)
         self.user = user_row
         self.setWindowTitle(f"Habit Tracker - {self.user['username']}")
-        self.resize(900, 600)
+        self.resize(1000, 720)
         self.selected_habit_id = None
+        self.transfer_dialog = None
+        self.scheduler = Scheduler()
         self.setup_ui()
         self.refresh_habits()
         self.update_profile_panel()
@@ -38,16 +58,58 @@ class MainWindow(QtWidgets.QMainWindow):
         top_bar.addWidget(self.progress_bar)
         main_layout.addLayout(top_bar)
 
-        # Middle layout
+        # Tabs: habits page + reports
+        self.tabs = QtWidgets.QTabWidget()
+        main_layout.addWidget(self.tabs)
+        habits_page = QtWidgets.QWidget()
+        page_layout = QtWidgets.QVBoxLayout(habits_page)
         middle = QtWidgets.QHBoxLayout()
-        main_layout.addLayout(middle)
+        page_layout.addLayout(middle, 1)
+        self.tabs.addTab(habits_page, "Alışkanlıklar")
+        # İkincil sekmeler ilk açıldıklarında kurulur (Raporlar numpy'yi yükler)
+        self.reports_view = None
+        self.leaderboard_view = None
+        self._lazy_tabs = {}
+        self._add_lazy_tab("Raporlar", self._build_reports_view)
+        self._add_lazy_tab("Liderlik Tablosu", self._build_leaderboard_view)
+        self.tabs.currentChanged.connect(self.on_tab_changed)
 
         # Left: Habits table + controls
         left_layout = QtWidgets.QVBoxLayout()
-        self.habits_table = QtWidgets.QTableWidget(0, 4)
-        self.habits_table.setHorizontalHeaderLabels(["ID", "Alışkanlık", "Kategori", "Sıklık"])
+        self.search_edit = QtWidgets.QLineEdit()
+        self.search_edit.setPlaceholderText("Ara...")
+        self.search_edit.setClearButtonEnabled(True)
+        left_layout.addWidget(self.search_edit)
+        # Yazarken her tuşta değil, kısa bir duraksamadan sonra aranır
+        self.search_timer = QtCore.QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(self.SEARCH_DELAY_MS)
+        filters = QtWidgets.QHBoxLayout()
+        self.category_filter = QtWidgets.QComboBox()
+        self.category_filter.addItem("Tümü", None)
+        for c in HabitEditDialog.CATEGORIES:
+            self.category_filter.addItem(c, c)
+        self.frequency_filter = QtWidgets.QComboBox()
+        self.frequency_filter.addItem("Tümü", None)
+        for f in HabitEditDialog.FREQUENCIES:
+            self.frequency_filter.addItem(f, f)
+        filters.addWidget(QtWidgets.QLabel("Kategori:"))
+        filters.addWidget(self.category_filter)
+        filters.addWidget(QtWidgets.QLabel("Sıklık:"))
+        filters.addWidget(self.frequency_filter)
+        filters.addStretch()
+        left_layout.addLayout(filters)
+
+        self.habit_model = HabitTableModel(self.adb, self.user["id"], self)
+        self.habit_proxy = HabitFilterProxyModel(self)
+        self.habit_proxy.setSourceModel(self.habit_model)
+        self.habits_table = QtWidgets.QTableView()
+        self.habits_table.setModel(self.habit_proxy)
+        self.habits_table.setSortingEnabled(True)
+        self.habits_table.sortByColumn(0, QtCore.Qt.AscendingOrder)
         self.habits_table.horizontalHeader().setStretchLastSection(True)
         self.habits_table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.habits_table.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
         self.habits_table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
         self.habits_table.hideColumn(0)
         left_layout.addWidget(self.habits_table)
@@ -63,10 +125,26 @@ class MainWindow(QtWidgets.QMainWindow):
         controls.addWidget(self.mark_btn)
         left_layout.addLayout(controls)
 
+        bulk_controls = QtWidgets.QHBoxLayout()
+        self.range_btn = QtWidgets.QPushButton("Takvim Aralığını Tamamla")
+        self.range_btn.setToolTip("Haritada Shift ile tıklayarak bir tarih aralığı seçin.")
+        self.mark_selected_btn = QtWidgets.QPushButton("Seçili Alışkanlıkları Tamamla")
+        bulk_controls.addWidget(self.range_btn)
+        bulk_controls.addWidget(self.mark_selected_btn)
+        left_layout.addLayout(bulk_controls)
+
         middle.addLayout(left_layout, 2)
 
-        # Right: Details, Calendar, Badges
+        # Right: Details, Badges
         right_layout = QtWidgets.QVBoxLayout()
+        due_box = QtWidgets.QGroupBox("Bugün Yapılacaklar")
+        due_layout = QtWidgets.QVBoxLayout()
+        self.due_list = QtWidgets.QListWidget()
+        self.due_list.setMaximumHeight(120)
+        due_layout.addWidget(self.due_list)
+        due_box.setLayout(due_layout)
+        right_layout.addWidget(due_box)
+
         self.details_group = QtWidgets.QGroupBox("Alışkanlık Detayı")
         d_layout = QtWidgets.QVBoxLayout()
         self.detail_name = QtWidgets.QLabel("-")
@@ -78,10 +156,6 @@ class MainWindow(QtWidgets.QMainWindow):
         self.details_group.setLayout(d_layout)
         right_layout.addWidget(self.details_group)
 
-        self.calendar = QtWidgets.QCalendarWidget()
-        right_layout.addWidget(QtWidgets.QLabel("Tamamlanma Takvimi (seçili alışkanlık)"))
-        right_layout.addWidget(self.calendar)
-
         badges_box = QtWidgets.QGroupBox("Rozetler")
         b_layout = QtWidgets.QVBoxLayout()
         self.badges_list = QtWidgets.QLabel("-")
@@ -94,13 +168,60 @@ class MainWindow(QtWidgets.QMainWindow):
 
         middle.addLayout(right_layout, 1)
 
+        # Bottom: yıllık tamamlanma haritası (tam genişlik)
+        self.calendar = CompletionHeatmap(self.adb, self.user["id"])
+        page_layout.addWidget(self.calendar)
+
+        # Diagnostics (ilk açılışta kurulur)
+        self.diagnostics_dock = None
+        file_menu = self.menuBar().addMenu("Dosya")
+        file_menu.addAction("Dışa Aktar...", self.export_data)
+        file_menu.addAction("İçe Aktar...", self.import_data)
+        file_menu.addSeparator()
+        file_menu.addAction("Şimdi Yedekle", lambda: self.run_backup(manual=True))
+        view_menu = self.menuBar().addMenu("Görünüm")
+        self.diagnostics_action = view_menu.addAction("Tanılama")
+        self.diagnostics_action.setCheckable(True)
+        self.diagnostics_action.setShortcut("Ctrl+Shift+D")
+        self.diagnostics_action.toggled.connect(self.toggle_diagnostics)
+
+        # Busy state
+        self.busy_label = QtWidgets.QLabel("İşleniyor...")
+        self.busy_bar = QtWidgets.QProgressBar()
+        self.busy_bar.setRange(0, 0)
+        self.busy_bar.setMaximumWidth(120)
+        self.statusBar().addPermanentWidget(self.busy_label)
+        self.statusBar().addPermanentWidget(self.busy_bar)
+        self.on_busy_changed(False)
+
         # Signals
+        self.adb.busy_changed.connect(self.on_busy_changed)
+        self.adb.failed.connect(self.on_db_error)
         self.add_btn.clicked.connect(self.add_habit)
         self.edit_btn.clicked.connect(self.edit_habit)
         self.delete_btn.clicked.connect(self.delete_habit)
         self.mark_btn.clicked.connect(self.toggle_completion_today)
-        self.habits_table.itemSelectionChanged.connect(self.on_habit_selected)
+        self.range_btn.clicked.connect(self.complete_calendar_range)
+        self.mark_selected_btn.clicked.connect(self.complete_selected_habits)
+        self.habits_table.selectionModel().selectionChanged.connect(self.on_habit_selected)
+        self.category_filter.currentIndexChanged.connect(
+            lambda: self.habit_proxy.set_category(self.category_filter.currentData()))
+        self.frequency_filter.currentIndexChanged.connect(
+            lambda: self.habit_proxy.set_frequency(self.frequency_filter.currentData()))
+        self.search_edit.textChanged.connect(lambda: self.search_timer.start())
+        self.search_timer.timeout.connect(self.run_search)
         self.logout_btn.clicked.connect(self.on_logout)
+        self.due_list.itemDoubleClicked.connect(self.on_due_item_activated)
+        self.reminder_timer = QtCore.QTimer(self)
+        self.reminder_timer.setSingleShot(True)
+        self.reminder_timer.timeout.connect(self.on_reminder_timeout)
+        self.backup_worker = None
+        self.backup_timer = QtCore.QTimer(self)
+        self.backup_timer.setInterval(self.BACKUP_CHECK_MS)
+        self.backup_timer.timeout.connect(self.backup_if_due)
+        self.backup_timer.start()
+        # İlk denetim açılıştan kısa süre sonra, ilk çizimi ve ilk sorguları geciktirmeden
+        QtCore.QTimer.singleShot(60 * 1000, self.backup_if_due)
         self.calendar.clicked.connect(self.on_calendar_date_clicked)
         self.calendar.setLocale(QtCore.QLocale(
             QtCore.QLocale.Turkish,
@@ -111,16 +232,70 @@ class MainWindow(QtWidgets.QMainWindow):
     # Habits CRUD & Details
     # ---------------------------
     def refresh_habits(self):
-        self.habits = self.db.list_habits(self.user["id"])
-        self.habits_table.setRowCount(0)
-        for h in self.habits:
-            row = self.habits_table.rowCount()
-            self.habits_table.insertRow(row)
-            self.habits_table.setItem(row, 0, QtWidgets.QTableWidgetItem(str(h["id"])))
-            self.habits_table.setItem(row, 1, QtWidgets.QTableWidgetItem(h["name"]))
-            self.habits_table.setItem(row, 2, QtWidgets.QTableWidgetItem(h["category"]))
-            self.habits_table.setItem(row, 3, QtWidgets.QTableWidgetItem(h["frequency"]))
+        self.habit_model.reload()
         self.clear_details()
+        self.load_schedule()
+        # Arama sonucu eklenen satırlar reload ile silindi
+        self.run_search()
+
+    # ---------------------------
+    # Search
+    # ---------------------------
+    def run_search(self):
+        self.search_timer.stop()
+        text = self.search_edit.text().strip()
+        if not text:
+            self.habit_proxy.set_ids(None)
+            return
+        self.adb.call("search_habits", self.user["id"], text,
+                      callback=lambda habits: self.on_search_results(text, habits), coalesce="search")
+
+    def on_search_results(self, text, habits):
+        if text != self.search_edit.text().strip():
+            # Bu arada metin değişti; yeni arama zaten kuyrukta
+            return
+        # Sonuçlar henüz yüklenmemiş sayfalarda olabilir
+        self.habit_model.add_habits(habits)
+        self.habit_proxy.set_ids({h.id for h in habits})
+
+    def invalidate_views(self):
+        # Sekmeler görünür olduklarında yeniden hesaplanır; henüz kurulmamış olanlar zaten ilk açılışta yüklenir
+        for view in (self.reports_view, self.leaderboard_view):
+            if view is not None:
+                view.invalidate()
+
+    # ---------------------------
+    # Lazy panels
+    # ---------------------------
+    def _add_lazy_tab(self, label, build):
+        page = QtWidgets.QWidget()
+        QtWidgets.QVBoxLayout(page).setContentsMargins(0, 0, 0, 0)
+        self._lazy_tabs[self.tabs.addTab(page, label)] = build
+
+    def on_tab_changed(self, index):
+        build = self._lazy_tabs.pop(index, None)
+        if build is not None:
+            self.tabs.widget(index).layout().addWidget(build())
+
+    def _build_reports_view(self):
+        from reports_view import ReportsView
+        self.reports_view = ReportsView(self.adb, self.user["id"])
+        return self.reports_view
+
+    def _build_leaderboard_view(self):
+        from leaderboard_view import LeaderboardView
+        self.leaderboard_view = LeaderboardView(self.adb, self.user["id"])
+        return self.leaderboard_view
+
+    def toggle_diagnostics(self, visible):
+        if self.diagnostics_dock is None:
+            if not visible:
+                return
+            from diagnostics import DiagnosticsDock
+            self.diagnostics_dock = DiagnosticsDock(self.adb, self)
+            self.addDockWidget(QtCore.Qt.RightDockWidgetArea, self.diagnostics_dock)
+            self.diagnostics_dock.visibilityChanged.connect(self.diagnostics_action.setChecked)
+        self.diagnostics_dock.setVisible(visible)
 
     def clear_details(self):
         self.selected_habit_id = None
@@ -128,7 +303,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.detail_category.setText("-")
         self.detail_frequency.setText("-")
         self.calendar.setSelectedDate(QtCore.QDate.currentDate())
-        self.calendar.setDateTextFormat(QtCore.QDate(), QtGui.QTextCharFormat())
+        self.calendar.set_habit(None)
         self.badges_list.setText("-")
 
     def on_habit_selected(self):
@@ -136,16 +311,16 @@ class MainWindow(QtWidgets.QMainWindow):
         if not selected_rows:
             self.clear_details()
             return
-        row = selected_rows[0].row()
-        habit_id_item = self.habits_table.item(row, 0)
-        if not habit_id_item:
-            self.clear_details()
-            return
-        habit_id = int(habit_id_item.text())
-        habit = self.db.get_habit(habit_id)
-        if not habit:
-            self.clear_details()
+        source = self.habit_proxy.mapToSource(selected_rows[0])
+        habit_id = self.habit_model.habit_id_at(source.row())
+        self.adb.call("get_habit", habit_id, callback=self.show_habit_details, coalesce="select")
+
+    def show_habit_details(self, habit):
+        if not habit or not self.is_habit_selected(habit["id"]):
+            if not self.habits_table.selectionModel().hasSelection():
+                self.clear_details()
             return
+        habit_id = habit["id"]
         self.selected_habit_id = habit_id
         self.detail_name.setText(habit["name"])
         self.detail_category.setText(habit["category"])
@@ -153,26 +328,18 @@ class MainWindow(QtWidgets.QMainWindow):
         self.refresh_calendar_for_habit(habit_id)
         self.update_badges_for_habit(habit_id)
 
+    def is_habit_selected(self, habit_id):
+        row = self.habit_model.row_for_habit(habit_id)
+        if row is None:
+            return False
+        index = self.habit_proxy.mapFromSource(self.habit_model.index(row, 0))
+        return self.habits_table.selectionModel().isRowSelected(index.row(), index.parent())
+
     # ---------------------------
     # Calendar & Completion
     # ---------------------------
     def refresh_calendar_for_habit(self, habit_id):
-        # 🔄 Tüm formatları temizle
-        self.calendar.setDateTextFormat(QtCore.QDate(), QtGui.QTextCharFormat())
-
-        dates = self.db.completions_for_habit(habit_id)
-
-        fmt = QtGui.QTextCharFormat()
-        fmt.setBackground(QtGui.QBrush(QtGui.QColor("#8fbc8f")))
-        fmt.setForeground(QtGui.QBrush(QtGui.QColor("black")))
-
-        for d in dates:
-            if isinstance(d, str):
-                d = datetime.date.fromisoformat(d)
-
-            qd = QtCore.QDate(d.year, d.month, d.day)
-            self.calendar.setDateTextFormat(qd, fmt)
-
+        self.calendar.set_habit(habit_id)
 
     def toggle_completion_today(self):
         if not self.selected_habit_id:
@@ -182,54 +349,94 @@ class MainWindow(QtWidgets.QMainWindow):
         # 🔴 BUGÜN DEĞİL → TAKVİMDE SEÇİLİ TARİH
         qdate = self.calendar.selectedDate()
         selected_date = datetime.date( qdate.year(), qdate.month(), qdate.day() )
+        habit_id = self.selected_habit_id
+        self.adb.call("toggle_completion", habit_id, selected_date,
+                      callback=lambda result: self.on_completion_toggled(habit_id, selected_date, *result))
 
-        if self.db.is_completed(self.selected_habit_id, selected_date):
+    def on_completion_toggled(self, habit_id, selected_date, completed, total_pts):
+        if completed:
+            # ✅ TAMAMLA
+            QtWidgets.QMessageBox.information(
+                self,
+                "Tebrikler",
+                f"{selected_date.strftime('%d.%m.%Y')} tarihi için alışkanlık tamamlandı! (+1 puan)"
+            )
+        else:
             # 🔁 GERİ AL
-            self.db.unmark_completed(self.selected_habit_id, selected_date)
-            self.db.add_points(self.user["id"], -1)
-
             QtWidgets.QMessageBox.information(
                 self,
                 "Bilgi",
                 f"{selected_date.strftime('%d.%m.%Y')} tarihi için tamamlama geri alındı. (-1 puan)"
             )
-
+        self.calendar.invalidate(habit_id, selected_date)
+        self.invalidate_views()
+        if completed:
+            self.scheduler.on_completion(habit_id, selected_date)
+            self.update_due_view()
         else:
-            # ✅ TAMAMLA
-            ok = self.db.mark_completed(self.selected_habit_id, selected_date)
-            if ok:
-                self.db.add_points(self.user["id"], 1)
-                QtWidgets.QMessageBox.information(
-                    self,
-                    "Tebrikler",
-                    f"{selected_date.strftime('%d.%m.%Y')} tarihi için alışkanlık tamamlandı! (+1 puan)"
-                )
-            else:
-                QtWidgets.QMessageBox.information(
-                    self,
-                    "Bilgi",
-                    "Bu tarih zaten tamamlanmış."
-                )
-        self.calendar.setSelectedDate(
-            QtCore.QDate(selected_date.year, selected_date.month, selected_date.day)
-        )
-        self.refresh_calendar_for_habit(self.selected_habit_id)
-        self.update_profile_panel()
-        self.update_badges_for_habit(self.selected_habit_id)
-
+            # Geri alındığında dönemdeki son tamamlama yeniden okunur
+            self.refresh_schedule_for(habit_id)
+        self.show_points(total_pts)
+        if habit_id == self.selected_habit_id:
+            self.calendar.setSelectedDate(
+                QtCore.QDate(selected_date.year, selected_date.month, selected_date.day)
+            )
+            self.refresh_calendar_for_habit(habit_id)
+            self.update_badges_for_habit(habit_id)
 
+    def complete_calendar_range(self):
+        if not self.selected_habit_id:
+            QtWidgets.QMessageBox.warning(self, "Uyarı", "Lütfen bir alışkanlık seçin.")
+            return
+        start, end = self.calendar.selected_range()
+        days = [start + datetime.timedelta(days=i) for i in range((end - start).days + 1)]
+        self.complete_many([(self.selected_habit_id, d) for d in days])
+
+    def complete_selected_habits(self):
+        habit_ids = []
+        for index in self.habits_table.selectionModel().selectedRows():
+            source = self.habit_proxy.mapToSource(index)
+            habit_ids.append(self.habit_model.habit_id_at(source.row()))
+        if not habit_ids:
+            QtWidgets.QMessageBox.warning(self, "Uyarı", "Lütfen en az bir alışkanlık seçin.")
+            return
+        qdate = self.calendar.selectedDate()
+        selected_date = datetime.date(qdate.year(), qdate.month(), qdate.day())
+        self.complete_many([(habit_id, selected_date) for habit_id in habit_ids])
+
+    def complete_many(self, pairs):
+        user_id = self.user["id"]
+        self.adb.run(lambda db: (db.mark_completed_many(pairs), db.total_points(user_id)),
+                     callback=lambda result: self.on_completed_many(pairs, *result))
+
+    def on_completed_many(self, pairs, added, total_pts):
+        for habit_id in {habit_id for habit_id, _ in pairs}:
+            self.calendar.invalidate(habit_id)
+        self.calendar.clear_range()
+        self.invalidate_views()
+        for habit_id, date_ in pairs:
+            self.scheduler.on_completion(habit_id, date_)
+        self.update_due_view()
+        self.show_points(total_pts)
+        if self.selected_habit_id:
+            self.refresh_calendar_for_habit(self.selected_habit_id)
+            self.update_badges_for_habit(self.selected_habit_id)
+        QtWidgets.QMessageBox.information(
+            self,
+            "Tebrikler",
+            f"{added} tamamlama kaydedildi. (+{added} puan)"
+        )
 
     def on_calendar_date_clicked(self, qdate):
         if not self.selected_habit_id:
             return
 
         d = datetime.date(qdate.year(),qdate.month(), qdate.day())
+        self.adb.call("is_completed", self.selected_habit_id, d,
+                      callback=self.on_date_state, coalesce="date-state")
 
-        if self.db.is_completed(self.selected_habit_id, d):
-            self.mark_btn.setText("Geri Al")
-        else:
-            self.mark_btn.setText("Tamamla")
-
+    def on_date_state(self, completed):
+        self.mark_btn.setText("Geri Al" if completed else "Tamamla")
 
     # ---------------------------
     # CRUD
@@ -249,51 +456,39 @@ class MainWindow(QtWidgets.QMainWindow):
                 )
                 return
 
-            # Aynı isim (BÜYÜK/küçük harf duyarsız) kontrolü
-            existing = [
-                h["name"].lower()
-                for h in self.db.list_habits(self.user["id"])
-            ]
+            user_id = self.user["id"]
 
-            if name.lower() in existing:
-                QtWidgets.QMessageBox.warning(
-                    self,
-                    "Uyarı",
-                    "Bu isimde bir alışkanlık zaten mevcut."
-                )
-                return
-
-            # Veritabanına ekle
-            self.db.add_habit(
-                self.user["id"],
-                name.strip(),
-                category,
-                frequency
-            )
+            def add(db):
+                # Aynı isim (Türkçe BÜYÜK/küçük harf duyarsız) kontrolü, indeksli
+                if db.habit_name_exists(user_id, name):
+                    return None
+                habit_id = db.add_habit(user_id, name.strip(), category, frequency)
+                # Kontrolden sonra başka bir yazıcı aynı adı eklemiş olabilir
+                return db.get_habit(habit_id) if habit_id is not None else None
 
-            # Listeyi yenile
-            self.refresh_habits()
+            self.adb.run(add, callback=self.on_habit_added)
 
-    def update_habit(self, habit_id, name, category, frequency):
-        name = name.strip()
-
-        cur = self.conn.cursor()
-        try:
-            cur.execute(
-                "UPDATE habits SET name = ?, category = ?, frequency = ? WHERE id = ?",
-                (name, category, frequency, habit_id)
+    def on_habit_added(self, habit):
+        if habit is None:
+            QtWidgets.QMessageBox.warning(
+                self,
+                "Uyarı",
+                "Bu isimde bir alışkanlık zaten mevcut."
             )
-            self.conn.commit()
-            return True
-        except sqlite3.IntegrityError:
-            return False
-
+            return
+        # Yalnızca yeni satırı tabloya ekle
+        self.habit_model.upsert_habit(habit)
+        self.invalidate_views()
+        self.run_search()
+        self.refresh_schedule_for(habit["id"])
 
     def edit_habit(self):
         if self.selected_habit_id is None:
             QtWidgets.QMessageBox.warning(self, "Uyarı", "Lütfen düzenlemek için bir alışkanlık seçin.")
             return
-        habit = self.db.get_habit(self.selected_habit_id)
+        self.adb.call("get_habit", self.selected_habit_id, callback=self.on_edit_habit_loaded)
+
+    def on_edit_habit_loaded(self, habit):
         if not habit:
             QtWidgets.QMessageBox.warning(self, "Hata", "Seçili alışkanlık bulunamadı.")
             self.refresh_habits()
@@ -307,8 +502,32 @@ class MainWindow(QtWidgets.QMainWindow):
             if not name:
                 QtWidgets.QMessageBox.warning(self, "Uyarı", "Alışkanlık adı boş olamaz.")
                 return
-            self.db.update_habit(self.selected_habit_id, name, category, frequency)
-            self.refresh_habits()
+            habit_id = habit["id"]
+            user_id = self.user["id"]
+
+            def update(db):
+                # Aynı ad başka bir alışkanlıkta varsa False
+                if db.habit_name_exists(user_id, name, exclude_id=habit_id):
+                    return False
+                if not db.update_habit(habit_id, name, category, frequency):
+                    return False
+                return db.get_habit(habit_id)
+
+            # Aynı alışkanlığa kuyrukta bekleyen düzenlemeler tek yazmaya indirgenir
+            self.adb.run(update, callback=self.on_habit_updated, coalesce=("update_habit", habit_id))
+
+    def on_habit_updated(self, habit):
+        if habit is False:
+            QtWidgets.QMessageBox.warning(self, "Uyarı", "Bu isimde bir alışkanlık zaten mevcut.")
+            return
+        if not habit:
+            return
+        self.habit_model.upsert_habit(habit)
+        self.invalidate_views()
+        self.run_search()
+        self.refresh_schedule_for(habit["id"])
+        if habit["id"] == self.selected_habit_id:
+            self.show_habit_details(habit)
 
     def delete_habit(self):
         if not self.selected_habit_id:
@@ -331,40 +550,30 @@ class MainWindow(QtWidgets.QMainWindow):
         # ✅ BURADAN AŞAĞISI SADECE 'YES' DENİRSE ÇALIŞIR
         habit_id = self.selected_habit_id
 
-        # Silmeden önce puanları düş
-        completed_count = self.db.completion_count_for_habit(habit_id)
-        if completed_count > 0:
-            self.db.add_points(self.user["id"], -completed_count)
+        def delete(db):
+            # Puan düşme ve silme tek transaction'da
+            db.remove_habit(habit_id)
+            return habit_id
 
-        # Veritabanından sil
-        self.db.delete_habit(habit_id)
+        self.adb.run(delete, callback=self.on_habit_deleted)
 
+    def on_habit_deleted(self, habit_id):
         # Arayüzü güncelle
-        self.refresh_habits()
+        self.habit_model.remove_habit(habit_id)
+        self.calendar.invalidate(habit_id)
+        self.invalidate_views()
+        self.scheduler.remove(habit_id)
+        self.update_due_view()
         self.update_profile_panel()
         QtWidgets.QMessageBox.information(self, "Bilgi", "Alışkanlık başarıyla silindi.")
 
-        if confirm == QtWidgets.QMessageBox.Yes:
-            habit_id = self.selected_habit_id
-
-            # 🔴 MUTLAKA SİLMEDEN ÖNCE!
-            completed_count = self.db.completion_count_for_habit(habit_id)
-            print("DEBUG completion_count:", completed_count)  # test için
-
-            if completed_count > 0:
-                self.db.add_points(self.user["id"], -completed_count)
-
-        # 🔽 ŞİMDİ SİL
-        self.db.delete_habit(habit_id)
-
-        self.refresh_habits()
-        self.update_profile_panel()
-
     # ---------------------------
     # Profile & Badges
     # ---------------------------
     def update_profile_panel(self):
-        pts = self.db.total_points(self.user["id"])
+        self.adb.call("total_points", self.user["id"], callback=self.show_points, coalesce="points")
+
+    def show_points(self, pts):
         self.points_label.setText(f"Puan: {pts}")
         lvl = pts // 10
         lvl_name = self.LEVEL_NAMES[min(lvl, len(self.LEVEL_NAMES)-1)]
@@ -375,24 +584,237 @@ class MainWindow(QtWidgets.QMainWindow):
         if not habit_id:
             self.badges_list.setText("-")
             return
-        dates = [d if isinstance(d, datetime.date) else datetime.date.fromisoformat(d)
-                 for d in self.db.completions_for_habit(habit_id)]
+        user_id = self.user["id"]
+        self.adb.run(lambda db: (db.streak_for_habit(habit_id), db.total_points(user_id)),
+                     callback=lambda result: self.show_badges(habit_id, *result),
+                     coalesce="badges")
+
+    def show_badges(self, habit_id, streak, total_pts):
+        if habit_id != self.selected_habit_id:
+            return
         badges = []
-        today = datetime.date.today()
-        streak = 0
-        for i in range(7):
-            day = today - datetime.timedelta(days=i)
-            if day in dates:
-                streak += 1
-            else:
-                break
-        if streak >= 7:
-            badges.append("Seri Katılım (7 gün)")
-        total_pts = self.db.total_points(self.user["id"])
+        if streak is not None:
+            unit = PERIOD_UNITS.get(streak["frequency"], "gün")
+            current = active_streak(streak["current_streak"], streak["last_date"], streak["frequency"])
+            if current >= 7:
+                badges.append(f"Seri Katılım (7 {unit})")
+            if streak["longest_streak"] > 1:
+                badges.append(f"En uzun seri: {streak['longest_streak']} {unit}")
         if total_pts >= 30:
             badges.append("İstikrar Ustası (30+ puan)")
         self.badges_list.setText("\n".join(badges) if badges else "Henüz rozet yok.")
 
+    def reconcile_points(self):
+        # Son çalıştırmadan bu yana tamamlama eklenen kullanıcıların puanları arka planda denetlenir
+        self.adb.run(lambda db: reconcile.reconcile(db, incremental=True), callback=self.on_points_reconciled)
+
+    def on_points_reconciled(self, result):
+        if result["drift"]:
+            # Ayrıntılı rapor için: python cli.py reconcile --dry-run
+            self.statusBar().showMessage(
+                f"Puanlar düzeltildi: {result['fixed']} kullanıcının puanı tamamlamalarla eşitlendi.", 10000)
+            self.update_profile_panel()
+            self.invalidate_views()
+
+    # ---------------------------
+    # Backups
+    # ---------------------------
+    def backup_if_due(self):
+        entries = [e for e in backup.read_log(backup.backup_dir(self.db.db_file)) if e.get("file")]
+        if entries:
+            last = datetime.datetime.fromisoformat(entries[-1]["started"])
+            if datetime.datetime.now() - last < datetime.timedelta(hours=self.BACKUP_INTERVAL_HOURS):
+                return
+        self.run_backup()
+
+    def _backup_running(self, manual):
+        if self.backup_worker is None:
+            return False
+        if manual:
+            self.statusBar().showMessage("Yedekleme zaten sürüyor.", 5000)
+        return True
+
+    def run_backup(self, manual=False):
+        if self._backup_running(manual):
+            return
+        # Kaynak, worker'ın yazıcı bağlantısı: arayüzün yazmaları yedeği baştan başlatmaz.
+        # BackupWorker yanıt gelince kurulur; istek başarısız olursa sonraki yedekler engellenmez.
+        self.adb.run(lambda db: getattr(db, "db", db),
+                     callback=lambda database: self._start_backup(database, manual))
+
+    def _start_backup(self, database, manual):
+        # Yanıt beklenirken istenen ikinci yedek burada düşer
+        if self._backup_running(manual):
+            return
+        self.backup_worker = BackupWorker(database, self)
+        self.backup_worker.done.connect(lambda entry, error: self.on_backup_done(entry, error, manual))
+        self.backup_worker.start()
+
+    def on_backup_done(self, entry, error, manual):
+        self.backup_worker.wait()
+        self.backup_worker = None
+        if error is not None:
+            if isinstance(error, backup.BackupCancelled):
+                return
+            message = f"Yedekleme başarısız: {error}"
+        elif entry["file"] is None:
+            message = f"Yedek bütünlük denetiminden geçmedi: {entry['integrity']}"
+        else:
+            message = (f"Yedek alındı: {entry['file']} "
+                       f"({entry['bytes'] / 1048576:.1f} MB, {entry['total_s']:.1f} sn)")
+        self.statusBar().showMessage(message, 10000)
+        if manual:
+            QtWidgets.QMessageBox.information(self, "Yedekleme", message)
+
+    # ---------------------------
+    # Due today & reminders
+    # ---------------------------
+    def load_schedule(self):
+        self.adb.call("schedule_rows", self.user["id"], datetime.date.today(),
+                      callback=self.on_schedule_loaded, coalesce="schedule")
+
+    def on_schedule_loaded(self, rows):
+        self.scheduler.load(rows)
+        self.update_due_view()
+
+    def refresh_schedule_for(self, habit_id):
+        self.adb.call("schedule_rows", self.user["id"], datetime.date.today(), habit_id,
+                      callback=lambda rows: self.on_schedule_rows(habit_id, rows))
+
+    def on_schedule_rows(self, habit_id, rows):
+        if rows:
+            self.scheduler.update(rows[0])
+        else:
+            self.scheduler.remove(habit_id)
+        self.update_due_view()
+
+    def update_due_view(self):
+        self.due_list.clear()
+        due = self.scheduler.due()
+        for habit, status in due:
+            item = QtWidgets.QListWidgetItem(f"{habit['name']} ({habit['frequency']}) — {STATUS_LABELS[status]}")
+            item.setData(QtCore.Qt.UserRole, habit["id"])
+            if status == OVERDUE:
+                item.setForeground(QtGui.QBrush(QtGui.QColor("#b22222")))
+            self.due_list.addItem(item)
+        if not due:
+            self.due_list.addItem("Bugün için bekleyen alışkanlık yok. 🎉")
+        self.arm_reminder()
+
+    def arm_reminder(self):
+        # Zamanlayıcı yalnızca kuyruktaki en yakın olay için kurulur; veritabanı yoklanmaz
+        when = self.scheduler.next_time()
+        if when is None:
+            self.reminder_timer.stop()
+            return
+        wait = (when - datetime.datetime.now()).total_seconds() * 1000
+        self.reminder_timer.start(int(min(max(wait, 0), self.MAX_REMINDER_WAIT)))
+
+    def on_reminder_timeout(self):
+        reminders = []
+        for kind, habit in self.scheduler.pop_events():
+            if self.scheduler.status(habit["id"]) == DONE:
+                continue
+            if kind == DEADLINE:
+                reminders.append(f"{habit['name']} için bu dönemin son günü")
+            else:
+                reminders.append(f"{habit['name']} zamanı geldi")
+        if reminders:
+            self.statusBar().showMessage("⏰ " + "; ".join(reminders), 60 * 1000)
+        self.update_due_view()
+
+    def on_due_item_activated(self, item):
+        habit_id = item.data(QtCore.Qt.UserRole)
+        row = self.habit_model.row_for_habit(habit_id) if habit_id is not None else None
+        if row is None:
+            return
+        index = self.habit_proxy.mapFromSource(self.habit_model.index(row, 0))
+        if index.isValid():
+            self.habits_table.selectRow(index.row())
+
+    # ---------------------------
+    # Export / import
+    # ---------------------------
+    CONFLICT_CHOICES = {
+        "Aynı adlı alışkanlıkla birleştir": "merge",
+        "Yeni adla ekle (Ad (2))": "rename",
+        "Aynı adlı alışkanlıkları atla": "skip",
+    }
+
+    def export_data(self):
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(
+            self, "Verileri dışa aktar", "habit_tracker.jsonl", "JSON Lines (*.jsonl);;CSV (*.csv)")
+        if not path:
+            return
+        progress = self.start_transfer("Dışa aktarılıyor...")
+        user_id = self.user["id"]
+        self.adb.run(lambda db: transfer.export_file(db, path, user_id=user_id, progress=progress.report),
+                     callback=lambda count: self.on_exported(path, count))
+
+    def on_exported(self, path, count):
+        self.finish_transfer()
+        QtWidgets.QMessageBox.information(self, "Bilgi", f"{count} kayıt dışa aktarıldı:\n{path}")
+
+    def import_data(self):
+        path, _ = QtWidgets.QFileDialog.getOpenFileName(
+            self, "Verileri içe aktar", "", "JSON Lines / CSV (*.jsonl *.json *.csv)")
+        if not path:
+            return
+        choice, ok = QtWidgets.QInputDialog.getItem(
+            self, "Çakışmalar", "Aynı adlı alışkanlık varsa:", list(self.CONFLICT_CHOICES), 0, False)
+        if not ok:
+            return
+        on_conflict = self.CONFLICT_CHOICES[choice]
+        progress = self.start_transfer("İçe aktarılıyor...")
+        user_id = self.user["id"]
+
+        def run_import(db):
+            # CachedDatabase.import_records önbelleği kendisi boşaltır
+            return transfer.import_file(db, path, user_id=user_id, on_conflict=on_conflict,
+                                        progress=progress.report)
+
+        self.adb.run(run_import, callback=self.on_imported)
+
+    def on_imported(self, result):
+        self.finish_transfer()
+        self.refresh_habits()
+        self.calendar.invalidate()
+        self.invalidate_views()
+        self.update_profile_panel()
+        message = (f"{result['habits']} alışkanlık ({result['renamed']} yeniden adlandırıldı, "
+                   f"{result['skipped']} atlandı) ve {result['completions']} tamamlama eklendi.")
+        if result["error_count"]:
+            message += f"\n\n{result['error_count']} kayıt aktarılamadı:\n" + "\n".join(result["errors"][:10])
+            QtWidgets.QMessageBox.warning(self, "İçe Aktarma", message)
+        else:
+            QtWidgets.QMessageBox.information(self, "İçe Aktarma", message)
+
+    def start_transfer(self, label):
+        dialog = QtWidgets.QProgressDialog(label, None, 0, 0, self)
+        progress = Progress(dialog)
+        dialog.setWindowModality(QtCore.Qt.WindowModal)
+        dialog.setMinimumDuration(300)
+        progress.progressed.connect(lambda done, total: (dialog.setMaximum(total), dialog.setValue(done)))
+        self.transfer_dialog = dialog
+        return progress
+
+    def finish_transfer(self):
+        if self.transfer_dialog is not None:
+            self.transfer_dialog.close()
+            self.transfer_dialog.deleteLater()
+            self.transfer_dialog = None
+
+    # ---------------------------
+    # Busy state
+    # ---------------------------
+    def on_busy_changed(self, busy):
+        self.busy_label.setVisible(busy)
+        self.busy_bar.setVisible(busy)
+
+    def on_db_error(self, error):
+        self.finish_transfer()
+        QtWidgets.QMessageBox.warning(self, "Hata", f"Veritabanı hatası: {error}")
+
     # ---------------------------
     # Logout
     # ---------------------------
@@ -400,3 +822,11 @@ class MainWindow(QtWidgets.QMainWindow):
         confirm = QtWidgets.QMessageBox.question(self, "Çıkış", "Oturumdan çıkmak istiyor musunuz?")
         if confirm == QtWidgets.QMessageBox.Yes:
             self.close()
+
+    def closeEvent(self, event):
+        if self.backup_worker is not None:
+            # Yarım yedek silinir; worker'ın bağlantısı kapanmadan önce beklenir
+            self.backup_worker.cancel.set()
+            self.backup_worker.wait()
+        self.adb.close()
+        super().closeEvent(event)
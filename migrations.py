@@ -0,0 +1,523 @@
+import sqlite3
+import sys
+from search import fold, register_functions
+from archive import register_bitmap_functions
+
+
+# ---------------------------
+# Migration steps
+# ---------------------------
+def initial_schema(cur):
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE,
+        email TEXT UNIQUE,
+        password_hash TEXT,
+        total_points INTEGER DEFAULT 0
+    );
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS habits (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        name TEXT COLLATE NOCASE,
+        category TEXT,
+        frequency TEXT,
+        created_at DATE,
+        UNIQUE(user_id, name),
+        FOREIGN KEY(user_id) REFERENCES users(id)
+    );
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS completions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        habit_id INTEGER,
+        date DATE,
+        UNIQUE(habit_id, date),
+        FOREIGN KEY(habit_id) REFERENCES habits(id)
+    );
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS habit_streaks (
+        habit_id INTEGER PRIMARY KEY,
+        current_streak INTEGER DEFAULT 0,
+        longest_streak INTEGER DEFAULT 0,
+        last_date DATE,
+        FOREIGN KEY(habit_id) REFERENCES habits(id)
+    );
+    """)
+
+
+def cascades_and_indexes(cur):
+    # SQLite yabancı anahtarları değiştiremez, tablolar yeniden kurulur
+    cur.execute("""
+    CREATE TABLE habits_new (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+        name TEXT COLLATE NOCASE,
+        category TEXT,
+        frequency TEXT,
+        created_at DATE,
+        UNIQUE(user_id, name)
+    );
+    """)
+    cur.execute("""INSERT INTO habits_new (id, user_id, name, category, frequency, created_at)
+                   SELECT id, user_id, name, category, frequency, created_at FROM habits
+                   WHERE user_id IN (SELECT id FROM users)""")
+    cur.execute("DROP TABLE habits")
+    cur.execute("ALTER TABLE habits_new RENAME TO habits")
+
+    cur.execute("""
+    CREATE TABLE completions_new (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        habit_id INTEGER NOT NULL REFERENCES habits(id) ON DELETE CASCADE,
+        date DATE NOT NULL
+    );
+    """)
+    cur.execute("""INSERT INTO completions_new (id, habit_id, date)
+                   SELECT id, habit_id, date FROM completions
+                   WHERE habit_id IN (SELECT id FROM habits)""")
+    cur.execute("DROP TABLE completions")
+    cur.execute("ALTER TABLE completions_new RENAME TO completions")
+
+    cur.execute("""
+    CREATE TABLE habit_streaks_new (
+        habit_id INTEGER PRIMARY KEY REFERENCES habits(id) ON DELETE CASCADE,
+        current_streak INTEGER DEFAULT 0,
+        longest_streak INTEGER DEFAULT 0,
+        last_date DATE
+    );
+    """)
+    cur.execute("""INSERT INTO habit_streaks_new
+                   SELECT habit_id, current_streak, longest_streak, last_date FROM habit_streaks
+                   WHERE habit_id IN (SELECT id FROM habits)""")
+    cur.execute("DROP TABLE habit_streaks")
+    cur.execute("ALTER TABLE habit_streaks_new RENAME TO habit_streaks")
+
+    # Eski UNIQUE(habit_id, date) kısıtının yerini alan kapsayıcı indeks
+    cur.execute("CREATE UNIQUE INDEX idx_completions_habit_date ON completions(habit_id, date)")
+    # list_habits / list_habits_page: user_id eşitliği + id sırası
+    cur.execute("CREATE INDEX idx_habits_user ON habits(user_id)")
+
+
+# completions.date sütununu SQLite tarih fonksiyonlarına verilecek biçime çeviren ifadeler
+TEXT_DAY = "date"
+EPOCH_DAY = "date * 86400, 'unixepoch'"
+
+
+# Dönem anahtarları: 'W' + haftanın pazartesisi, 'M' + YYYY-MM, tüm zamanlar için 'all'.
+# Python tarafındaki karşılığı leaderboard.period_key'dir.
+def _period_keys(source, day):
+    return f"""SELECT 'W' || date({day}, '-6 days', 'weekday 1') AS period FROM {source}
+               UNION ALL SELECT 'M' || strftime('%Y-%m', {day}) FROM {source}
+               UNION ALL SELECT 'all' FROM {source}"""
+
+
+def _apply_points(source, user_id, categories, sign, day):
+    # category = '' tüm kategorilerin toplamıdır; ('all', '') satırı tutulmaz, users.total_points'tir
+    choices = " UNION ALL ".join(f"SELECT {c} AS category" for c in categories)
+    return f"""
+        INSERT INTO period_points (period, category, user_id, points)
+        SELECT k.period, c.category, {user_id}, {sign} * COUNT(*)
+        FROM ({_period_keys(source, day)}) k, ({choices}) c
+        WHERE {user_id} IS NOT NULL AND c.category IS NOT NULL AND NOT (k.period = 'all' AND c.category = '')
+        GROUP BY k.period, c.category
+        ON CONFLICT (period, category, user_id) DO UPDATE SET points = points + excluded.points;"""
+
+
+def _drop_empty(user_id):
+    return f"DELETE FROM period_points WHERE user_id = {user_id} AND points <= 0;"
+
+
+def leaderboard(cur):
+    cur.execute("CREATE INDEX idx_users_points ON users(total_points DESC, id)")
+    cur.execute("""
+    CREATE TABLE period_points (
+        period TEXT NOT NULL,
+        category TEXT NOT NULL,
+        user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+        points INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (period, category, user_id)
+    ) WITHOUT ROWID;
+    """)
+    cur.execute("CREATE INDEX idx_period_points_rank ON period_points(period, category, points DESC, user_id)")
+    cur.execute("CREATE INDEX idx_period_points_user ON period_points(user_id)")
+    _create_points_triggers(cur, TEXT_DAY)
+
+    # Mevcut tamamlamalardan ilk doldurma
+    for category in ("''", "h.category"):
+        cur.execute(f"""
+        INSERT INTO period_points (period, category, user_id, points)
+        SELECT k.period, k.category, k.user_id, COUNT(*) FROM (
+            SELECT h.user_id, {category} AS category, 'W' || date(c.date, '-6 days', 'weekday 1') AS period
+            FROM completions c JOIN habits h ON h.id = c.habit_id
+            UNION ALL
+            SELECT h.user_id, {category}, 'M' || strftime('%Y-%m', c.date)
+            FROM completions c JOIN habits h ON h.id = c.habit_id
+            UNION ALL
+            SELECT h.user_id, {category}, 'all'
+            FROM completions c JOIN habits h ON h.id = c.habit_id
+        ) k
+        WHERE k.category IS NOT NULL AND NOT (k.period = 'all' AND k.category = '')
+        GROUP BY k.period, k.category, k.user_id
+        """)
+
+
+POINTS_TRIGGERS = ["completions_points_insert", "completions_points_delete",
+                   "habits_points_delete", "habits_points_category"]
+# Bu meta satırı varken completions tetikleyicileri puanlara dokunmaz: arşive taşınan ya da arşivden
+# geri alınan tamamlama puanı zaten sayılmıştır
+POINTS_PAUSED_KEY = "points_paused"
+
+
+def _archived(habit_id):
+    # Alışkanlığın arşivlenmiş günleri, completions ile aynı biçimde (date sütunu)
+    return f"""(SELECT year_start(a.year) + d.i AS date
+                FROM completion_archive a JOIN year_days d ON bitmap_test(a.bits, d.i)
+                WHERE a.habit_id = {habit_id})"""
+
+
+def _create_points_triggers(cur, day, archive=False):
+    owner = "(SELECT user_id FROM habits WHERE id = {row}.habit_id)"
+    category = "(SELECT category FROM habits WHERE id = {row}.habit_id)"
+    paused = f"WHEN NOT EXISTS (SELECT 1 FROM meta WHERE key = '{POINTS_PAUSED_KEY}')" if archive else ""
+    sources = ["completions WHERE habit_id = {id}"] + ([_archived("{id}")] if archive else [])
+    cur.execute(f"""
+    CREATE TRIGGER completions_points_insert AFTER INSERT ON completions {paused} BEGIN
+        {_apply_points("(SELECT NEW.date AS date)", owner.format(row="NEW"),
+                       ["''", category.format(row="NEW")], 1, day)}
+    END;
+    """)
+    # Alışkanlık silinirken (cascade) alışkanlık satırı artık yoktur, puanlar habits tetikleyicisinde düşülür
+    cur.execute(f"""
+    CREATE TRIGGER completions_points_delete AFTER DELETE ON completions {paused} BEGIN
+        {_apply_points("(SELECT OLD.date AS date)", owner.format(row="OLD"),
+                       ["''", category.format(row="OLD")], -1, day)}
+        {_drop_empty(owner.format(row="OLD"))}
+    END;
+    """)
+    cur.execute(f"""
+    CREATE TRIGGER habits_points_delete BEFORE DELETE ON habits BEGIN
+        {"".join(_apply_points(s.format(id="OLD.id"), "OLD.user_id", ["''", "OLD.category"], -1, day)
+                 for s in sources)}
+        {_drop_empty("OLD.user_id")}
+    END;
+    """)
+    cur.execute(f"""
+    CREATE TRIGGER habits_points_category AFTER UPDATE OF category ON habits
+    WHEN OLD.category IS NOT NEW.category BEGIN
+        {"".join(_apply_points(s.format(id="NEW.id"), "OLD.user_id", ["OLD.category"], -1, day)
+                 + _apply_points(s.format(id="NEW.id"), "NEW.user_id", ["NEW.category"], 1, day)
+                 for s in sources)}
+        {_drop_empty("OLD.user_id")}
+    END;
+    """)
+
+
+def meta_table(cur):
+    # Araçların kalıcı durumu (ör. reconcile yüksek su işareti)
+    cur.execute("""
+    CREATE TABLE meta (
+        key TEXT PRIMARY KEY,
+        value
+    );
+    """)
+
+
+def integer_dates(cur):
+    # completions.date ve habit_streaks.last_date: ISO metin -> 1970-01-01'den bu yana gün sayısı
+    cur.execute("""
+    CREATE TABLE completions_new (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        habit_id INTEGER NOT NULL REFERENCES habits(id) ON DELETE CASCADE,
+        date INTEGER NOT NULL
+    );
+    """)
+    # Çözümlenemeyen tarihler zaten hiçbir sorguda eşleşmiyordu, taşınmaz
+    cur.execute("""INSERT INTO completions_new (id, habit_id, date)
+                   SELECT id, habit_id, CAST(round(julianday(date) - 2440587.5) AS INTEGER) FROM completions
+                   WHERE julianday(date) IS NOT NULL""")
+    # completions üzerindeki tetikleyiciler tabloyla birlikte silinir; habits üzerindekiler ayrıca
+    for trigger in POINTS_TRIGGERS:
+        cur.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    cur.execute("DROP TABLE completions")
+    cur.execute("ALTER TABLE completions_new RENAME TO completions")
+    cur.execute("CREATE UNIQUE INDEX idx_completions_habit_date ON completions(habit_id, date)")
+    _create_points_triggers(cur, EPOCH_DAY)
+
+    cur.execute("""
+    CREATE TABLE habit_streaks_new (
+        habit_id INTEGER PRIMARY KEY REFERENCES habits(id) ON DELETE CASCADE,
+        current_streak INTEGER DEFAULT 0,
+        longest_streak INTEGER DEFAULT 0,
+        last_date INTEGER
+    );
+    """)
+    cur.execute("""INSERT INTO habit_streaks_new
+                   SELECT habit_id, current_streak, longest_streak,
+                          CAST(round(julianday(last_date) - 2440587.5) AS INTEGER)
+                   FROM habit_streaks""")
+    cur.execute("DROP TABLE habit_streaks")
+    cur.execute("ALTER TABLE habit_streaks_new RENAME TO habit_streaks")
+
+
+def habit_search(cur):
+    # tr_fold: search.fold, Database her bağlantıda tanımlar
+    # Yinelenen ad kontrolü için Türkçe büyük/küçük harf duyarsız ifade indeksi
+    cur.execute("CREATE INDEX idx_habits_name_key ON habits(user_id, tr_fold(name))")
+    # Ad ve kategori üzerinde arama dizini; metinler tr_fold'dan geçirilmiş olarak tutulur
+    cur.execute("""
+    CREATE VIRTUAL TABLE habits_fts USING fts5(
+        name, category, tokenize = 'unicode61 remove_diacritics 2'
+    );
+    """)
+    cur.execute("""INSERT INTO habits_fts (rowid, name, category)
+                   SELECT id, tr_fold(name), tr_fold(category) FROM habits""")
+    _create_fts_triggers(cur)
+
+
+def _create_fts_triggers(cur):
+    cur.execute("""
+    CREATE TRIGGER habits_fts_insert AFTER INSERT ON habits BEGIN
+        INSERT INTO habits_fts (rowid, name, category) VALUES (NEW.id, tr_fold(NEW.name), tr_fold(NEW.category));
+    END;
+    """)
+    cur.execute("""
+    CREATE TRIGGER habits_fts_delete AFTER DELETE ON habits BEGIN
+        DELETE FROM habits_fts WHERE rowid = OLD.id;
+    END;
+    """)
+    cur.execute("""
+    CREATE TRIGGER habits_fts_update AFTER UPDATE OF name, category ON habits BEGIN
+        UPDATE habits_fts SET name = tr_fold(NEW.name), category = tr_fold(NEW.category) WHERE rowid = NEW.id;
+    END;
+    """)
+
+
+def completion_archive(cur):
+    # Eski tamamlamalar alışkanlık-yıl başına bitmap olarak (bkz. archive.py)
+    cur.execute("""
+    CREATE TABLE completion_archive (
+        habit_id INTEGER NOT NULL REFERENCES habits(id) ON DELETE CASCADE,
+        year INTEGER NOT NULL,
+        bits BLOB NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (habit_id, year)
+    ) WITHOUT ROWID;
+    """)
+    # Yıl içi gün sıraları (0-365); bitmap'ler SQL'de bu tabloyla satırlara açılır
+    cur.execute("CREATE TABLE year_days (i INTEGER PRIMARY KEY)")
+    cur.executemany("INSERT INTO year_days (i) VALUES (?)", ((i,) for i in range(366)))
+    # Dönem puanları arşivlenen tamamlamaları da kapsamalı
+    for trigger in POINTS_TRIGGERS:
+        cur.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    _create_points_triggers(cur, EPOCH_DAY, archive=True)
+
+
+def turkish_unique_names(cur):
+    # UNIQUE(user_id, name) NOCASE ile yalnızca ASCII harfleri katlar ("Işık" = "işık" ama "I" ≠ "ı");
+    # ad benzersizliği artık yalnızca Türkçe kurallı idx_habits_name_key ile sağlanır.
+    # Türkçe kurallarla çakışan eski adlara "ad (2)" biçiminde sonek eklenir.
+    rows = [tuple(r) for r in cur.execute("SELECT id, user_id, name FROM habits ORDER BY id").fetchall()]
+    taken = {(user_id, fold(name)) for _, user_id, name in rows}
+    seen = set()
+    for habit_id, user_id, name in rows:
+        if (user_id, fold(name)) not in seen:
+            seen.add((user_id, fold(name)))
+            continue
+        n = 2
+        while (user_id, fold(f"{name} ({n})")) in taken:
+            n += 1
+        renamed = f"{name} ({n})"
+        taken.add((user_id, fold(renamed)))
+        seen.add((user_id, fold(renamed)))
+        cur.execute("UPDATE habits SET name = ? WHERE id = ?", (renamed, habit_id))
+
+    # SQLite kısıt kaldıramaz, tablo yeniden kurulur. habits üzerindeki tetikleyiciler tabloyla silinir;
+    # habits'e başvuran completions tetikleyicileri de yeniden adlandırmadan önce kaldırılmalı
+    for trigger in POINTS_TRIGGERS:
+        cur.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    cur.execute("""
+    CREATE TABLE habits_new (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+        name TEXT COLLATE NOCASE,
+        category TEXT,
+        frequency TEXT,
+        created_at DATE
+    );
+    """)
+    cur.execute("""INSERT INTO habits_new (id, user_id, name, category, frequency, created_at)
+                   SELECT id, user_id, name, category, frequency, created_at FROM habits""")
+    cur.execute("DROP TABLE habits")
+    cur.execute("ALTER TABLE habits_new RENAME TO habits")
+    cur.execute("CREATE INDEX idx_habits_user ON habits(user_id)")
+    cur.execute("CREATE UNIQUE INDEX idx_habits_name_key ON habits(user_id, tr_fold(name))")
+    _create_fts_triggers(cur)
+    _create_points_triggers(cur, EPOCH_DAY, archive=True)
+
+
+MIGRATIONS = [
+    (1, initial_schema),
+    (2, cascades_and_indexes),
+    (3, leaderboard),
+    (4, meta_table),
+    (5, integer_dates),
+    (6, habit_search),
+    (7, completion_archive),
+    (8, turkish_unique_names),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    version = schema_version(conn)
+    pending = [(target, step) for target, step in MIGRATIONS if target > version]
+    if not pending:
+        return version
+    # Tablo yeniden kurulumları sırasında FK kontrolü kapalı olmalı
+    conn.commit()
+    conn.execute("PRAGMA foreign_keys = OFF")
+    try:
+        for target, step in pending:
+            cur = conn.cursor()
+            cur.execute("BEGIN")
+            try:
+                step(cur)
+                problems = cur.execute("PRAGMA foreign_key_check").fetchall()
+                if problems:
+                    raise sqlite3.IntegrityError(f"Migration {target}: foreign key check failed")
+                cur.execute(f"PRAGMA user_version = {target}")
+            except Exception:
+                conn.rollback()
+                raise
+            conn.commit()
+            version = target
+    finally:
+        conn.execute("PRAGMA foreign_keys = ON")
+    return version
+
+
+# ---------------------------
+# Query plan checks
+# ---------------------------
+# Database içindeki sıcak sorgular; hiçbiri tam tablo taraması yapmamalı.
+# Metinler Database'in çalıştırdığı SQL ile birebir aynı tutulur (tests/test_query_plans.py denetler).
+QUERY_PLAN_CHECKS = {
+    "get_user_by_email": ("SELECT id, username, email, password_hash, total_points FROM users WHERE email = ?",
+                          ("a@b.c",)),
+    "list_habits": ("SELECT id, user_id, name, category, frequency, created_at FROM habits WHERE user_id = ?", (1,)),
+    "list_habits_page": ("SELECT id, user_id, name, category, frequency, created_at FROM habits "
+                         "WHERE user_id = ? AND id > ? ORDER BY id LIMIT ?", (1, 0, 256)),
+    "habit_name_exists": ("SELECT 1 FROM habits INDEXED BY idx_habits_name_key "
+                          "WHERE user_id = ? AND tr_fold(name) = ? AND id IS NOT ? LIMIT 1", (1, "koşu", None)),
+    "search_habits": ("SELECT id, user_id, name, category, frequency, created_at FROM habits WHERE user_id = ? "
+                      "AND id IN (SELECT rowid FROM habits_fts WHERE habits_fts MATCH ?) ORDER BY id LIMIT ?",
+                      (1, '"ko"*', 1000)),
+    "completion_count_for_habit": ("SELECT (SELECT COUNT(*) FROM completions WHERE habit_id = ?) "
+                                   "+ (SELECT COALESCE(SUM(count), 0) FROM completion_archive WHERE habit_id = ?) "
+                                   "AS cnt", (1, 1)),
+    "is_completed": ("SELECT 1 FROM completions WHERE habit_id = ? AND date = ?", (1, 19723)),
+    "is_completed archive": ("SELECT bits FROM completion_archive WHERE habit_id = ? AND year = ?", (1, 2024)),
+    "completions_for_habit": ("SELECT date FROM completions WHERE habit_id = ? ORDER BY date", (1,)),
+    "completions_for_habit archive": ("SELECT year, bits FROM completion_archive WHERE habit_id = ? ORDER BY year",
+                                      (1,)),
+    "completions_between": ("SELECT date FROM completions WHERE habit_id = ? "
+                            "AND date BETWEEN ? AND ? ORDER BY date", (1, 19723, 19753)),
+    "completions_between archive": ("SELECT year, bits FROM completion_archive WHERE habit_id = ? "
+                                    "AND year BETWEEN ? AND ? ORDER BY year", (1, 2020, 2024)),
+    "completion_columns": ("SELECT c.habit_id, c.date FROM completions c JOIN habits h ON h.id = c.habit_id "
+                           "WHERE h.user_id = ? ORDER BY h.id, c.date", (1,)),
+    "completion_columns archive": ("SELECT a.habit_id, a.year, a.bits FROM habits h "
+                                   "JOIN completion_archive a ON a.habit_id = h.id WHERE h.user_id = ?", (1,)),
+    "completion_counts_between": ("SELECT c.date, COUNT(*) AS n FROM habits h JOIN completions c "
+                                  "ON c.habit_id = h.id WHERE h.user_id = ? AND c.date BETWEEN ? AND ? "
+                                  "GROUP BY c.date", (1, 19723, 20088)),
+    "completion_counts_between archive": ("SELECT a.year, a.bits FROM habits h JOIN completion_archive a "
+                                          "ON a.habit_id = h.id WHERE h.user_id = ? AND a.year BETWEEN ? AND ?",
+                                          (1, 2024, 2025)),
+    "schedule_rows": ("SELECT h.id, h.name, h.frequency, h.created_at, (SELECT MAX(d) FROM ("
+                      "SELECT MAX(c.date) AS d FROM completions c WHERE c.habit_id = h.id AND c.date <= ? "
+                      "UNION ALL SELECT * FROM (SELECT year_start(a.year) + bitmap_last(a.bits) "
+                      "FROM completion_archive a WHERE a.habit_id = h.id ORDER BY a.year DESC LIMIT 1))) "
+                      "AS last_date FROM habits h WHERE h.user_id = ?", (20000, 1)),
+    "unmark last_date": ("SELECT MAX(d) AS last FROM (SELECT MAX(date) AS d FROM completions WHERE habit_id = ? "
+                         "UNION ALL SELECT * FROM (SELECT year_start(year) + bitmap_last(bits) "
+                         "FROM completion_archive WHERE habit_id = ? ORDER BY year DESC LIMIT 1))", (1, 1)),
+    "points_drift": ("SELECT u.id, u.username, u.total_points AS stored, COALESCE(t.n, 0) AS actual "
+                     "FROM users u LEFT JOIN (SELECT user_id, SUM(n) AS n FROM ("
+                     "SELECT h.user_id, COUNT(*) AS n FROM completions c JOIN habits h ON h.id = c.habit_id "
+                     "WHERE h.user_id IN (?) GROUP BY h.user_id UNION ALL "
+                     "SELECT h.user_id, SUM(a.count) FROM completion_archive a JOIN habits h ON h.id = a.habit_id "
+                     "WHERE h.user_id IN (?) GROUP BY h.user_id) GROUP BY user_id) t ON t.user_id = u.id "
+                     "WHERE u.total_points IS NOT COALESCE(t.n, 0) AND u.id IN (?)", (1, 1, 1)),
+    "streak_for_habit": ("SELECT s.current_streak, s.longest_streak, s.last_date, h.frequency "
+                         "FROM habit_streaks s JOIN habits h ON h.id = s.habit_id WHERE s.habit_id = ?", (1,)),
+    "leaderboard": ("SELECT id, username, total_points FROM users "
+                    "ORDER BY total_points DESC, id LIMIT ? OFFSET ?", (10, 0)),
+    "leaderboard top_k": ("SELECT id, total_points FROM users ORDER BY total_points DESC, id LIMIT ?", (100,)),
+    "leaderboard usernames": ("SELECT id, username FROM users WHERE id IN (?)", (1,)),
+    "leaderboard period": ("SELECT p.user_id, u.username, p.points FROM period_points p "
+                           "JOIN users u ON u.id = p.user_id WHERE p.period = ? AND p.category = ? "
+                           "ORDER BY p.points DESC, p.user_id LIMIT ? OFFSET ?", ("all", "Spor", 10, 0)),
+    "user_rank points": ("SELECT total_points FROM users WHERE id = ?", (1,)),
+    "user_rank": ("SELECT (SELECT COUNT(*) FROM users WHERE total_points > ?) "
+                  "+ (SELECT COUNT(*) FROM users WHERE total_points = ? AND id < ?)", (10, 10, 1)),
+    "user_rank period points": ("SELECT points FROM period_points WHERE period = ? AND category = ? AND user_id = ?",
+                                ("all", "Spor", 1)),
+    "user_rank period": ("SELECT (SELECT COUNT(*) FROM period_points WHERE period = ? AND category = ? AND points > ?) "
+                         "+ (SELECT COUNT(*) FROM period_points WHERE period = ? AND category = ? AND points = ? "
+                         "AND user_id < ?)", ("all", "Spor", 10, "all", "Spor", 10, 1)),
+}
+
+
+# Kaçınılmaz ve küçük adımlar: sonuç kümesi tek kullanıcının satırlarıyla sınırlı
+ALLOWED_STEPS = {
+    # Günler birden çok alışkanlıktan gelir, indeks sırası gün sırası değildir
+    "completion_counts_between": ("USE TEMP B-TREE FOR GROUP BY",),
+    # Canlı ve arşiv toplamlarının birleşimi kullanıcıya göre gruplanır
+    "points_drift": ("USE TEMP B-TREE FOR GROUP BY",),
+}
+
+
+def explain(conn, sql, params=()):
+    return [row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()]
+
+
+def check_query_plans(conn):
+    # {sorgu adı: plan} döner; indekssiz tarama ya da geçici sıralama içeren planlar hatalıdır
+    # (FTS5 sanal tablo "SCAN"ları kendi dizinini, alt sorgu "SCAN"ları önceden kurulan sonucu,
+    # "SCAN CONSTANT ROW" FROM'suz dış SELECT'in tek satırını okur)
+    failures = {}
+    for name, (sql, params) in QUERY_PLAN_CHECKS.items():
+        plan = explain(conn, sql, params)
+        subqueries = {step.split(" ", 1)[1] for step in plan if step.startswith(("MATERIALIZE ", "CO-ROUTINE "))}
+        allowed = ALLOWED_STEPS.get(name, ())
+        bad = [step for step in plan
+               if step not in allowed
+               and ((step.startswith("SCAN") and "USING" not in step and "VIRTUAL TABLE" not in step
+                     and step != "SCAN CONSTANT ROW"
+                     and step.split(" ")[1] not in subqueries)
+                    or "TEMP B-TREE" in step)]
+        if bad:
+            failures[name] = plan
+    return failures
+
+
+if __name__ == "__main__":
+    conn = sqlite3.connect(sys.argv[1] if len(sys.argv) > 1 else "habit_tracker.db")
+    register_functions(conn)
+    register_bitmap_functions(conn)
+    print("Şema sürümü:", migrate(conn))
+    for name, (sql, params) in QUERY_PLAN_CHECKS.items():
+        print(f"{name}: {' | '.join(explain(conn, sql, params))}")
+    failures = check_query_plans(conn)
+    if failures:
+        print("İndeks kullanmayan sorgular:", ", ".join(failures))
+        sys.exit(1)
@@ -0,0 +1,226 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from cache import LRUCache
+
+# Saklanan biçimler ("$" ile ayrılır, sürüm ilk alandadır):
+#   scrypt$<log2 n>$<r>$<p>$<tuz>$<özet>
+#   pbkdf2_sha256$<tekrar>$<tuz>$<özet>
+#   64 hex karakter: eski tuzsuz SHA-256 (yalnızca doğrulanır, girişte yeniden özetlenir)
+SCRYPT = "scrypt"
+PBKDF2 = "pbkdf2_sha256"
+LEGACY = "sha256"
+# OpenSSL scrypt'siz derlenmişse PBKDF2 kullanılır
+SCHEME = SCRYPT if hasattr(hashlib, "scrypt") else PBKDF2
+
+# Tek bir özetin hedef süresi (ms); maliyet bu süreye göre ölçülür
+TARGET_MS = 250
+SALT_BYTES = 16
+HASH_BYTES = 32
+SCRYPT_R = 8
+SCRYPT_P = 1
+# scrypt belleği 128 * r * n bayt: 2^14 -> 16 MB, 2^17 -> 128 MB
+MIN_LOG_N = 14
+MAX_LOG_N = 17
+MIN_ITERATIONS = 200_000
+MAX_ITERATIONS = 5_000_000
+# Kalibrasyonda her maliyet bu kadar ölçülür, ortanca süre kullanılır
+CALIBRATION_RUNS = 3
+# PBKDF2 özeti ancak tekrar sayısı güncel ayarın bu kadar altındaysa yenilenir (ölçüm gürültüsü)
+REHASH_FACTOR = 2
+# Ölçülen parametrelerin meta anahtarı; süreçler aynı hedefi paylaşır
+PARAMS_KEY = "password_params"
+
+_params = None
+_store = None
+_params_lock = threading.Lock()
+_executor = None
+_executor_lock = threading.Lock()
+
+# Başarılı doğrulamalar: (saklanan özet, parola) çiftinin bu sürece özgü HMAC'i.
+# Parola saklanmaz; aynı oturumda yeniden girişte KDF tekrar çalıştırılmaz.
+_CACHE_KEY = os.urandom(32)
+verified = LRUCache(256)
+
+
+def _b64(data):
+    return base64.b64encode(data).decode("ascii").rstrip("=")
+
+
+def _unb64(text):
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+
+def _scrypt(password, salt, log_n, r, p):
+    n = 1 << log_n
+    return hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=r, p=p,
+                          maxmem=256 * r * n, dklen=HASH_BYTES)
+
+
+def _pbkdf2(password, salt, iterations):
+    return hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations, HASH_BYTES)
+
+
+# ---------------------------
+# Cost calibration
+# ---------------------------
+def _median_ms(func, *args, runs=CALIBRATION_RUNS):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        func(*args)
+        timings.append((time.perf_counter() - started) * 1000.0)
+    return sorted(timings)[len(timings) // 2]
+
+
+def calibrate(target_ms=TARGET_MS, scheme=SCHEME):
+    # Hedef süreye ulaşana kadar maliyet ikiye katlanır; sonuç sınırlar içinde kalır
+    salt = os.urandom(SALT_BYTES)
+    if scheme == SCRYPT:
+        log_n = MIN_LOG_N
+        while log_n < MAX_LOG_N:
+            if _median_ms(_scrypt, "kalibrasyon", salt, log_n, SCRYPT_R, SCRYPT_P) * 2 > target_ms:
+                break
+            log_n += 1
+        return {"scheme": SCRYPT, "log_n": log_n, "r": SCRYPT_R, "p": SCRYPT_P}
+    # PBKDF2 süresi tekrar sayısıyla doğrusal
+    elapsed = _median_ms(_pbkdf2, "kalibrasyon", salt, MIN_ITERATIONS)
+    iterations = int(MIN_ITERATIONS * target_ms / max(elapsed, 1e-3))
+    return {"scheme": PBKDF2, "iterations": max(MIN_ITERATIONS, min(iterations, MAX_ITERATIONS))}
+
+
+def _stored_params(db):
+    # Saklı parametreler yalnızca bu kurulumda kullanılabilir şemadaysa geçerlidir
+    try:
+        params = json.loads(db.get_meta(PARAMS_KEY) or "null")
+    except ValueError:
+        return None
+    if not isinstance(params, dict) or params.get("scheme") != SCHEME:
+        return None
+    return params
+
+
+def use_store(db):
+    # Parametreler bu veritabanının meta tablosundan okunur; yoksa bir kez ölçülüp oraya yazılır
+    global _params, _store
+    with _params_lock:
+        _store = db
+        _params = None
+
+
+def current_params():
+    # İlk yeni özette bir kez yüklenir ya da ölçülür (worker thread'inde); doğrulama saklanan parametreleri kullanır
+    global _params
+    with _params_lock:
+        if _params is None:
+            _params = _stored_params(_store) if _store is not None else None
+            if _params is None:
+                _params = calibrate()
+                if _store is not None:
+                    _store.set_meta(PARAMS_KEY, json.dumps(_params))
+                    _store.flush()
+        return _params
+
+
+def set_params(params):
+    global _params
+    with _params_lock:
+        _params = params
+
+
+# ---------------------------
+# Hash / verify
+# ---------------------------
+def hash_password(password, params=None):
+    params = params or current_params()
+    salt = os.urandom(SALT_BYTES)
+    if params["scheme"] == SCRYPT:
+        digest = _scrypt(password, salt, params["log_n"], params["r"], params["p"])
+        return f"{SCRYPT}${params['log_n']}${params['r']}${params['p']}${_b64(salt)}${_b64(digest)}"
+    digest = _pbkdf2(password, salt, params["iterations"])
+    return f"{PBKDF2}${params['iterations']}${_b64(salt)}${_b64(digest)}"
+
+
+def parse(stored):
+    # (parametreler, tuz, özet) döner; tanınmayan biçimde ValueError
+    parts = stored.split("$")
+    if parts[0] == SCRYPT and len(parts) == 6:
+        params = {"scheme": SCRYPT, "log_n": int(parts[1]), "r": int(parts[2]), "p": int(parts[3])}
+        return params, _unb64(parts[4]), _unb64(parts[5])
+    if parts[0] == PBKDF2 and len(parts) == 4:
+        return {"scheme": PBKDF2, "iterations": int(parts[1])}, _unb64(parts[2]), _unb64(parts[3])
+    if len(parts) == 1 and len(stored) == 64:
+        return {"scheme": LEGACY}, b"", bytes.fromhex(stored)
+    raise ValueError("tanınmayan parola özeti biçimi")
+
+
+def _cache_key(password, stored):
+    return hmac.new(_CACHE_KEY, stored.encode("utf-8") + b"\0" + password.encode("utf-8"),
+                    hashlib.sha256).digest()
+
+
+def verify_password(password, stored, use_cache=True):
+    if not stored:
+        return False
+    key = _cache_key(password, stored) if use_cache else None
+    if key is not None and verified.get(key) is True:
+        return True
+    try:
+        params, salt, expected = parse(stored)
+    except ValueError:
+        return False
+    if params["scheme"] == SCRYPT:
+        digest = _scrypt(password, salt, params["log_n"], params["r"], params["p"])
+    elif params["scheme"] == PBKDF2:
+        digest = _pbkdf2(password, salt, params["iterations"])
+    else:
+        digest = hashlib.sha256(password.encode("utf-8")).digest()
+    ok = hmac.compare_digest(digest, expected)
+    if ok and key is not None:
+        verified.put(key, True)
+    return ok
+
+
+def needs_rehash(stored):
+    # Eski biçim, farklı şema ya da güncel ayardan belirgin düşük maliyet (bir log_n adımı, REHASH_FACTOR kat)
+    try:
+        params = parse(stored)[0]
+    except ValueError:
+        return True
+    current = current_params()
+    if params["scheme"] != current["scheme"]:
+        return True
+    if params["scheme"] == SCRYPT:
+        return params["log_n"] < current["log_n"] or params["r"] < current["r"]
+    return params["iterations"] * REHASH_FACTOR < current["iterations"]
+
+
+def check(password, stored):
+    # Giriş için: (doğru mu, yeni özet ya da None). Yeni özet verilirse saklanan değer değiştirilmeli.
+    if not verify_password(password, stored):
+        return False, None
+    return True, hash_password(password) if needs_rehash(stored) else None
+
+
+# ---------------------------
+# Background execution
+# ---------------------------
+def executor():
+    # KDF'ler GIL'i bırakır; thread havuzu arayüzü kilitlemeden ve süreç başlatmadan yeterli
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1),
+                                           thread_name_prefix="passwords")
+        return _executor
+
+
+def verify_many(pairs, pool=None):
+    # pairs: (parola, saklanan özet); toplu içe aktarma doğrulaması, sonuçlar aynı sırada
+    pool = pool or executor()
+    return list(pool.map(lambda pair: verify_password(*pair, use_cache=False), pairs))
@@ -0,0 +1,48 @@
+import time
+
+# Son uzlaştırmada görülen en büyük completions.id
+HIGH_WATER_KEY = "reconcile_completion_id"
+BATCH_SIZE = 500
+
+
+def reconcile(db, incremental=False, apply=True, batch_size=BATCH_SIZE):
+    # incremental: yalnızca son çalıştırmadan bu yana tamamlama eklenen kullanıcılar denetlenir.
+    # Silmeler işareti ilerletmez; onlardan doğan sapmalar tam çalıştırmada bulunur.
+    started = time.perf_counter()
+    high_water = db.max_completion_id()
+    mark = db.get_meta(HIGH_WATER_KEY) if incremental else None
+    if mark is None:
+        mode, user_ids = "full", None
+    else:
+        mode, user_ids = "incremental", db.users_with_completions_after(mark)
+
+    drift = [] if user_ids == [] else db.points_drift(user_ids)
+    report = {
+        "mode": mode,
+        "checked": None if user_ids is None else len(user_ids),
+        "drift": [{"user_id": r["id"], "username": r["username"], "stored": r["stored"],
+                   "actual": r["actual"], "diff": (r["stored"] or 0) - r["actual"]} for r in drift],
+        "fixed": 0,
+        "high_water_mark": high_water,
+    }
+    if apply:
+        ids = [r["id"] for r in drift]
+        for i in range(0, len(ids), batch_size):
+            report["fixed"] += len(db.fix_points(ids[i:i + batch_size]))
+        db.set_meta(HIGH_WATER_KEY, high_water)
+        db.flush()
+    report["elapsed_ms"] = (time.perf_counter() - started) * 1000.0
+    return report
+
+
+def format_report(report, limit=20):
+    checked = "tüm" if report["checked"] is None else report["checked"]
+    lines = [f"Uzlaştırma ({'artımlı' if report['mode'] == 'incremental' else 'tam'}): "
+             f"{checked} kullanıcı denetlendi, {len(report['drift'])} farklı, "
+             f"{report['fixed']} düzeltildi ({report['elapsed_ms']:.1f} ms)."]
+    for d in report["drift"][:limit]:
+        lines.append(f"  {d['username']} (#{d['user_id']}): kayıtlı {d['stored']}, gerçek {d['actual']} "
+                     f"({d['diff']:+d})")
+    if len(report["drift"]) > limit:
+        lines.append(f"  ... ve {len(report['drift']) - limit} kullanıcı daha")
+    return "\n".join(lines)
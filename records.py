@@ -0,0 +1,132 @@
+from operator import attrgetter
+from streaks import to_date
+
+
+# ---------------------------
+# Typed records
+# ---------------------------
+class Record:
+    # sqlite3.Row yerine: alanlar __slots__'ta, tarihler okunurken çözülür.
+    # row["ad"] ve row[0] erişimi, keys() ve dict(row) eski çağrı yerleri için korunur.
+    __slots__ = ()
+    COLUMNS = ""
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Anahtarla erişim için alan adı -> okuyucu; __slots__ dışındaki adlar erişilemez
+        cls._getters = {name: attrgetter(name) for name in cls.__slots__}
+
+    @classmethod
+    def from_row(cls, cursor, row):
+        # cursor.row_factory olarak kullanılır; sorgu COLUMNS sırasıyla seçmelidir
+        return cls(*row)
+
+    def keys(self):
+        return list(self.__slots__)
+
+    def __getitem__(self, key):
+        try:
+            return self._getters[key](self)
+        except KeyError:
+            if isinstance(key, int):
+                return getattr(self, self.__slots__[key])
+            raise IndexError(f"No item with that key: {key}") from None
+
+    def __iter__(self):
+        return (getattr(self, name) for name in self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and tuple(self) == tuple(other)
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class User(Record):
+    __slots__ = ("id", "username", "email", "password_hash", "total_points")
+    COLUMNS = "id, username, email, password_hash, total_points"
+
+    def __init__(self, id, username, email, password_hash, total_points):
+        self.id = id
+        self.username = username
+        self.email = email
+        self.password_hash = password_hash
+        self.total_points = total_points
+
+
+class Habit(Record):
+    __slots__ = ("id", "user_id", "name", "category", "frequency", "created_at")
+    COLUMNS = "id, user_id, name, category, frequency, created_at"
+
+    def __init__(self, id, user_id, name, category, frequency, created_at):
+        self.id = id
+        self.user_id = user_id
+        self.name = name
+        self.category = category
+        self.frequency = frequency
+        self.created_at = to_date(created_at)
+
+
+# Tamamlamalar kayıt nesnesi olmadan okunur: sıcak yollar gün numarası listeleri ya da
+# (habit_id, gün) tuple'ları döner, arşivlenmiş günlerin satırı yoktur (bkz. archive.py)
+
+
+# ---------------------------
+# Generic rows
+# ---------------------------
+class Row:
+    # Tipli kaydı olmayan sorgular (sayımlar, sıralamalar, birleşimler) için.
+    # Sütun adı -> konum sözlüğü aynı sorgunun tüm satırlarınca paylaşılır.
+    __slots__ = ("_index", "_values")
+
+    def __init__(self, index, values):
+        self._index = index
+        self._values = values
+
+    def keys(self):
+        return list(self._index)
+
+    def __getitem__(self, key):
+        try:
+            return self._values[self._index[key]]
+        except KeyError:
+            if isinstance(key, int):
+                return self._values[key]
+            raise IndexError(f"No item with that key: {key}") from None
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __eq__(self, other):
+        return isinstance(other, Row) and self.keys() == other.keys() and self._values == other._values
+
+    def __hash__(self):
+        return hash(self._values)
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={value!r}" for name, value in zip(self._index, self._values))
+        return f"Row({fields})"
+
+
+# Son görülen cursor.description ve indeksi; bir sorgunun tüm satırları aynı description nesnesini paylaşır
+_last = (None, None)
+
+
+def row_factory(cursor, row):
+    global _last
+    description, index = _last
+    if cursor.description is not description:
+        description = cursor.description
+        index = {column[0]: i for i, column in enumerate(description)}
+        _last = (description, index)
+    return Row(index, row)
@@ -0,0 +1,98 @@
+from PyQt5 import QtWidgets
+import analytics
+
+
+class ReportsView(QtWidgets.QWidget):
+    # Rapor worker thread'de hesaplanır; veri değiştiğinde yalnızca "eski" olarak işaretlenir
+
+    def __init__(self, adb, user_id, parent=None):
+        super().__init__(parent)
+        self.adb = adb
+        self.user_id = user_id
+        self.stale = True
+        self.setup_ui()
+
+    def setup_ui(self):
+        layout = QtWidgets.QVBoxLayout(self)
+        controls = QtWidgets.QHBoxLayout()
+        self.refresh_btn = QtWidgets.QPushButton("Yenile")
+        self.summary_label = QtWidgets.QLabel("-")
+        controls.addWidget(self.refresh_btn)
+        controls.addWidget(self.summary_label)
+        controls.addStretch()
+        layout.addLayout(controls)
+
+        self.habits_table = self._make_table(["Alışkanlık", "Kategori", "Sıklık", "Tamamlama",
+                                              "Oran", "Son 7 gün", "Son 30 gün", "En uzun seri"])
+        self.categories_table = self._make_table(["Kategori", "Alışkanlık", "Tamamlama", "Oran"])
+        self.weekday_table = self._make_table(["Gün", "Tamamlama"])
+        self.daily_label = QtWidgets.QLabel("-")
+
+        splitter = QtWidgets.QSplitter()
+        splitter.addWidget(self.categories_table)
+        splitter.addWidget(self.weekday_table)
+        layout.addWidget(self.habits_table, 2)
+        layout.addWidget(splitter, 1)
+        layout.addWidget(self.daily_label)
+
+        self.refresh_btn.clicked.connect(self.refresh)
+        if not analytics.available():
+            self.refresh_btn.setEnabled(False)
+            self.summary_label.setText("Raporlar için numpy gerekli (pip install numpy).")
+
+    @staticmethod
+    def _make_table(headers):
+        table = QtWidgets.QTableWidget(0, len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        table.verticalHeader().hide()
+        table.horizontalHeader().setSectionResizeMode(0, QtWidgets.QHeaderView.Stretch)
+        return table
+
+    # ---------------------------
+    # Loading
+    # ---------------------------
+    def invalidate(self):
+        self.stale = True
+        if self.isVisible():
+            self.refresh()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.stale:
+            self.refresh()
+
+    def refresh(self):
+        if not analytics.available():
+            return
+        self.stale = False
+        self.summary_label.setText("Hesaplanıyor...")
+        user_id = self.user_id
+        self.adb.run(lambda db: analytics.build_report(db, user_id), callback=self.show_report,
+                     coalesce="report")
+
+    # ---------------------------
+    # Rendering
+    # ---------------------------
+    def show_report(self, report):
+        self.summary_label.setText(f"{len(report['habits'])} alışkanlık, "
+                                   f"{report['elapsed_ms']:.0f} ms içinde hesaplandı.")
+        self._fill(self.habits_table, [
+            [h["name"], h["category"], h["frequency"], str(h["completions"]), f"%{h['rate'] * 100:.0f}",
+             f"%{h['rate_7'] * 100:.0f}", f"%{h['rate_30'] * 100:.0f}", str(h["longest_streak"])]
+            for h in report["habits"]])
+        self._fill(self.categories_table, [
+            [c["category"], str(c["habits"]), str(c["completions"]), f"%{c['rate'] * 100:.0f}"]
+            for c in report["categories"]])
+        self._fill(self.weekday_table, [[day, str(count)] for day, count in report["weekday"].items()])
+        daily = report["daily"]
+        if daily["rolling_7"]:
+            self.daily_label.setText(f"Günlük ortalama tamamlama — son 7 gün: {daily['rolling_7'][-1]:.2f}, "
+                                     f"son 30 gün: {daily['rolling_30'][-1]:.2f}")
+
+    @staticmethod
+    def _fill(table, rows):
+        table.setRowCount(len(rows))
+        for r, values in enumerate(rows):
+            for c, value in enumerate(values):
+                table.setItem(r, c, QtWidgets.QTableWidgetItem(value))
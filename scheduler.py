@@ -0,0 +1,136 @@
+import datetime
+import heapq
+import itertools
+from streaks import DAILY, WEEKLY, MONTHLY, period_index, to_date
+
+DUE = "due"
+OVERDUE = "overdue"
+DONE = "done"
+STATUS_LABELS = {DUE: "Bekliyor", OVERDUE: "Gecikti", DONE: "Tamamlandı"}
+
+# Olay türleri: yeni dönem başladı / dönemin son günü hatırlatması
+PERIOD_START = "period_start"
+DEADLINE = "deadline"
+
+
+def next_period_start(day, frequency):
+    day = to_date(day)
+    if frequency == WEEKLY:
+        return day + datetime.timedelta(days=7 - day.weekday())
+    if frequency == MONTHLY:
+        return datetime.date(day.year + day.month // 12, day.month % 12 + 1, 1)
+    return day + datetime.timedelta(days=1)
+
+
+def habit_status(frequency, created_at, last_date, today):
+    # last_date: bugüne kadarki son tamamlama (gelecek tarihli kayıtlar sayılmaz)
+    current = period_index(today, frequency)
+    if last_date is not None and period_index(last_date, frequency) >= current:
+        return DONE
+    if last_date is not None and period_index(last_date, frequency) == current - 1:
+        return DUE
+    if last_date is None and (created_at is None or period_index(created_at, frequency) >= current):
+        return DUE
+    return OVERDUE
+
+
+class Scheduler:
+    # Alışkanlık başına bir sonraki olay zamanı bir öncelik kuyruğunda tutulur.
+    # Eskiyen kuyruk girdileri silinmez, sürüm numarasıyla ayıklanır.
+
+    def __init__(self, remind_at=datetime.time(20, 0)):
+        self.remind_at = remind_at
+        self.habits = {}
+        self._heap = []
+        self._versions = {}
+        self._seq = itertools.count()
+
+    def load(self, rows, now=None):
+        self.habits.clear()
+        self._heap.clear()
+        self._versions.clear()
+        for row in rows:
+            self.update(row, now)
+
+    def update(self, row, now=None):
+        habit_id = row["id"]
+        self.habits[habit_id] = {
+            "id": habit_id,
+            "name": row["name"],
+            "frequency": row["frequency"] or DAILY,
+            "created_at": to_date(row["created_at"]),
+            "last_date": to_date(row["last_date"]),
+        }
+        self._schedule(habit_id, now)
+
+    def remove(self, habit_id):
+        self.habits.pop(habit_id, None)
+        self._versions[habit_id] = self._versions.get(habit_id, 0) + 1
+
+    def on_completion(self, habit_id, date_, now=None):
+        # Yalnızca ekleme; geri almada son tarih bilinmediğinden satır yeniden okunmalı
+        habit = self.habits.get(habit_id)
+        now = now or datetime.datetime.now()
+        date_ = to_date(date_)
+        if habit is None or date_ > now.date():
+            return
+        if habit["last_date"] is None or date_ > habit["last_date"]:
+            habit["last_date"] = date_
+            self._schedule(habit_id, now)
+
+    # ---------------------------
+    # Queries
+    # ---------------------------
+    def status(self, habit_id, today=None):
+        habit = self.habits[habit_id]
+        return habit_status(habit["frequency"], habit["created_at"], habit["last_date"],
+                            today or datetime.date.today())
+
+    def due(self, today=None):
+        # Gecikenler önce, sonra ada göre
+        today = today or datetime.date.today()
+        result = []
+        for habit in self.habits.values():
+            status = habit_status(habit["frequency"], habit["created_at"], habit["last_date"], today)
+            if status != DONE:
+                result.append((habit, status))
+        result.sort(key=lambda item: (item[1] != OVERDUE, item[0]["name"].lower()))
+        return result
+
+    def next_time(self):
+        while self._heap and self._stale(self._heap[0]):
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def pop_events(self, now=None):
+        # Zamanı gelen olaylar: (tür, alışkanlık); her alışkanlık yeniden zamanlanır
+        now = now or datetime.datetime.now()
+        events = []
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            if self._stale(entry):
+                continue
+            habit_id, kind = entry[2], entry[4]
+            events.append((kind, self.habits[habit_id]))
+            self._schedule(habit_id, now)
+        return events
+
+    # ---------------------------
+    # Internals
+    # ---------------------------
+    def _stale(self, entry):
+        return entry[2] not in self.habits or self._versions.get(entry[2]) != entry[3]
+
+    def _schedule(self, habit_id, now=None):
+        now = now or datetime.datetime.now()
+        habit = self.habits[habit_id]
+        today = now.date()
+        next_start = datetime.datetime.combine(next_period_start(today, habit["frequency"]), datetime.time())
+        when, kind = next_start, PERIOD_START
+        if self.status(habit_id, today) != DONE:
+            deadline = datetime.datetime.combine(next_start.date() - datetime.timedelta(days=1), self.remind_at)
+            if deadline > now:
+                when, kind = deadline, DEADLINE
+        version = self._versions.get(habit_id, 0) + 1
+        self._versions[habit_id] = version
+        heapq.heappush(self._heap, (when, next(self._seq), habit_id, version, kind))
@@ -0,0 +1,23 @@
+import re
+
+# str.lower() Türkçe değildir: "I" -> "i" ve "İ" -> "i̇" (noktalı i + birleşik nokta) yapar
+_TURKISH_UPPER = str.maketrans({"I": "ı", "İ": "i"})
+_WORD = re.compile(r"\w+")
+
+
+def fold(text):
+    # Türkçe kurallarıyla küçük harf; ad karşılaştırması ve arama dizini bu biçimi kullanır
+    if text is None:
+        return None
+    return text.translate(_TURKISH_UPPER).lower()
+
+
+def fts_query(text):
+    # Yazarken arama: her kelime önek olarak aranır, tümü eşleşmelidir (AND)
+    words = _WORD.findall(fold(text or ""))
+    return " ".join(f'"{w}"*' for w in words) or None
+
+
+def register_functions(conn):
+    # Tetikleyiciler ve ifade indeksi tr_fold'u kullanır; habits'e yazan her bağlantıda tanımlı olmalı
+    conn.create_function("tr_fold", 1, fold, deterministic=True)
@@ -0,0 +1,102 @@
+import builtins
+import sys
+import time
+
+
+class ImportTimer:
+    # -X importtime benzeri: ilk kez yüklenen her modül için kendi ve alt modüllerle toplam süre.
+    # builtins.__import__ sarılır; importlib.import_module ile yüklenenler çağıranın süresine yazılır.
+
+    def __init__(self):
+        self.records = []  # (modül, kendi ms, toplam ms)
+        self._children = []
+        self._original = None
+
+    def install(self):
+        self._original = builtins.__import__
+        builtins.__import__ = self._import
+
+    def uninstall(self):
+        if self._original is not None:
+            builtins.__import__ = self._original
+            self._original = None
+
+    def _label(self, name, fromlist):
+        if name not in sys.modules:
+            return name
+        # from paket import alt_modül: paket yüklü olsa da alt modül yeni yüklenebilir
+        missing = [f"{name}.{item}" for item in fromlist or ()
+                   if item != "*" and f"{name}.{item}" not in sys.modules]
+        return ", ".join(missing) or None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        label = None if level else self._label(name, fromlist)
+        if label is None:
+            return self._original(name, globals, locals, fromlist, level)
+        self._children.append(0.0)
+        started = time.perf_counter()
+        try:
+            return self._original(name, globals, locals, fromlist, level)
+        finally:
+            total = (time.perf_counter() - started) * 1000.0
+            children = self._children.pop()
+            if self._children:
+                self._children[-1] += total
+            self.records.append((label, total - children, total))
+
+    def slowest(self, limit=15):
+        return sorted(self.records, key=lambda r: r[2], reverse=True)[:limit]
+
+
+class StartupReport:
+    # Aşama süreleri başlangıçtan itibaren ölçülür; enabled değilse yalnızca kayıt tutulur, yazdırılmaz
+
+    def __init__(self, started, enabled=False):
+        self.started = started
+        self.enabled = enabled
+        self.marks = []  # (aşama, başlangıçtan itibaren ms)
+        self.imports = ImportTimer() if enabled else None
+        self.printed = False
+        if self.imports is not None:
+            self.imports.install()
+
+    def mark(self, label):
+        self.marks.append((label, (time.perf_counter() - self.started) * 1000.0))
+
+    def watch_first_paint(self, widget, label, on_done=None):
+        # İlk Paint olayı işlendikten sonra (olay döngüsüne dönüldüğünde) işaretlenir
+        from PyQt5 import QtCore
+        report = self
+
+        class FirstPaint(QtCore.QObject):
+            def eventFilter(self, obj, event):
+                if event.type() == QtCore.QEvent.Paint:
+                    obj.removeEventFilter(self)
+                    QtCore.QTimer.singleShot(0, done)
+                return False
+
+        def done():
+            report.mark(label)
+            if on_done is not None:
+                on_done()
+
+        widget.installEventFilter(FirstPaint(widget))
+
+    def format(self, limit=15):
+        lines = ["Başlangıç raporu (ms):"]
+        previous = 0.0
+        for label, at in self.marks:
+            lines.append(f"  {at:8.1f}  (+{at - previous:7.1f})  {label}")
+            previous = at
+        if self.imports is not None and self.imports.records:
+            lines.append(f"En yavaş içe aktarmalar (kendi / toplam ms), {len(self.imports.records)} modül:")
+            for name, own, total in self.imports.slowest(limit):
+                lines.append(f"  {own:8.1f} / {total:8.1f}  {name}")
+        return "\n".join(lines)
+
+    def print(self):
+        if self.enabled and not self.printed:
+            self.printed = True
+            if self.imports is not None:
+                self.imports.uninstall()
+            print(self.format(), file=sys.stderr)
@@ -0,0 +1,70 @@
+import datetime
+
+DAILY = "Günlük"
+WEEKLY = "Haftalık"
+MONTHLY = "Aylık"
+
+PERIOD_UNITS = {DAILY: "gün", WEEKLY: "hafta", MONTHLY: "ay"}
+
+
+# Tamamlama tarihleri veritabanında 1970-01-01'den bu yana gün sayısı (tamsayı) olarak tutulur
+EPOCH = datetime.date(1970, 1, 1)
+_EPOCH_ORDINAL = EPOCH.toordinal()
+
+
+def to_date(value):
+    if value is None or isinstance(value, datetime.date):
+        return value
+    if isinstance(value, int):
+        return from_day(value)
+    return datetime.date.fromisoformat(value)
+
+
+def to_day(value):
+    # date / ISO metin / gün sayısı -> gün sayısı
+    if value is None or isinstance(value, int):
+        return value
+    return to_date(value).toordinal() - _EPOCH_ORDINAL
+
+
+def from_day(day):
+    return None if day is None else datetime.date.fromordinal(day + _EPOCH_ORDINAL)
+
+
+def period_index(day, frequency):
+    if frequency == MONTHLY:
+        day = to_date(day)
+        return (day.year - EPOCH.year) * 12 + day.month - 1
+    day = to_day(day)
+    if frequency == WEEKLY:
+        # 1970-01-01 perşembe; +3 ile haftalar pazartesi başlar
+        return (day + 3) // 7
+    return day
+
+
+def compute_streaks(dates, frequency):
+    # dates: sıralı tamamlanma tarihleri (date ya da gün sayısı) -> (mevcut seri, en uzun seri, son tarih)
+    current = longest = 0
+    last_period = None
+    last_date = None
+    for d in dates:
+        p = period_index(d, frequency)
+        if p != last_period:
+            if last_period is not None and p == last_period + 1:
+                current += 1
+            else:
+                current = 1
+            longest = max(longest, current)
+            last_period = p
+        last_date = d
+    return current, longest, last_date
+
+
+def active_streak(current, last_date, frequency, today=None):
+    # Seri ancak içinde bulunulan dönem tamamlandıysa sayılır
+    if last_date is None:
+        return 0
+    today = today or datetime.date.today()
+    if period_index(last_date, frequency) != period_index(today, frequency):
+        return 0
+    return current
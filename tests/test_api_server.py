@@ -0,0 +1,74 @@
+import asyncio
+import json
+
+import pytest
+
+import passwords
+from api_server import ApiServer
+from database import Database
+
+
+@pytest.fixture
+def api(tmp_path):
+    db = Database(str(tmp_path / "api.db"))
+    user_id = db.create_user("a", "a@b.c", "x")
+    db.add_habit(user_id, "Koşu", None, "daily")
+    server = ApiServer(db, workers=2)
+    yield server
+    server.close()
+    db.close()
+    passwords.use_store(None)
+
+
+def request(method, target, body=None, headers=""):
+    data = b"" if body is None else json.dumps(body).encode()
+    if body is not None:
+        headers += f"Content-Length: {len(data)}\r\n"
+    return f"{method} {target} HTTP/1.1\r\nHost: x\r\n{headers}\r\n".encode() + data
+
+
+async def exchange(server, payload):
+    # İstekler tek seferde gönderilir; bağlantı kapanana dek gelen yanıtlar (durum, gövde) okunur
+    host, port = await server.start("127.0.0.1", 0)
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(payload)
+    await writer.drain()
+    responses = []
+    try:
+        while True:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 5)
+            lines = head.decode().split("\r\n")
+            headers = dict(line.lower().split(": ", 1) for line in lines[1:] if line)
+            length = int(headers["content-length"])
+            body = await reader.readexactly(length) if length else b""
+            responses.append((int(lines[0].split(" ")[1]), json.loads(body) if body else None))
+            if headers["connection"] == "close":
+                break
+    finally:
+        writer.close()
+        server._server.close()
+        await server._server.wait_closed()
+    return responses
+
+
+def test_pipelined_writes_apply_in_order(api):
+    payload = b"".join([request("POST", "/habits/1/completions", {"date": "2026-10-18"}),
+                        request("DELETE", "/habits/1/completions/2026-10-18"),
+                        request("GET", "/habits/1/completions"),
+                        request("POST", "/habits/1/completions", {"date": "2026-10-19"}),
+                        request("GET", "/habits/1/completions", headers="Connection: close\r\n")])
+    responses = asyncio.run(exchange(api, payload))
+    assert responses == [(201, {"habit_id": 1, "date": "2026-10-18", "created": True}), (204, None),
+                         (200, []), (201, {"habit_id": 1, "date": "2026-10-19", "created": True}),
+                         (200, ["2026-10-19"])]
+
+
+@pytest.mark.parametrize("length", ["abc", "-5", "+5", "1_0", "1.5"])
+def test_bad_content_length_keeps_earlier_responses(api, length):
+    payload = (request("POST", "/habits/1/completions", {"date": "2026-10-18"})
+               + request("GET", "/habits/1/completions")
+               + request("POST", "/habits/1/completions", headers=f"Content-Length: {length}\r\n"))
+    responses = asyncio.run(exchange(api, payload))
+    assert [status for status, _ in responses] == [201, 200, 400]
+    assert responses[1][1] == ["2026-10-18"]
+    assert "Content-Length" in responses[2][1]["error"]
@@ -0,0 +1,50 @@
+import datetime
+
+from cache import CachedDatabase
+from database import Database
+from streaks import to_day
+
+DAY = datetime.date(2026, 10, 18)
+
+
+def test_sees_writes_from_other_connections(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cached = CachedDatabase(Database(path, write_behind=0.5))
+    other = Database(path)
+    try:
+        user_id = other.create_user("a", "a@b.c", "x")
+        habit_id = other.add_habit(user_id, "Koşu", None, "daily")
+        assert cached.list_habits(user_id)[0]["name"] == "Koşu"
+        assert not cached.is_completed(habit_id, DAY)
+        assert cached.total_points(user_id) == 0
+
+        other.mark_completed(habit_id, DAY)
+        other.add_points(user_id, 1)
+        other.update_habit(habit_id, "Yürüyüş", None, "daily")
+        assert cached.is_completed(habit_id, DAY)
+        assert cached.completion_count_for_habit(habit_id) == 1
+        assert cached.total_points(user_id) == 1
+        assert cached.get_habit(habit_id)["name"] == "Yürüyüş"
+        assert cached.list_habits(user_id)[0]["name"] == "Yürüyüş"
+    finally:
+        other.close()
+        cached.close()
+
+
+def test_bulk_writes_invalidate(tmp_path):
+    cached = CachedDatabase(Database(str(tmp_path / "bulk.db")))
+    try:
+        user_id = cached.create_user("a", "a@b.c", "x")
+        habit_id = cached.add_habit(user_id, "Koşu", None, "daily")
+        cached.db.mark_completed(habit_id, DAY)
+        assert cached.total_points(user_id) == 0
+        assert cached.fix_points([user_id]) == {user_id: 1}
+        assert cached.total_points(user_id) == 1
+
+        assert cached.completions_for_habit(habit_id) == [to_day(DAY)]
+        result = cached.import_records([{"type": "completion", "email": "a@b.c", "name": "Koşu",
+                                         "date": DAY + datetime.timedelta(days=1)}], {})
+        assert not result["errors"], result
+        assert cached.completion_count_for_habit(habit_id) == 2
+    finally:
+        cached.close()
@@ -0,0 +1,51 @@
+import pytest
+
+import passwords
+from database import Database
+
+CHEAP = {"scheme": passwords.PBKDF2, "iterations": 1000}
+
+
+@pytest.fixture
+def calibrations(monkeypatch):
+    # Gerçek ölçüm yerine sayaçlı, ucuz parametreler
+    calls = []
+
+    def calibrate():
+        calls.append(1)
+        return dict(CHEAP, iterations=CHEAP["iterations"] + len(calls))
+
+    monkeypatch.setattr(passwords, "calibrate", calibrate)
+    monkeypatch.setattr(passwords, "SCHEME", passwords.PBKDF2)
+    yield calls
+    passwords.use_store(None)
+
+
+def test_params_are_calibrated_once_per_database(tmp_path, calibrations):
+    path = str(tmp_path / "pw.db")
+    for _ in range(3):
+        # Her yeni süreç kendi Database'ini açar
+        db = Database(path)
+        passwords.use_store(db)
+        assert passwords.current_params() == {"scheme": passwords.PBKDF2, "iterations": 1001}
+        db.close()
+    assert len(calibrations) == 1
+
+
+def test_other_scheme_is_recalibrated(tmp_path, calibrations):
+    db = Database(str(tmp_path / "pw.db"))
+    try:
+        db.set_meta(passwords.PARAMS_KEY, '{"scheme": "scrypt", "log_n": 14, "r": 8, "p": 1}')
+        passwords.use_store(db)
+        assert passwords.current_params()["scheme"] == passwords.PBKDF2
+        assert len(calibrations) == 1
+    finally:
+        db.close()
+
+
+def test_rehash_only_beyond_tolerance(calibrations):
+    passwords.set_params({"scheme": passwords.PBKDF2, "iterations": 4000})
+    assert not passwords.needs_rehash(passwords.hash_password("x", dict(CHEAP, iterations=3000)))
+    assert not passwords.needs_rehash(passwords.hash_password("x", dict(CHEAP, iterations=2000)))
+    assert passwords.needs_rehash(passwords.hash_password("x", dict(CHEAP, iterations=1999)))
+    assert passwords.needs_rehash("5e884898da28047151d0e56f8dc6292773603d0d6aabbdd62a11ef721d1542d8")
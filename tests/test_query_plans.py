@@ -0,0 +1,112 @@
+import datetime
+import re
+import sqlite3
+
+import pytest
+
+import archive
+import passwords
+from benchmarks.datagen import generate
+from database import Database
+from instrumentation import normalize_sql
+from leaderboard import ALL_TIME
+from migrations import (MIGRATIONS, QUERY_PLAN_CHECKS, SCHEMA_VERSION, check_query_plans, initial_schema,
+                        migrate, schema_version)
+from search import register_functions
+from archive import register_bitmap_functions
+
+
+def canonical(sql):
+    # Açılmış parametreler ?, parantez içi boşluklar ve IN (?, ?, ...) listeleri tek biçime indirilir
+    sql = normalize_sql(sql).replace("NULL", "?")
+    sql = re.sub(r"\(\s+", "(", re.sub(r"\s+\)", ")", sql))
+    return re.sub(r"\?(?:\s*,\s*\?)+", "?", sql)
+
+
+def exercise(db):
+    # QUERY_PLAN_CHECKS'in kapsadığı Database metotları; arşivli ve canlı yollar birlikte çalışır
+    user = db.get_user_by_email("user0@example.com")
+    habits = db.list_habits(user.id)
+    habit = habits[0]
+    days = db.completions_for_habit(habit.id)
+    today = datetime.date.today()
+    db.list_habits_page(user.id)
+    db.habit_name_exists(user.id, habit.name, exclude_id=habit.id)
+    db.search_habits(user.id, habit.name[:2])
+    db.completion_count_for_habit(habit.id)
+    db.is_completed(habit.id, days[0])
+    db.completions_between(habit.id, days[0], today)
+    db.completion_columns(user.id)
+    db.completion_counts_between(user.id, days[0], today)
+    db.schedule_rows(user.id, today)
+    db.points_drift([user.id])
+    db.leaderboard()
+    db.leaderboard(offset=db.top_points.k)
+    db.leaderboard(ALL_TIME, habit.category)
+    db.user_rank(user.id)
+    db.user_rank(user.id, ALL_TIME, habit.category)
+    db.streak_for_habit(habit.id)
+    db.unmark_completed(habit.id, days[-1])
+
+
+@pytest.fixture(autouse=True)
+def cheap_passwords():
+    # datagen parola özetler; ölçüm yerine düşük maliyet
+    passwords.set_params({"scheme": passwords.PBKDF2, "iterations": 1000})
+    yield
+    passwords.set_params(None)
+
+
+def test_checks_match_database_queries(tmp_path):
+    # Denetlenen SQL elle kopyalanmıştır; Database'in gerçekten çalıştırdığı ifadelerle karşılaştırılır
+    db = generate(str(tmp_path / "trace.db"), users=3, habits_per_user=4, years=3)
+    try:
+        db.archive_completions(archive.horizon(1))
+        statements = []
+        db.connections.add_connect_hook(lambda conn: conn.set_trace_callback(statements.append))
+        exercise(db)
+        # Tetikleyici ("-- TRIGGER") ve FTS5 iç ifadeleri ('main'.'habits_fts_...') sayılmaz
+        executed = {canonical(sql) for sql in statements
+                    if sql.lstrip().upper().startswith("SELECT") and "?.?" not in normalize_sql(sql)}
+        checked = {canonical(sql): name for name, (sql, _) in QUERY_PLAN_CHECKS.items()}
+        assert sorted(executed - set(checked)) == []
+        assert sorted(name for sql, name in checked.items() if sql not in executed) == []
+    finally:
+        db.close()
+
+
+def test_migrates_legacy_database(tmp_path):
+    path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(path)
+    cur = conn.cursor()
+    initial_schema(cur)
+    cur.execute("INSERT INTO users (username, email) VALUES ('a', 'a@b.c')")
+    cur.execute("INSERT INTO habits (user_id, name) VALUES (1, 'Koşu')")
+    cur.execute("INSERT INTO completions (habit_id, date) VALUES (1, '2024-01-02')")
+    conn.commit()
+    register_functions(conn)
+    register_bitmap_functions(conn)
+    assert migrate(conn) == SCHEMA_VERSION == MIGRATIONS[-1][0]
+    assert schema_version(conn) == SCHEMA_VERSION
+    assert conn.execute("SELECT date FROM completions").fetchall() == [(19724,)]
+    assert check_query_plans(conn) == {}
+    conn.close()
+
+
+def test_empty_database_uses_indexes(tmp_path):
+    db = Database(str(tmp_path / "empty.db"))
+    try:
+        assert schema_version(db.conn) == SCHEMA_VERSION
+        assert check_query_plans(db.conn) == {}
+    finally:
+        db.close()
+
+
+def test_populated_database_uses_indexes(tmp_path):
+    # İstatistiklerle planlayıcı farklı indeks seçebilir (bkz. habit_name_exists)
+    db = generate(str(tmp_path / "data.db"), users=5, habits_per_user=8, years=1)
+    try:
+        db.conn.execute("ANALYZE")
+        assert check_query_plans(db.conn) == {}
+    finally:
+        db.close()
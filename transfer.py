@@ -0,0 +1,163 @@
+import csv
+import datetime
+import json
+import os
+from streaks import DAILY, WEEKLY, MONTHLY, to_date
+
+# Tek dosya biçimi: her satır bir kullanıcı, alışkanlık ya da tamamlama kaydıdır.
+# Kayıtlar id yerine e-posta ve alışkanlık adıyla birbirine bağlanır, böylece başka bir veritabanına aktarılabilir.
+FIELDS = ["type", "username", "email", "password_hash", "name", "category", "frequency", "created_at", "date"]
+REQUIRED = {
+    "user": ("username", "email"),
+    "habit": ("email", "name", "frequency"),
+    "completion": ("email", "name", "date"),
+}
+FREQUENCIES = (DAILY, WEEKLY, MONTHLY)
+# merge: aynı adlı alışkanlığa ekle, rename: "Ad (2)" olarak ekle, skip: alışkanlığı ve tamamlamalarını atla
+CONFLICT_POLICIES = ("merge", "rename", "skip")
+CHUNK_SIZE = 1000
+PROGRESS_EVERY = 1000
+MAX_ERRORS = 100
+
+
+def detect_format(path):
+    return "csv" if str(path).lower().endswith(".csv") else "jsonl"
+
+
+def count_lines(path):
+    # İlerleme için toplam satır sayısı; dosya bellekte tutulmadan sayılır
+    lines = 0
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            lines += block.count(b"\n")
+    return lines
+
+
+# ---------------------------
+# Export
+# ---------------------------
+def export_records(db, user_id=None):
+    for record in db.export_rows(user_id):
+        for field in ("created_at", "date"):
+            if isinstance(record.get(field), (datetime.date, int)):
+                # completions.date gün sayısı olarak saklanır
+                record[field] = to_date(record[field]).isoformat()
+        yield record
+
+
+def export_file(db, path, user_id=None, fmt=None, progress=None):
+    # progress(yazılan kayıt, toplam kayıt)
+    fmt = fmt or detect_format(path)
+    total = sum(db.export_counts(user_id))
+    written = 0
+    tmp_path = f"{path}.tmp"
+    # Yarım kalan dışa aktarma var olan dosyanın üzerine yazılmaz
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            writer = csv.DictWriter(f, FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            write = writer.writerow
+        else:
+            def write(record):
+                f.write(json.dumps(record, ensure_ascii=False))
+                f.write("\n")
+        for record in export_records(db, user_id):
+            write(record)
+            written += 1
+            if progress and written % PROGRESS_EVERY == 0:
+                progress(written, total)
+    os.replace(tmp_path, path)
+    if progress:
+        progress(written, written)
+    return written
+
+
+# ---------------------------
+# Import
+# ---------------------------
+def read_records(path, fmt=None):
+    # (satır numarası, ham kayıt) üretir; çözümlenemeyen satırlar hata nesnesi olarak gelir
+    fmt = fmt or detect_format(path)
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        if fmt == "csv":
+            reader = csv.DictReader(f)
+            for raw in reader:
+                yield reader.line_num, raw
+            return
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield line_no, json.loads(line)
+            except ValueError as e:
+                yield line_no, e
+
+
+def validate(raw):
+    if isinstance(raw, Exception):
+        raise ValueError(f"okunamadı ({raw})")
+    if not isinstance(raw, dict):
+        raise ValueError("kayıt bir nesne olmalı")
+    kind = raw.get("type")
+    if kind not in REQUIRED:
+        raise ValueError(f"bilinmeyen kayıt türü: {kind!r}")
+    record = {"type": kind}
+    for field in FIELDS[1:]:
+        value = raw.get(field)
+        if isinstance(value, str):
+            value = value.strip()
+        record[field] = value if value not in ("", None) else None
+    missing = [field for field in REQUIRED[kind] if record[field] is None]
+    if missing:
+        raise ValueError(f"eksik alan: {', '.join(missing)}")
+    if kind == "habit" and record["frequency"] not in FREQUENCIES:
+        raise ValueError(f"geçersiz sıklık: {record['frequency']!r}")
+    for field in ("created_at", "date"):
+        if record[field] is not None:
+            try:
+                record[field] = to_date(str(record[field]))
+            except ValueError:
+                raise ValueError(f"geçersiz tarih ({field}): {record[field]!r}")
+    return record
+
+
+def import_file(db, path, fmt=None, user_id=None, on_conflict="merge", chunk_size=CHUNK_SIZE, progress=None):
+    # progress(okunan satır, toplam satır). Her parça kendi transaction'ında yazılır.
+    if on_conflict not in CONFLICT_POLICIES:
+        raise ValueError(f"on_conflict şunlardan biri olmalı: {', '.join(CONFLICT_POLICIES)}")
+    total = count_lines(path)
+    result = {"records": 0, "users": 0, "habits": 0, "renamed": 0, "skipped": 0, "completions": 0,
+              "errors": [], "error_count": 0}
+    state = {}
+
+    def error(message):
+        result["error_count"] += 1
+        if len(result["errors"]) < MAX_ERRORS:
+            result["errors"].append(message)
+
+    def flush(chunk):
+        counts = db.import_records(chunk, state, user_id=user_id, on_conflict=on_conflict)
+        for key in ("users", "habits", "renamed", "skipped", "completions"):
+            result[key] += counts[key]
+        for message in counts["errors"]:
+            error(message)
+
+    chunk = []
+    for line_no, raw in read_records(path, fmt):
+        try:
+            chunk.append(validate(raw))
+        except ValueError as e:
+            error(f"Satır {line_no}: {e}")
+            continue
+        result["records"] += 1
+        if len(chunk) >= chunk_size:
+            flush(chunk)
+            chunk = []
+            if progress:
+                progress(min(line_no, total), total)
+    if chunk:
+        flush(chunk)
+    db.flush()
+    if progress:
+        progress(total, total)
+    return result